@@ -0,0 +1,32 @@
+# Batch deliverable builder
+# Pumpkin Inc.
+#
+# Builds the deliverables for every project under the search directory that
+# contains a Deliverable.bat file, several projects at a time.
+#
+# Usage: Deliverable_batch.py [search directory] [--full]
+
+# protect from subprocessing module
+if __name__ == '__main__':
+
+    import os
+    import sys
+
+    #directory to search:
+    search_dir = "Y:\Shared drives\Asteria - Engineering\Pumpkin\Pumpkin Circuit Boards"
+
+    # separate any options, such as --full, from the positional arguments
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    arguments = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    if len(arguments) > 0:
+        search_dir = arguments[0]
+    # end if
+
+    prog_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(1, prog_dir + '\\src\\')
+    import Altium_Batch
+
+    Altium_Batch.run_batch(search_dir, prog_dir, options)
+
+# end if
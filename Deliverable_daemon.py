@@ -0,0 +1,29 @@
+# Deliverable build daemon
+# Pumpkin Inc.
+#
+# Keeps the Altium Documentation module loaded so that Deliverable.bat builds
+# start straight away. Leave this running in its own window, Deliverable.bat
+# builds in this process while it is running and on its own when it is not.
+#
+# Usage: Deliverable_daemon.py [--stop]
+
+# protect from subprocessing module
+if __name__ == '__main__':
+
+    import os
+    import sys
+
+    prog_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(1, prog_dir + '\\src\\')
+    import Altium_Daemon
+
+    if '--stop' in sys.argv[1:]:
+        if not Altium_Daemon.stop_daemon():
+            print('No deliverable daemon is running')
+        # end if
+
+    else:
+        Altium_Daemon.serve(prog_dir)
+    # end if
+
+# end if
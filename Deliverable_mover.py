@@ -1,20 +1,15 @@
 # Deliverable.bat 
 
 import os
+import sys
 import shutil
+sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)) + '\\src\\')
+import Altium_Batch
 
 #directory to search:
 search_dir = "Y:\Shared drives\Asteria - Engineering\Pumpkin\Pumpkin Circuit Boards"
 
-bat_paths = []
-
-for root, dirs, files in os.walk(search_dir):
-    for filename in files:
-        if filename.endswith("Deliverable.bat"):
-            bat_paths.append(os.path.join(root,filename))
-        #end if
-    #end for
-# end for
+bat_paths = Altium_Batch.find_deliverable_files(search_dir)
 
 for bat_file in bat_paths:
     os.remove(bat_file)
@@ -0,0 +1,83 @@
+# PDF page splitting benchmark
+# Pumpkin Inc.
+#
+# Times splitting pdfs into a pdf for each page the way the schematic used
+# to be split, reading the pdf again for every page, against reading it
+# once, in this process and in worker processes. Run it on schematics of
+# 50 to 200 pages.
+#
+# Usage: Deliverable_split_benchmark.py <pdf> [<pdf> ...]
+
+# protect from subprocessing module
+if __name__ == '__main__':
+
+    import os
+    import sys
+    import time
+    import shutil
+    import tempfile
+
+    prog_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(1, prog_dir + '\\src\\')
+    import PyPDF2
+    import Altium_Split
+
+    def split_rereading(source, pattern):
+        """
+        Split a pdf as manage_schematic used to, reading it for every page.
+        """
+        bytes_out = 0
+
+        with open(source, 'rb') as pdf_file:
+            page_count = PyPDF2.PdfFileReader(pdf_file).numPages
+
+            for page in range(page_count):
+                output = PyPDF2.PdfFileWriter()
+                output.addPage(PyPDF2.PdfFileReader(pdf_file).getPage(page))
+
+                with open(pattern % (page + 1), 'wb') as output_file:
+                    output.write(output_file)
+                    bytes_out += output_file.tell()
+                # end with
+            # end for
+        # end with
+
+        return page_count, bytes_out
+    # end def
+
+    if len(sys.argv) < 2:
+        print('Usage: Deliverable_split_benchmark.py <pdf> [<pdf> ...]')
+        sys.exit(1)
+    # end if
+
+    print('%-30s %6s %-14s %9s %12s %7s' % ('pdf', 'pages', 'method', 'time (s)',
+                                             'output (kB)', 'ratio'))
+
+    for source in sys.argv[1:]:
+        bytes_in = os.path.getsize(source)
+
+        for method in ['read per page', 'read once', 'workers']:
+            output_dir = tempfile.mkdtemp()
+            pattern = os.path.join(output_dir, 'page-%d.pdf')
+            start_time = time.time()
+
+            if method == 'read per page':
+                [pages, bytes_out] = split_rereading(source, pattern)
+
+            else:
+                result = Altium_Split.split_pdf(source, pattern,
+                                                0 if method == 'read once' else None)
+                [pages, bytes_out] = [result.pages, result.bytes_out]
+            # end if
+
+            elapsed = time.time() - start_time
+            shutil.rmtree(output_dir)
+
+            print('%-30s %6d %-14s %9.2f %12.1f %7.2f' % (os.path.basename(source)[:30],
+                                                          pages, method, elapsed,
+                                                          bytes_out / 1024.0,
+                                                          bytes_out / float(bytes_in)))
+        # end for
+    # end for
+
+# end if
@@ -0,0 +1,39 @@
+# Deliverable startup check
+# Pumpkin Inc.
+#
+# Reports how long the Altium Documentation module takes to import and fails
+# if it is over budget or imports a library before it is needed.
+#
+# Usage: Deliverable_startup.py [budget in seconds]
+
+# protect from subprocessing module
+if __name__ == '__main__':
+
+    import os
+    import sys
+
+    prog_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(1, prog_dir + '\\src\\')
+    import Altium_Startup
+
+    budget = Altium_Startup.import_budget
+
+    if len(sys.argv) > 1:
+        budget = float(sys.argv[1])
+    # end if
+
+    [imports, problems] = Altium_Startup.check_budget(prog_dir, budget)
+
+    print(Altium_Startup.format_report(imports))
+
+    for problem in problems:
+        print('*** Error: ' + problem + ' ***')
+    # end for
+
+    if problems:
+        sys.exit(1)
+    # end if
+
+    print('Startup is within budget')
+
+# end if
@@ -0,0 +1,37 @@
+# Deliverable archive verifier
+# Pumpkin Inc.
+#
+# Checks every _Folder.zip under the search directory, several at a time,
+# without extracting them: the CRC of every member, the layout of the
+# deliverable and, where there is one, the MANIFEST.
+#
+# Usage: Deliverable_verify.py [search directory]
+
+# protect from subprocessing module
+if __name__ == '__main__':
+
+    import os
+    import sys
+
+    #directory to search:
+    search_dir = "Y:\Shared drives\Asteria - Engineering\Pumpkin\Pumpkin Circuit Boards"
+
+    # separate any options from the positional arguments
+    arguments = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    if len(arguments) > 0:
+        search_dir = arguments[0]
+    # end if
+
+    prog_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(1, prog_dir + '\\src\\')
+    import Altium_Verify
+
+    results = Altium_Verify.run_verify(search_dir)
+
+    # a failed archive fails the run, so it can be used from scripts
+    if any(result.problems for result in results):
+        sys.exit(1)
+    # end if
+
+# end if
@@ -0,0 +1,32 @@
+# Deliverable watcher
+# Pumpkin Inc.
+#
+# Watches an Altium project and builds its deliverable each time the OutJob
+# has finished writing new outputs.
+#
+# Usage: Deliverable_watch.py [project directory] [--full]
+
+# protect from subprocessing module
+if __name__ == '__main__':
+
+    import os
+    import sys
+
+    # separate any options, such as --full, from the positional arguments
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    arguments = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    # watch the current directory unless told otherwise
+    starting_dir = os.getcwd()
+
+    if len(arguments) > 0:
+        starting_dir = arguments[0]
+    # end if
+
+    prog_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(1, prog_dir + '\\src\\')
+    import Altium_Watch
+
+    Altium_Watch.watch(starting_dir, prog_dir, options)
+
+# end if
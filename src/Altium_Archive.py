@@ -0,0 +1,866 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Archive.py
+
+Package that writes the deliverable archives by streaming each file straight
+from where it is into the zip, including zips nested inside the archive, so
+that nothing is copied to a temporary folder first.
+
+Large files can be deflated in blocks by a pool of worker processes, as pigz
+does: each block is compressed with the end of the previous block as its
+dictionary and the blocks are joined into a single deflate stream, so the
+archive can be read by any zip tool. zipfile cannot add data that is already
+deflated, so this is only done on the versions of Python it has been checked
+with, others have zipfile deflate each file.
+
+Files that are already compressed, such as nested zips, Office documents, xps
+prints and most PDFs, are stored rather than deflated again, as doing so
+costs time for almost no reduction in size.
+
+Large files are split into the same blocks however many workers there are,
+so an archive does not depend on the machine it was made on. In reproducible
+mode every member also has a fixed timestamp and permissions, so the same
+files always give the same archive.
+
+Each file is hashed with SHA-256 as it is read into the archive, so a
+manifest of every member, nested ones included, can be added without reading
+anything again.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import sys
+import time
+import zlib
+import hashlib
+import shutil
+import zipfile
+import tempfile
+import collections
+import multiprocessing
+import concurrent.futures
+
+#
+# -------
+# Constants
+
+# members at least this large are written with zip64 extensions, the size of
+# a nested zip is not known until it has been written so this leaves room
+# for it to be larger than the files it holds
+zip64_threshold = zipfile.ZIP64_LIMIT // 2
+
+# files smaller than this are deflated in this process as sending them to a
+# worker takes longer than compressing them (bytes)
+parallel_threshold = 1024*1024
+
+# the versions of Python whose zipfile internals _write_compressed has been
+# checked against, others deflate each file with ZipFile.open instead
+raw_write_versions = [(3, 8), (3, 11)]
+
+# the size of the blocks sent to the workers (bytes)
+block_size = 2*1024*1024
+
+# the amount of the previous block used as the dictionary of the next, the
+# largest window deflate can refer back to (bytes)
+dictionary_size = 32*1024
+
+# compressed files larger than this are held on disk until they are written
+# to the archive (bytes)
+spool_size = 64*1024*1024
+
+# file types that are always compressed already, most are zips themselves
+stored_ext = ('.zip', '.xlsx', '.docx', '.pptx', '.xps', '.oxps', '.png',
+              '.jpg', '.jpeg', '.gz', '.7z')
+
+# the typical speed of deflate at the default level on data that is already
+# compressed, to estimate the time saved by storing such files without
+# deflating any of them (bytes per second)
+deflate_rate = 20*1024*1024
+
+# the size of each of the pieces of a file that are deflated to see how well
+# it compresses, files up to three times this are deflated whole (bytes)
+sample_size = 32*1024
+
+# files that deflate to more than this fraction of their size are stored
+store_ratio = 0.9
+
+# files that deflate to more than this fraction of their size gain little
+# from a slower level, so are deflated at the fast level
+fast_ratio = 0.7
+
+# files larger than this are deflated at the fast level (bytes)
+fast_size = 128*1024*1024
+
+# the deflate levels used
+default_level = 6
+fast_level = 1
+
+# the permissions given to members of a reproducible archive
+file_permissions = 0o100644
+folder_permissions = 0o40755
+
+# the unix creator system, so that the permissions are used when unzipped
+unix_system = 3
+
+# the name of the manifest in an archive
+manifest_name = 'MANIFEST'
+
+#
+# -------
+# Classes
+
+class archive_writer:
+    """
+    Class to write a zip archive one member at a time, for use in a with
+    statement.
+
+    @attribute     name:       The archive filename, or the member name for a
+                               nested archive (string).
+    @attribute     zip_file:   The archive being written (zipfile.ZipFile).
+    @attribute     stats:      What was compressed and what was stored
+                               (archive_stats).
+    @attribute     reproducible: Whether every member has a fixed timestamp
+                               and permissions (bool).
+    @attribute     manifest:   The path, size, CRC-32 and SHA-256 of each
+                               member added so far, including those of
+                               nested archives (list of lists).
+    """
+    def __init__(self, filename, stream = None, workers = 1, pool = None,
+                 parent = None, reproducible = False):
+        """
+        Initialise the archive_writer class
+
+        @param[in]     filename:   The archive to create (full path), or the
+                                   member name of a nested archive (string).
+        @param[in]     stream:     The stream to write the archive to, None to
+                                   create the file (file object).
+        @param[in]     workers:    The number of processes to deflate large
+                                   files with, 1 to deflate everything in
+                                   this process (int).
+        @param[in]     pool:       The workers of the archive this one is
+                                   nested in (concurrent.futures.Executor).
+        @param[in]     parent:     The archive this one is nested in, its
+                                   stats include this one (archive_writer).
+        @param[in]     reproducible: Give every member a fixed timestamp and
+                                   permissions (bool).
+        """
+        self.name = filename
+        self.stats = archive_stats()
+        self.manifest = []
+        self.reproducible = reproducible
+        self._stream = stream
+        self._pool = pool
+        self._own_pool = False
+        self._parent = parent
+
+        if (pool == None) and (workers > 1):
+            self._pool = _create_pool(workers)
+            self._own_pool = self._pool != None
+        # end if
+
+        if stream == None:
+            self.zip_file = zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED)
+
+        else:
+            self.zip_file = zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED)
+        # end if
+    # end def
+
+    def __enter__(self):
+        return self
+    # end def
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+        return False
+    # end def
+
+    def add_file(self, source, arcname):
+        """
+        Add a file to the archive, reading it in blocks. It is stored or
+        deflated as choose_compression decides.
+
+        @param[in]    source:          The file to add (full path) (string).
+        @param[in]    arcname:         Its name in the archive (string).
+        @return       (int)            The number of bytes read.
+        """
+        size = os.path.getsize(source)
+        [compress_type, level, seconds] = choose_compression(source, size)
+
+        info = self._member_info(source, arcname)
+        info.compress_type = compress_type
+
+        digest = hashlib.sha256()
+
+        deflate_blocks = (compress_type == zipfile.ZIP_DEFLATED) and _can_write_compressed()
+
+        if not deflate_blocks:
+            if compress_type == zipfile.ZIP_DEFLATED:
+                # zipfile deflates it as it is written, at its default level
+                level = default_level
+            # end if
+
+            with open(source, 'rb') as source_file, \
+                 self.zip_file.open(info, 'w') as member:
+                block = source_file.read(block_size)
+
+                while block:
+                    digest.update(block)
+                    member.write(block)
+                    block = source_file.read(block_size)
+                # end while
+            # end with
+
+        else:
+            # deflated in blocks, by the workers if there are any
+            pool = self._pool if size >= parallel_threshold else None
+
+            with tempfile.SpooledTemporaryFile(spool_size) as compressed:
+                [info.CRC, info.file_size] = _deflate_file(pool, source, 
+                                                           compressed, level,
+                                                           digest)
+                info.compress_size = compressed.tell()
+                compressed.seek(0)
+
+                _write_compressed(self.zip_file, info, compressed)
+            # end with
+        # end if
+
+        self.stats.add(info, level, seconds)
+        self.manifest.append([arcname, info.file_size, info.CRC, digest.hexdigest()])
+
+        return info.file_size
+    # end def
+
+    def add_folder(self, folder):
+        """
+        Add everything in a folder with names relative to the folder, in the
+        same layout shutil.make_archive gives: every sub folder has an entry
+        of its own.
+
+        @param[in]    folder:          The folder to add (full path) (string).
+        @return       (int)            The number of bytes read.
+        """
+        count = 0
+
+        for [path, arcname] in list_folder(folder):
+            if os.path.isdir(path):
+                self.zip_file.writestr(self._member_info(path, arcname), b'')
+
+            else:
+                count += self.add_file(path, arcname)
+            # end if
+        # end for
+
+        return count
+    # end def
+
+    def add_data(self, data, arcname):
+        """
+        Add a member made in memory, such as a small report.
+
+        @param[in]    data:            The contents of the member (bytes).
+        @param[in]    arcname:         Its name in the archive (string).
+        @return       (int)            The number of bytes added.
+        """
+        info = zipfile.ZipInfo(arcname, time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+
+        if self.reproducible:
+            _normalise(info)
+        # end if
+
+        self.zip_file.writestr(info, data, compresslevel = default_level)
+        self.stats.add(info, default_level, 0.0)
+        self.manifest.append([arcname, info.file_size, info.CRC, 
+                              hashlib.sha256(data).hexdigest()])
+
+        return len(data)
+    # end def
+
+    def add_nested(self, arcname, size_hint = 0):
+        """
+        Start a zip that is stored as a member of this archive. Members are
+        added to the returned writer, which must be closed before anything
+        else is added to this archive.
+
+        @param[in]    arcname:         The name of the nested zip (string).
+        @param[in]    size_hint:       The size of the files that will be put
+                                       in it (int).
+        @return       (archive_writer) The writer of the nested zip.
+        """
+        # the nested zip is compressed already so it is stored
+        info = zipfile.ZipInfo(arcname, time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        info.external_attr = 0o644 << 16
+
+        if self.reproducible:
+            _normalise(info)
+        # end if
+
+        # hashed as it is written, so it is recorded in the manifest too
+        stream = hashing_stream(self.zip_file.open(info, 'w', 
+                                                   force_zip64 = size_hint >= zip64_threshold),
+                                info)
+
+        return archive_writer(arcname, stream, pool = self._pool, parent = self,
+                              reproducible = self.reproducible)
+    # end def
+
+    def add_manifest(self, arcname = manifest_name):
+        """
+        Add a manifest of every member added so far, with its size, CRC-32
+        and SHA-256, so that the archive can be checked without being 
+        extracted. Members of nested archives are listed with the name of 
+        the nested archive and a slash before their own.
+
+        @param[in]    arcname:         The name of the manifest (string).
+        @return       (int)            The number of members listed.
+        """
+        self.add_data(format_manifest(self.manifest).encode('utf-8'), arcname)
+
+        return len(self.manifest) - 1
+    # end def
+
+    def _member_info(self, path, arcname):
+        """
+        Describe a file or folder as a member of the archive.
+
+        @param[in]    path:            The file or folder (full path) (string).
+        @param[in]    arcname:         Its name in the archive (string).
+        @return       (zipfile.ZipInfo) The member.
+        """
+        info = zipfile.ZipInfo.from_file(path, arcname)
+
+        if self.reproducible:
+            _normalise(info)
+        # end if
+
+        return info
+    # end def
+
+    def close(self):
+        """
+        Finish writing the archive.
+        """
+        try:
+            self.zip_file.close()
+
+            if self._stream != None:
+                # the end of a nested zip, so complete its member
+                self._stream.close()
+            # end if
+
+            if self._parent != None:
+                self._parent.stats.merge(self.stats)
+                self._parent.manifest.extend([self.name + '/' + entry[0]] + entry[1:]
+                                             for entry in self.manifest)
+                self._parent.manifest.append([self.name, self._stream.info.file_size,
+                                              self._stream.info.CRC,
+                                              self._stream.digest.hexdigest()])
+            # end if
+
+        finally:
+            if self._own_pool:
+                self._pool.shutdown()
+            # end if
+        # end try
+    # end def
+# end class
+
+
+class hashing_stream:
+    """
+    Class to hash the data written to a stream, such as a nested zip as it is
+    written into its archive.
+
+    @attribute     info:       The member the stream writes (zipfile.ZipInfo).
+    @attribute     digest:     The SHA-256 of the data written so far
+                               (hashlib.sha256).
+    """
+    def __init__(self, stream, info):
+        """
+        Initialise the hashing_stream class
+
+        @param[in]     stream:     The stream to write to (file object).
+        @param[in]     info:       The member it writes (zipfile.ZipInfo).
+        """
+        self.info = info
+        self.digest = hashlib.sha256()
+        self._stream = stream
+    # end def
+
+    def write(self, data):
+        self.digest.update(data)
+        return self._stream.write(data)
+    # end def
+
+    def flush(self):
+        self._stream.flush()
+    # end def
+
+    def close(self):
+        self._stream.close()
+    # end def
+# end class
+
+
+class archive_stats:
+    """
+    Class to store how the members of an archive were compressed.
+
+    @attribute     files:      The number of files added (int).
+    @attribute     stored:     The number of files stored without being
+                               compressed (int).
+    @attribute     bytes_in:   The size of the files added (int).
+    @attribute     bytes_out:  Their size in the archive (int).
+    @attribute     seconds:    The estimated time deflating the stored files
+                               would have taken (float).
+    """
+    def __init__(self):
+        """
+        Initialise the archive_stats class
+        """
+        self.files = 0
+        self.stored = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+    # end def
+
+    def add(self, info, level, seconds):
+        """
+        Record a file added to the archive.
+
+        @param[in]    info:            The member (zipfile.ZipInfo).
+        @param[in]    level:           The deflate level, None if it was
+                                       stored (int).
+        @param[in]    seconds:         The estimated time deflating it would
+                                       have taken (float).
+        """
+        self.files += 1
+        self.bytes_in += info.file_size
+        self.bytes_out += info.compress_size
+
+        if level == None:
+            self.stored += 1
+            self.seconds += seconds
+        # end if
+    # end def
+
+    def merge(self, other):
+        """
+        Include the files of another archive, such as a nested one.
+
+        @param[in]    other:           The stats to include (archive_stats).
+        """
+        self.files += other.files
+        self.stored += other.stored
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+        self.seconds += other.seconds
+    # end def
+
+    def report(self, name):
+        """
+        Describe the compression of an archive.
+
+        @param[in]    name:            The name of the archive (string).
+        @return       (string)         The description.
+        """
+        return ('\t' + name + ': ' + str(self.files) + ' files, ' +
+                '%.1f' % (self.bytes_in / 1048576.0) + ' MB compressed to ' +
+                '%.1f' % (self.bytes_out / 1048576.0) + ' MB (' +
+                '%.1f' % ((self.bytes_in - self.bytes_out) / 1048576.0) + ' MB saved), ' +
+                str(self.stored) + ' already compressed files stored, saving about ' +
+                '%.1f' % self.seconds + ' s of compression')
+    # end def
+# end class
+
+
+#
+# ----------------
+# Public Functions
+
+def format_manifest(entries):
+    """
+    Format a manifest, one member per line with its SHA-256, CRC-32 (hex),
+    size and path separated by spaces. The path is last as it can contain
+    spaces.
+
+    @param[in]    entries:         The path, size, CRC-32 and SHA-256 of each
+                                   member (list of lists).
+    @return       (string)         The manifest.
+    """
+    lines = ['# SHA-256 CRC-32 size path']
+
+    for [path, size, crc, digest] in entries:
+        lines.append(digest + ' ' + '%08x' % crc + ' ' + str(size) + ' ' + path)
+    # end for
+
+    return '\n'.join(lines) + '\n'
+# end def
+
+
+def read_manifest(text):
+    """
+    Read a manifest written by format_manifest.
+
+    @param[in]    text:            The manifest (string).
+    @return       (dict)           The size, CRC-32 and SHA-256 of each member
+                                   keyed by its path.
+    """
+    entries = {}
+
+    for line in text.splitlines():
+        if line.startswith('#') or (line.strip() == ''):
+            continue
+        # end if
+
+        [digest, crc, size, path] = line.split(' ', 3)
+        entries[path] = [int(size), int(crc, 16), digest]
+    # end for
+
+    return entries
+# end def
+
+
+def choose_compression(source, size):
+    """
+    Decide how to compress a file. Types that are always compressed are 
+    stored, as are files whose samples barely deflate, such as PDFs with 
+    compressed streams. Files that deflate a little, and very large files, 
+    use the fast level.
+
+    @param[in]    source:          The file (full path) (string).
+    @param[in]    size:            Its size in bytes (int).
+    @return       (int)            The compression, zipfile.ZIP_STORED or
+                                   zipfile.ZIP_DEFLATED.
+    @return       (int)            The deflate level, None if it is stored.
+    @return       (float)          The estimated time deflating it at the
+                                   default level would take (seconds).
+    """
+    if source.lower().endswith(stored_ext):
+        # not sampled, as that would spend the time storing it saves
+        return zipfile.ZIP_STORED, None, size / float(deflate_rate)
+    # end if
+
+    if size < sample_size:
+        # too small for it to matter
+        return zipfile.ZIP_DEFLATED, default_level, 0.0
+    # end if
+
+    [ratio, seconds] = _sample_compression(source, size)
+
+    if ratio > store_ratio:
+        return zipfile.ZIP_STORED, None, seconds
+    # end if
+
+    if (ratio > fast_ratio) or (size > fast_size):
+        return zipfile.ZIP_DEFLATED, fast_level, seconds
+    # end if
+
+    return zipfile.ZIP_DEFLATED, default_level, seconds
+# end def
+
+
+def archive_folder(folder, zip_filename, workers = 1, reproducible = False):
+    """
+    Zip a folder, as shutil.make_archive does but without changing the
+    working directory of the process, which other threads depend on.
+
+    @param[in]    folder:          The folder to archive (full path) (string).
+    @param[in]    zip_filename:    The archive to create (full path) (string).
+    @param[in]    workers:         The number of processes to deflate large
+                                   files with (int).
+    @param[in]    reproducible:    Give every member a fixed timestamp and
+                                   permissions (bool).
+    @return       (int)            The number of bytes read.
+    """
+    with archive_writer(zip_filename, workers = workers, 
+                        reproducible = reproducible) as archive:
+        return archive.add_folder(folder)
+    # end with
+# end def
+
+
+def list_folder(folder):
+    """
+    List everything in a folder with the names to give them in an archive.
+
+    @param[in]    folder:          The folder (full path) (string).
+    @return       (list)           The full path of each file and sub folder
+                                   with its name relative to the folder.
+    """
+    entries = []
+
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+
+        for name in dirs + sorted(files):
+            path = os.path.join(root, name)
+            entries.append([path, os.path.relpath(path, folder).replace(os.sep, '/')])
+        # end for
+    # end for
+
+    return entries
+# end def
+
+
+def folder_size(folder):
+    """
+    Get the total size of the files in a folder.
+
+    @param[in]    folder:          The folder (full path) (string).
+    @return       (int)            The size in bytes.
+    """
+    return sum(os.path.getsize(path) for [path, arcname] in list_folder(folder)
+               if not os.path.isdir(path))
+# end def
+
+
+def default_workers():
+    """
+    Get the number of processes to deflate large files with. Worker
+    processes of a batch cannot start processes of their own, so they
+    deflate everything themselves.
+
+    @return       (int)            The number of processes.
+    """
+    if multiprocessing.current_process().daemon:
+        return 1
+    # end if
+
+    return os.cpu_count() or 1
+# end def
+
+
+#
+# ----------------
+# Private Functions
+
+def _create_pool(workers):
+    """
+    Start the processes that deflate blocks.
+
+    @param[in]    workers:         The number of processes (int).
+    @return       (Executor)       The pool, None if processes cannot be
+                                   started here.
+    """
+    try:
+        return concurrent.futures.ProcessPoolExecutor(workers)
+
+    except (OSError, NotImplementedError, ValueError):
+        return None
+    # end try
+# end def
+
+
+def _deflate_file(pool, source, compressed, level, digest):
+    """
+    Deflate a file in blocks, using a pool of processes if there is one. The 
+    file is read and its CRC calculated here while the workers compress the 
+    blocks already read, and no more than two blocks per worker are held at 
+    once. The result is the same with or without the workers.
+
+    @param[in]    pool:            The workers, None to deflate the blocks
+                                   here (concurrent.futures.Executor).
+    @param[in]    source:          The file to deflate (full path) (string).
+    @param[out]   compressed:      The stream to write the deflated data to
+                                   (file object).
+    @param[in]    level:           The deflate level (int).
+    @param[out]   digest:          Updated with the contents of the file 
+                                   (hashlib.sha256).
+    @return       (int)            The CRC32 of the file.
+    @return       (int)            The size of the file.
+    """
+    crc = 0
+    size = 0
+    dictionary = b''
+    pending = collections.deque()
+    max_pending = 2 * (os.cpu_count() or 1)
+
+    with open(source, 'rb') as source_file:
+        block = source_file.read(block_size)
+
+        while block:
+            next_block = source_file.read(block_size)
+
+            crc = zlib.crc32(block, crc)
+            digest.update(block)
+            size += len(block)
+
+            if pool == None:
+                compressed.write(_deflate_block(block, dictionary, level,
+                                                next_block == b''))
+
+            else:
+                pending.append(pool.submit(_deflate_block, block, dictionary,
+                                           level, next_block == b''))
+            # end if
+            dictionary = block[-dictionary_size:]
+
+            while len(pending) >= max_pending:
+                compressed.write(pending.popleft().result())
+            # end while
+
+            block = next_block
+        # end while
+    # end with
+
+    while pending:
+        compressed.write(pending.popleft().result())
+    # end while
+
+    return crc, size
+# end def
+
+
+def _deflate_block(block, dictionary, level, last):
+    """
+    Deflate one block of a file, in a worker process. Every block but the
+    last ends on a byte boundary without ending the stream so that the
+    blocks can be joined.
+
+    @param[in]    block:           The data (bytes).
+    @param[in]    dictionary:      The end of the previous block (bytes).
+    @param[in]    level:           The deflate level (int).
+    @param[in]    last:            True for the last block of the file (bool).
+    @return       (bytes)          The raw deflate data.
+    """
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, 
+                                      zdict = dictionary)
+
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    # end if
+
+    return compressor.compress(block) + compressor.flush(zlib.Z_FINISH if last
+                                                         else zlib.Z_SYNC_FLUSH)
+# end def
+
+
+def _normalise(info):
+    """
+    Give a member the fixed timestamp and permissions of a reproducible
+    archive. The timestamp is taken from SOURCE_DATE_EPOCH if it is set, as
+    other reproducible build tools do, otherwise the earliest a zip can hold.
+
+    @param[out]   info:            The member (zipfile.ZipInfo).
+    """
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+
+    if (epoch == None) or not epoch.isdigit():
+        info.date_time = (1980, 1, 1, 0, 0, 0)
+
+    else:
+        info.date_time = max((1980, 1, 1, 0, 0, 0), time.gmtime(int(epoch))[:6])
+    # end if
+
+    info.create_system = unix_system
+
+    if info.is_dir():
+        info.external_attr = (folder_permissions << 16) | 0x10
+
+    else:
+        info.external_attr = file_permissions << 16
+    # end if
+# end def
+
+
+def _sample_compression(source, size):
+    """
+    Deflate pieces from the start, middle and end of a file to see how well
+    it compresses and how long that takes.
+
+    @param[in]    source:          The file (full path) (string).
+    @param[in]    size:            Its size in bytes (int).
+    @return       (float)          The deflated size of the pieces as a
+                                   fraction of their size.
+    @return       (float)          The estimated time deflating the whole
+                                   file would take (seconds).
+    """
+    with open(source, 'rb') as source_file:
+        if size <= 3 * sample_size:
+            pieces = [source_file.read()]
+
+        else:
+            pieces = []
+
+            for offset in [0, (size - sample_size) // 2, size - sample_size]:
+                source_file.seek(offset)
+                pieces.append(source_file.read(sample_size))
+            # end for
+        # end if
+    # end with
+
+    sampled = sum(len(piece) for piece in pieces)
+
+    start = time.perf_counter()
+    deflated = sum(len(zlib.compress(piece, default_level)) for piece in pieces)
+    seconds = time.perf_counter() - start
+
+    return deflated / float(max(sampled, 1)), seconds * size / max(sampled, 1)
+# end def
+
+
+def _can_write_compressed():
+    """
+    Determine if members deflated in blocks can be added to an archive, 
+    which uses the internals of zipfile as it has no way to add data that 
+    is already deflated.
+
+    @return       (bool)           True if this version of Python has been
+                                   checked.
+    """
+    return raw_write_versions[0] <= sys.version_info[:2] <= raw_write_versions[1]
+# end def
+
+
+def _write_compressed(zip_file, info, compressed):
+    """
+    Add a member whose data has already been deflated to an archive, as
+    ZipFile.write does after compressing it. Only for the versions of Python 
+    in raw_write_versions.
+
+    @param[in]    zip_file:        The archive (zipfile.ZipFile).
+    @param[in]    info:            The member with its CRC and sizes set
+                                   (zipfile.ZipInfo).
+    @param[in]    compressed:      The deflated data (file object).
+    """
+    with zip_file._lock:
+        if zip_file._writing:
+            raise ValueError('Cannot add a member while another is being written')
+        # end if
+
+        zip_file._writecheck(info)
+        zip_file._didModify = True
+
+        info.header_offset = zip_file.fp.tell()
+        zip_file.fp.write(info.FileHeader())
+        shutil.copyfileobj(compressed, zip_file.fp)
+
+        zip_file.start_dir = zip_file.fp.tell()
+        zip_file.filelist.append(info)
+        zip_file.NameToInfo[info.filename] = info
+    # end with
+# end def
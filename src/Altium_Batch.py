@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Batch.py
+
+Package that finds the Altium projects under a directory and builds their
+deliverables in parallel.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import sys
+sys.path.insert(1, 'src\\')
+import time
+import contextlib
+import traceback
+import multiprocessing
+
+#
+# -------
+# Constants
+
+# the file that marks a folder as an Altium project
+deliverable_filename = 'Deliverable.bat'
+
+#
+# ----------------
+# Public Functions
+
+def find_deliverable_files(search_dir):
+    """
+    Find every Deliverable.bat file below a directory.
+
+    @param[in]    search_dir:      The directory to search (full path)
+                                   (string).
+    @return       (list)           The full path of each file found.
+    """
+    bat_paths = []
+
+    for root, dirs, files in os.walk(search_dir):
+        for filename in files:
+            if filename.endswith(deliverable_filename):
+                bat_paths.append(os.path.join(root,filename))
+            #end if
+        #end for
+    # end for
+
+    return bat_paths
+# end def
+
+
+def find_projects(search_dir):
+    """
+    Find every Altium project below a directory, as marked by a
+    Deliverable.bat file.
+
+    @param[in]    search_dir:      The directory to search (full path)
+                                   (string).
+    @return       (list)           The full path of each project directory,
+                                   sorted.
+    """
+    projects = set(os.path.dirname(p) for p in find_deliverable_files(search_dir))
+
+    return sorted(projects)
+# end def
+
+
+def run_batch(search_dir, prog_dir, options = [], workers = None,
+              summary_filename = 'Deliverable_batch_summary.txt'):
+    """
+    Build the deliverables of every project below a directory, several at a
+    time. Nothing waits for user input, so warnings must be reviewed from the
+    summary and each project's Deliverable_log.txt.
+
+    @param[in]    search_dir:        The directory to search (full path)
+                                     (string).
+    @param[in]    prog_dir:          The directory this program is installed
+                                     in (full path) (string).
+    @param[in]    options:           Options to build each project with, such
+                                     as --full (list of strings).
+    @param[in]    workers:           The number of projects to build at once,
+                                     None to use one per CPU (int).
+    @param[in]    summary_filename:  The file to write the summary to, None
+                                     to only print it (string).
+    @return       (list)             The outcome of each build
+                                     (list of Altium_Build.build_result).
+    """
+    print('Searching for projects in ' + search_dir + '...')
+    projects = find_projects(search_dir)
+    print('Found ' + str(len(projects)) + ' projects\n')
+
+    start_time = time.time()
+    results = []
+
+    # builds run in separate processes as each prints to its own log, and
+    # run their stages in threads as the workers of a pool cannot start
+    # processes of their own
+    pool = multiprocessing.Pool(workers)
+
+    try:
+        jobs = [(project, prog_dir, options) for project in projects]
+
+        for result in pool.imap_unordered(_build_project, jobs):
+            results.append(result)
+            print('[' + str(len(results)) + '/' + str(len(projects)) + '] ' +
+                  _status(result) + '\t' + result.project)
+        # end for
+
+        pool.close()
+
+    except:
+        pool.terminate()
+        raise
+
+    finally:
+        pool.join()
+    # end try
+
+    results.sort(key=lambda r: r.project)
+
+    summary = format_summary(results, time.time() - start_time)
+    print('\n' + summary)
+
+    if summary_filename != None:
+        with open(summary_filename, 'w') as summary_file:
+            summary_file.write(summary)
+        # end with
+    # end if
+
+    return results
+# end def
+
+
+def format_summary(results, elapsed):
+    """
+    Format the outcome of a batch of builds as a table.
+
+    @param[in]    results:         The outcome of each build
+                                   (list of Altium_Build.build_result).
+    @param[in]    elapsed:         The total time taken in seconds (float).
+    @return       (string)         The summary.
+    """
+    lines = ['=========   Deliverable Batch Summary   ===========\n',
+             'Projects: \t' + str(len(results)) + '\n',
+             'Time taken: \t' + '%.0f' % elapsed + ' s\n\n']
+
+    for result in results:
+        line = _status(result) + '\t' + '%6.1f' % result.elapsed + ' s\t' + result.project
+
+        if result.message != '':
+            line += '\t(' + result.message + ')'
+        # end if
+
+        lines.append(line + '\n')
+    # end for
+
+    for status in ['OK', 'WARNINGS', 'ERRORS', 'FAILED']:
+        count = len([r for r in results if _status(r) == status])
+        lines.append('\n' + status + ': \t' + str(count))
+    # end for
+
+    return ''.join(lines) + '\n'
+# end def
+
+
+#
+# ----------------
+# Private Functions
+
+def _build_project(job):
+    """
+    Build the deliverable for one project in a worker process.
+
+    @param[in]    job:             The project directory, program directory
+                                   and options (tuple).
+    @return       (build_result)   The outcome of the build.
+    """
+    [project, prog_dir, options] = job
+
+    import Altium_Build
+
+    # the project's log file keeps its output, so don't mix it on the console
+    with open(os.devnull, 'w') as null_file, contextlib.redirect_stdout(null_file):
+        try:
+            return Altium_Build.build_deliverable(project, prog_dir, options,
+                                                  prompt = None, processes = False)
+
+        except Exception:
+            result = Altium_Build.build_result(project)
+            result.message = traceback.format_exc().strip().split('\n')[-1]
+            return result
+        # end try
+    # end with
+# end def
+
+
+def _status(result):
+    """
+    Describe the outcome of a build in one word.
+
+    @param[in]    result:          The outcome of the build
+                                   (Altium_Build.build_result).
+    @return       (string)         OK, WARNINGS, ERRORS or FAILED.
+    """
+    if not result.completed:
+        return 'FAILED'
+
+    elif not result.no_errors:
+        return 'ERRORS'
+
+    elif not result.no_warnings:
+        return 'WARNINGS'
+    # end if
+
+    return 'OK'
+# end def
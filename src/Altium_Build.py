@@ -0,0 +1,502 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Build.py
+
+Package that builds the deliverable for a single Altium project, as called by
+the Altium Documentation script and the batch builder.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import sys
+sys.path.insert(1, 'src\\')
+import time
+import zipfile
+import shutil
+import Altium_Excel
+import Altium_GS
+import Altium_PDF
+import Altium_helpers
+import Altium_Files
+import Altium_Pipeline
+import Altium_Manifest
+import Altium_Plan
+import Altium_Store
+import Altium_Delta
+import Altium_Report
+import Altium_TextCache
+
+#
+# -------
+# Classes
+
+class build_result:
+    """
+    Class to store the outcome of building the deliverable for a project.
+
+    @attribute     project:       The Altium project directory (string).
+    @attribute     completed:     Whether the deliverable was generated (bool).
+    @attribute     no_errors:     True if no errors were logged (bool).
+    @attribute     no_warnings:   True if no warnings were logged (bool).
+    @attribute     zip_filename:  The full path of the archive generated
+                                  (string).
+    @attribute     elapsed:       The time taken in seconds (float).
+    @attribute     message:       Description of why the build did not
+                                  complete, if it did not (string).
+    """
+    def __init__(self, project):
+        """
+        Initialise the build_result class
+
+        @param[in]     project:     The Altium project directory (string).
+        """
+        self.project = project
+        self.completed = False
+        self.no_errors = False
+        self.no_warnings = False
+        self.zip_filename = None
+        self.elapsed = 0.0
+        self.message = ''
+    # end def
+# end class
+
+
+class deliverable_layout:
+    """
+    Class to store the part numbers and folders of a project and its 
+    deliverable.
+
+    @attribute     part_number:        The part number (string).
+    @attribute     part_revision:      The part revision (string).
+    @attribute     full_part_number:   The part number and revision (string).
+    @attribute     pdf_dir:            The folder of PDFs output by Altium 
+                                       (string).
+    @attribute     gerber_dir:         The folder of gerbers output by Altium
+                                       (string).
+    @attribute     output_dir:         The deliverable folder (string).
+    @attribute     output_pdf_dir:     The deliverable PDF folder (string).
+    @attribute     output_gerber_dir:  The deliverable gerber folder (string).
+    @attribute     output_altium_dir:  The deliverable Altium folder (string).
+    @attribute     assy_config_file:   The ASSY Config document of the project
+                                       (string).
+    """
+    def __init__(self, context):
+        """
+        Initialise the deliverable_layout class, raises an exception if the 
+        folder structure does not match the current Outjob file.
+
+        @param[in]     context:     The state of this run 
+                                    (Altium_helpers.run_context).
+        """
+        starting_dir = context.starting_dir
+        
+        # get part number
+        [part_prefix, part_number, part_revision] = Altium_helpers.get_part_number(context, starting_dir)
+        [assy_prefix, assy_number, assy_revision] = Altium_helpers.get_assy_number(context, starting_dir)    
+        
+        self.part_number = part_number
+        self.part_revision = part_revision
+        self.full_part_number = part_number + part_revision
+        
+        # define directories
+        self.pdf_dir = starting_dir + '\\' + assy_prefix + '-' + assy_number + assy_revision + 'PD'
+        self.gerber_dir = starting_dir + '\\' + part_prefix + '-' + part_number + part_revision
+        self.output_dir = starting_dir + '\\r' + part_revision + '_' + assy_revision
+        self.output_pdf_dir = self.output_dir + '\\' + part_number + part_revision + 'PD'
+        self.output_gerber_dir = self.output_dir + '\\' + part_number + part_revision    
+        self.output_altium_dir = self.output_dir + '\\Altium Files'
+        self.assy_config_file = starting_dir + '\\ASSY Config.xlsx'
+    # end def
+# end class
+
+
+#
+# ----------------
+# Public Functions 
+
+def build_deliverable(starting_dir, prog_dir, options = [], prompt = input,
+                      processes = True):
+    """
+    Generate the deliverable for an Altium project.
+
+    @param[in]    starting_dir:    The Altium project directory (full path) 
+                                   (string).
+    @param[in]    prog_dir:        The directory this program is installed in
+                                   (full path) (string).
+    @param[in]    options:         Command line options, such as --full, 
+                                   --plan to only list what would be produced,
+                                   --reproducible for archives that only 
+                                   change when their contents do, --store 
+                                   to link unchanged gerbers to one stored copy
+                                   or --no-text-cache to read every pdf again
+                                   (list of strings).
+    @param[in]    prompt:          Function used to wait for the user to 
+                                   review warnings, None to never wait
+                                   (function).
+    @param[in]    processes:       False to run every stage in a thread, as
+                                   needed when called from a worker process
+                                   (bool).
+    @return       (build_result)   The outcome of the build.
+    """
+    
+    result = build_result(starting_dir)
+    start_time = time.time()
+    
+    # record where the time goes if asked to
+    trace_filename = None
+    if '--trace' in options:
+        trace_filename = starting_dir + '\\Deliverable_trace.json'
+    # end if
+    
+    # the state of this run, kept apart from any other run in this process
+    context = Altium_helpers.run_context(prog_dir, starting_dir, trace_filename)
+    context.reproducible = '--reproducible' in options
+    
+    if '--no-text-cache' not in options:
+        # a pdf that has not changed since any previous run is not read again
+        context.text_cache = Altium_TextCache.text_cache()
+    # end if
+    
+    if '--plan' in options:
+        # only report what would be produced, nothing is written
+        plan = Altium_Plan.plan_deliverable(context)
+        
+        if plan == None:
+            result.message = 'Folder structure not compliant with current Outjob file'
+            
+        else:
+            print(Altium_Plan.format_plan(context, plan))
+            result.message = 'Planned only, nothing was generated'
+        # end if
+        
+        result.elapsed = time.time() - start_time
+        return result
+    # end if
+    
+    if '--store' in options:
+        # the revisions of a project share one copy of each unchanged file
+        context.store = Altium_Store.content_store(starting_dir + '\\' + 
+                                                   Altium_Store.store_dirname)
+    # end if
+    
+    # direct all output from this thread to a log file as well
+    log_filename = starting_dir + '\\Deliverable_log.txt'
+    log = Altium_helpers.Logger(log_filename)
+    terminal = Altium_helpers.route_output(log)
+    
+    try:
+        with context.trace.span('build', 'build', project = starting_dir):
+            [output_dir, zip_filename] = generate_deliverable(context, options, 
+                                                              prompt, processes, 
+                                                              result)
+        # end with
+        
+    finally:
+        # close the log file
+        Altium_helpers.route_output(terminal)
+        log.close()
+    # end try
+    
+    if zip_filename != None:
+        shutil.copy(log_filename, output_dir + '\\' + os.path.basename(log_filename))
+        
+        if not context.reproducible:
+            # add log file to zip, a reproducible archive leaves it out as it 
+            # is different every time
+            zip_file = zipfile.ZipFile(zip_filename, 'a')
+            zip_file.write(log_filename, os.path.basename(log_filename))
+            zip_file.close()
+        # end if
+        
+        result.zip_filename = zip_filename
+        result.completed = True
+    # end if
+    
+    result.elapsed = time.time() - start_time
+    
+    context.trace.save()
+    
+    return result
+# end def
+
+
+def generate_deliverable(context, options, prompt, processes, result):
+    """
+    Generate the deliverable folder and archive for an Altium project, 
+    without the log file.
+
+    @param[in]    context:         The state of this run 
+                                   (Altium_helpers.run_context).
+    @param[in]    options:         Command line options (list of strings).
+    @param[in]    prompt:          Function used to wait for the user, None to 
+                                   never wait (function).
+    @param[in]    processes:       Whether stages may run in worker processes
+                                   (bool).
+    @param[out]   result:          The outcome of the build (build_result).
+    @return       (string)         The output directory.
+    @return       (string)         The full path of the archive, None if it 
+                                   was not generated.
+    """
+    
+    starting_dir = context.starting_dir
+    
+    try:
+        layout = deliverable_layout(context)
+        
+    except:
+        # the output is not up to date with the current structure
+        result.message = 'Folder structure not compliant with current Outjob file'
+        return None, None
+    # end try
+    
+    part_number = layout.part_number
+    part_revision = layout.part_revision
+    output_dir = layout.output_dir
+    
+    # load the record of the previous run, stages whose inputs have not 
+    # changed since then are not run again
+    manifest = Altium_Manifest.manifest(starting_dir + '\\Deliverable_manifest.json', 
+                                        output_dir)
+    
+    if '--full' in options:
+        # a full rebuild has been requested
+        manifest.clear()
+    # end if
+    
+    if manifest.is_empty():
+        # remove previous deliverables folder for this revision
+        while os.path.isdir(output_dir):
+            try:
+                shutil.rmtree(output_dir)
+            
+            except Exception as e:
+                print(e)
+                print('*** Error: Previous output could not be deleted ***')
+                
+                if prompt == None:
+                    # nobody is there to fix it, so give up
+                    result.message = 'Previous output could not be deleted'
+                    return output_dir, None
+                # end if
+                
+                prompt('Press ENTER to retry')
+            # end try
+        
+            time.sleep(0.1)
+        # end while
+    # end if
+    
+    # make the output directories
+    for directory in [output_dir, layout.output_pdf_dir, layout.output_gerber_dir, 
+                      layout.output_altium_dir]:
+        if not os.path.isdir(directory):
+            os.mkdir(directory)
+        # end if
+    # end for
+    
+    context.files.invalidate(output_dir)
+    
+    # warning tracker
+    no_warnings = False
+    
+    # define the stages of the deliverable
+    stages = define_stages(context, layout)
+    
+    # remove anything in the output folder that is not produced by a stage, 
+    # such as the archive and log of the previous run
+    owned_outputs = [os.path.normcase(path) for s in stages for path in s.outputs]
+    
+    for filename in os.listdir(output_dir):
+        path = output_dir + '\\' + filename
+        
+        if os.path.normcase(path) not in owned_outputs:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+                
+            else:
+                os.remove(path)
+            # end if
+        # end if
+    # end for
+    
+    # record how long each stage takes so that the --plan estimates follow 
+    # the speed of this machine
+    history = Altium_Plan.history()
+    
+    # run the stages, independent stages run at the same time
+    results = Altium_Pipeline.run_stages(stages, context, processes = processes,
+                                         manifest = manifest, history = history)
+    
+    # record this run so that unchanged stages can be skipped next time
+    manifest.save(stages)
+    
+    # create list to load file modified dates into.
+    modified_dates = [results['check_DRC'], results['check_ERC']]
+    modified_dates.extend(results['move_Altium_files'])
+    
+    # add the gerber modified dates to the list
+    [gerber_dates, layers] = results['move_gerbers']
+    modified_dates.extend(gerber_dates)
+    
+    modified_dates.append(results['move_xps'])
+    modified_dates.extend(results['move_documents'])
+    modified_dates.extend(results['zip_step_file'])
+    
+    # find the oldest and newest files used.
+    no_warnings = Altium_helpers.check_modified_dates(modified_dates)
+    
+    # check for warnings
+    if not (no_warnings and context.log_warning(get=True)):
+        print('\n*** Warnings were raised so please reveiw ***')
+        
+        if prompt != None:
+            prompt('When the warnings have been reviewed/recitified press ENTER to continue')
+        # end if
+    # end if
+    
+    print("\nUploading of Project information to the Google Drive is disabled")
+    #Altium_GS.upload_files(context, output_dir)    
+    
+    # construct the final zip file and remove un-needed directories
+    archive_start = time.time()
+    archive_bytes = Altium_Plan.total_size([output_dir])
+    
+    zip_filename = Altium_helpers.construct_root_archive(context, output_dir, (part_number + part_revision))    
+    
+    history.record('archive', archive_bytes, Altium_Plan.total_size([zip_filename]),
+                   time.time() - archive_start)
+    history.save()
+    
+    # a package of only what has changed since the previous revision
+    Altium_Delta.construct_delta_archive(context, output_dir, 
+                                         part_number + part_revision, zip_filename)
+    
+    # record the state of the build
+    result.no_warnings = no_warnings and context.log_warning(get=True)
+    result.no_errors = context.log_error(get=True)
+    
+    # check for errors
+    if not result.no_errors:
+        print('\n*** Errors occurred so please reveiw ***')
+    # end if
+    
+    print("\nDeliverable generation is complete")
+    
+    return output_dir, zip_filename
+# end def
+
+
+def define_stages(context, layout):
+    """
+    Define the stages of the deliverable, the order in which they run is 
+    determined by the files each stage reads and writes.
+
+    @param[in]    context:         The state of this run 
+                                   (Altium_helpers.run_context).
+    @param[in]    layout:          The folders of the project 
+                                   (deliverable_layout).
+    @return       (list)           The stages (list of Altium_Pipeline.stage).
+    """
+    
+    starting_dir = context.starting_dir
+    pdf_dir = layout.pdf_dir
+    gerber_dir = layout.gerber_dir
+    output_dir = layout.output_dir
+    output_pdf_dir = layout.output_pdf_dir
+    output_gerber_dir = layout.output_gerber_dir
+    output_altium_dir = layout.output_altium_dir
+    assy_config_file = layout.assy_config_file
+    part_number = layout.part_number
+    full_part_number = layout.full_part_number
+    
+    # get the file list of the starting directory
+    root_file_list = context.files.listdir(starting_dir)
+    
+    stages = [Altium_Pipeline.stage('copy_assy_config', 
+                                    Altium_Excel.copy_assy_config, 
+                                    args = [starting_dir],
+                                    inputs = [context.prog_dir + 
+                                              '\\src\\ASSY Config.xlsx'],
+                                    outputs = [assy_config_file]),
+              
+              # check the design rule check document
+              Altium_Pipeline.stage('check_DRC', 
+                                    Altium_PDF.check_DRC, 
+                                    args = [pdf_dir, output_dir],
+                                    inputs = [pdf_dir + '\\Design Rules Check.PDF'],
+                                    outputs = [output_dir + '\\' + 
+                                               Altium_Report.DRC_filename],
+                                    cpu_bound = True),
+              
+              # check the electrical rule check document
+              Altium_Pipeline.stage('check_ERC', 
+                                    Altium_PDF.check_ERC, 
+                                    args = [pdf_dir, output_dir],
+                                    inputs = [pdf_dir + '\\Electrical Rules Check.PDF'],
+                                    outputs = [output_dir + '\\' + 
+                                               Altium_Report.ERC_filename],
+                                    cpu_bound = True),
+              
+              # Move all of the Altium files into their folder
+              Altium_Pipeline.stage('move_Altium_files', 
+                                    Altium_Files.move_Altium_files, 
+                                    args = [starting_dir, output_altium_dir],
+                                    inputs = [starting_dir + '\\' + f for f in 
+                                              Altium_Files.find_Altium_files(context, starting_dir)],
+                                    outputs = [output_altium_dir]),
+              
+              # Move the gerber files and create a readme file for them
+              Altium_Pipeline.stage('move_gerbers', 
+                                    Altium_Files.move_gerbers, 
+                                    args = [gerber_dir, output_gerber_dir, 
+                                            full_part_number],
+                                    inputs = [gerber_dir],
+                                    outputs = [output_gerber_dir]),
+              
+              # move the xps file
+              Altium_Pipeline.stage('move_xps', 
+                                    Altium_Files.move_xps, 
+                                    args = [starting_dir, output_dir, 
+                                            full_part_number],
+                                    inputs = [starting_dir + '\\' + f for f in root_file_list
+                                              if f.endswith('xps')],
+                                    outputs = [output_dir + '\\' + full_part_number + 
+                                               '.' + ext for ext in ['xps', 'oxps']]),
+              
+              # move all of the other documents
+              Altium_Pipeline.stage('move_documents', 
+                                    Altium_Files.move_documents, 
+                                    args = [starting_dir, pdf_dir, output_pdf_dir, 
+                                            gerber_dir, full_part_number,
+                                            Altium_Pipeline.stage_result('move_gerbers', 1)],
+                                    inputs = [pdf_dir, gerber_dir, assy_config_file],
+                                    outputs = [output_pdf_dir, assy_config_file]),
+              
+              # zip the step file
+              Altium_Pipeline.stage('zip_step_file', 
+                                    Altium_Files.zip_step_file, 
+                                    args = [starting_dir, output_dir, part_number,
+                                            context.reproducible],
+                                    inputs = [starting_dir + '\\' + f for f in 
+                                              Altium_Files.find_step_files(context, starting_dir)],
+                                    outputs = [output_dir + '\\' + part_number + '_3D.zip'])]
+    
+    return stages
+# end def
@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Daemon.py
+
+Package that keeps the Altium Documentation module loaded in a long running
+process which builds deliverables on request, so that each build does not
+pay for starting Python and importing the PDF, Excel and Google libraries.
+
+Only the standard library is imported here so that the client stays quick to
+start. Changes to the program are not seen by a running daemon until it is
+restarted.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import sys
+import json
+import time
+import traceback
+from multiprocessing.connection import Listener, Client
+
+#
+# -------
+# Constants
+
+# the file that tells clients how to reach the daemon, kept in the user's
+# home directory so that only this user can connect
+daemon_filename = os.path.join(os.path.expanduser('~'),
+                               '.altium_docs_daemon.json')
+
+#
+# -------
+# Classes
+
+class _client_output(object):
+    """
+    Stream that sends everything printed during a build to the client.
+
+    @attribute     connection:   The connection to the client
+                                 (multiprocessing.connection.Connection).
+    """
+    def __init__(self, connection):
+        """
+        Initialise the _client_output class
+
+        @param[in]     connection:   The connection to the client.
+        """
+        self.connection = connection
+    # end def
+
+    def write(self, message):
+        if message == '':
+            return
+        # end if
+
+        try:
+            self.connection.send(['output', message])
+
+        except (EOFError, OSError):
+            # the client has gone, but the build still goes to the log file
+            pass
+        # end try
+    # end def
+
+    def flush(self):
+        pass
+    # end def
+# end class
+
+
+#
+# ----------------
+# Public Functions
+
+def serve(prog_dir, filename = daemon_filename):
+    """
+    Run the daemon, building the deliverable of each project a client asks
+    for, one at a time, until a client asks it to stop.
+
+    @param[in]    prog_dir:        The directory this program is installed in
+                                   (full path) (string).
+    @param[in]    filename:        The file to tell clients how to connect
+                                   (string).
+    """
+
+    # load everything a build needs once
+    import Altium_Build
+    import Altium_helpers
+
+    authkey = os.urandom(32)
+    listener = Listener(('localhost', 0), authkey=authkey)
+
+    with open(filename, 'w') as daemon_file:
+        json.dump({'port': listener.address[1],
+                   'authkey': authkey.hex(),
+                   'prog_dir': prog_dir,
+                   'pid': os.getpid()}, daemon_file)
+    # end with
+
+    print('Deliverable daemon is listening on port ' + str(listener.address[1]))
+
+    try:
+        running = True
+
+        while running:
+            try:
+                connection = listener.accept()
+
+            except Exception as e:
+                # a client that failed to authenticate
+                print('*** Warning: Connection refused: ' + str(e) + ' ***')
+                continue
+            # end try
+
+            try:
+                running = _handle_request(connection, prog_dir, Altium_Build,
+                                          Altium_helpers)
+
+            except (EOFError, OSError):
+                # the client went away part way through
+                print('*** Warning: The client disconnected ***')
+
+            finally:
+                connection.close()
+            # end try
+        # end while
+
+    finally:
+        listener.close()
+
+        if os.path.isfile(filename):
+            os.remove(filename)
+        # end if
+    # end try
+
+    print('Deliverable daemon has stopped')
+# end def
+
+
+def request_build(starting_dir, prog_dir, options = [], prompt = input,
+                  filename = daemon_filename):
+    """
+    Ask a running daemon to build the deliverable for a project, printing
+    what the build prints and passing prompts to the user.
+
+    @param[in]    starting_dir:    The Altium project directory (full path)
+                                   (string).
+    @param[in]    prog_dir:        The directory this program is installed in
+                                   (full path) (string).
+    @param[in]    options:         Command line options, such as --full
+                                   (list of strings).
+    @param[in]    prompt:          Function used to answer prompts from the
+                                   build (function).
+    @param[in]    filename:        The file that tells clients how to connect
+                                   (string).
+    @return       (dict)           The attributes of the build_result, None
+                                   if no daemon could build it so it must be
+                                   built in this process.
+    """
+    connection = _connect(filename, prog_dir)
+
+    if connection == None:
+        return None
+    # end if
+
+    try:
+        connection.send(['build', starting_dir, prog_dir, options])
+
+        while True:
+            message = connection.recv()
+
+            if message[0] == 'output':
+                sys.stdout.write(message[1])
+
+            elif message[0] == 'prompt':
+                connection.send(prompt(message[1]))
+
+            elif message[0] == 'done':
+                return message[1]
+
+            else:
+                # the daemon would not build it
+                return None
+            # end if
+        # end while
+
+    except (EOFError, OSError):
+        print('\n*** Error: The deliverable daemon stopped during the build ***')
+        return {'completed': False, 'message': 'Daemon stopped'}
+
+    finally:
+        connection.close()
+    # end try
+# end def
+
+
+def stop_daemon(filename = daemon_filename):
+    """
+    Ask a running daemon to stop once it has finished its current build.
+
+    @param[in]    filename:        The file that tells clients how to connect
+                                   (string).
+    @return       (bool)           True if a daemon was asked to stop.
+    """
+    connection = _connect(filename)
+
+    if connection == None:
+        return False
+    # end if
+
+    try:
+        connection.send(['stop'])
+
+    finally:
+        connection.close()
+    # end try
+
+    return True
+# end def
+
+
+#
+# ----------------
+# Private Functions
+
+def _connect(filename, prog_dir = None):
+    """
+    Connect to a running daemon.
+
+    @param[in]    filename:        The file that tells clients how to connect
+                                   (string).
+    @param[in]    prog_dir:        The program directory the daemon must be
+                                   running from, None for any (string).
+    @return       (Connection)     The connection, None if there is no
+                                   suitable daemon running.
+    """
+    try:
+        with open(filename, 'r') as daemon_file:
+            details = json.load(daemon_file)
+        # end with
+
+    except (IOError, OSError, ValueError):
+        return None
+    # end try
+
+    if ((prog_dir != None) and
+        (os.path.normcase(details.get('prog_dir', '')) != os.path.normcase(prog_dir))):
+        # the daemon is running a different copy of the program
+        return None
+    # end if
+
+    try:
+        return Client(('localhost', details['port']),
+                      authkey=bytes.fromhex(details['authkey']))
+
+    except Exception:
+        # the daemon is no longer running
+        return None
+    # end try
+# end def
+
+
+def _handle_request(connection, prog_dir, Altium_Build, Altium_helpers):
+    """
+    Handle a single request from a client.
+
+    @param[in]    connection:      The connection to the client
+                                   (multiprocessing.connection.Connection).
+    @param[in]    prog_dir:        The directory this program is installed in
+                                   (full path) (string).
+    @param[in]    Altium_Build:    The loaded Altium_Build module.
+    @param[in]    Altium_helpers:  The loaded Altium_helpers module.
+    @return       (bool)           False if the daemon should stop.
+    """
+    message = connection.recv()
+
+    if message[0] == 'stop':
+        return False
+    # end if
+
+    [request, starting_dir, client_prog_dir, options] = message
+
+    if os.path.normcase(client_prog_dir) != os.path.normcase(prog_dir):
+        connection.send(['refused', 'Daemon is running from ' + prog_dir])
+        return True
+    # end if
+
+    print('Building ' + starting_dir)
+    start_time = time.time()
+
+    def remote_prompt(text):
+        # ask the user at the client and wait for them to answer
+        connection.send(['prompt', text])
+        return connection.recv()
+    # end def
+
+    # send everything the build prints to the client
+    terminal = Altium_helpers.route_output(_client_output(connection))
+
+    try:
+        result = Altium_Build.build_deliverable(starting_dir, prog_dir, options,
+                                                prompt = remote_prompt)
+
+    except Exception:
+        print(traceback.format_exc())
+        result = Altium_Build.build_result(starting_dir)
+        result.message = traceback.format_exc().strip().split('\n')[-1]
+
+    finally:
+        Altium_helpers.route_output(terminal)
+    # end try
+
+    connection.send(['done', vars(result)])
+
+    print('Finished ' + starting_dir + ' in ' +
+          '%.1f' % (time.time() - start_time) + ' s')
+
+    return True
+# end def
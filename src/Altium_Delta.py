@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Delta.py
+
+Package that makes a delta package of a deliverable: only the files whose
+contents have changed since the previous revision of the project was
+delivered, and a CHANGES.json listing what was added, changed and removed.
+
+Files are compared by their SHA-256, taken from the MANIFEST of each archive
+or by reading the archive if it is older than the MANIFEST. The part number
+and revision in names are ignored, as every revision has its own. The 3D zip
+is compared by the size and CRC-32 of the files in it, as its own bytes
+change with the time it was made.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import sys
+sys.path.insert(1, 'src\\')
+import json
+import hashlib
+import zipfile
+import datetime
+import Altium_Archive
+import Altium_Verify
+
+#
+# -------
+# Constants
+
+# the end of the name of a delta package
+delta_suffix = '_Delta.zip'
+
+# the change list in a delta package
+changes_filename = 'CHANGES.json'
+
+# the end of the name of the 3D zip
+model_suffix = '_3D.zip'
+
+#
+# ----------------
+# Public Functions
+
+def construct_delta_archive(context, output_dir, full_part_number, zip_filename):
+    """
+    Make the delta package of a deliverable beside its archive, if a previous
+    revision of the project has been delivered.
+
+    @param[in]   context:             The state of this run
+                                      (Altium_helpers.run_context).
+    @param[in]   output_dir:          The packaging outputs directory (full path)
+                                      (string).
+    @param[in]   full_part_number:    The part number and revision (string).
+    @param[in]   zip_filename:        The archive of the deliverable (full path)
+                                      (string).
+    @return      (string)             The delta package (full path), None if
+                                      there is no previous revision.
+    """
+    print('\nConstructing Delta Package...')
+
+    previous = find_previous_archive(context.starting_dir, output_dir)
+
+    if previous == None:
+        print('\tNo previous revision has been delivered, so there is no delta package')
+        return None
+    # end if
+
+    with context.trace.span('delta ' + full_part_number, 'archive') as event:
+        try:
+            changes = compare_packages(previous, zip_filename)
+
+        except (zipfile.BadZipFile, OSError, ValueError) as error:
+            print('*** Warning: ' + os.path.basename(previous) + ' could not be read (' +
+                  str(error) + '), so there is no delta package ***')
+            context.log_warning()
+            return None
+        # end try
+
+        dt_string = datetime.datetime.now().strftime("%Y%m%d_%H%M_")
+
+        if context.reproducible:
+            dt_string = ''
+        # end if
+
+        delta_filename = output_dir + '\\' + dt_string + full_part_number + delta_suffix
+
+        with Altium_Archive.archive_writer(delta_filename,
+                                           reproducible = context.reproducible) as delta:
+            for entry in changes['added'] + changes['changed']:
+                delta.add_file(_source_path(output_dir, entry['path']), entry['file'])
+            # end for
+
+            delta.add_data(json.dumps(changes, indent = 2, sort_keys = True).encode('utf-8'),
+                           changes_filename)
+            delta.add_manifest()
+        # end with
+
+        event.add_bytes(os.path.getsize(delta_filename))
+    # end with
+
+    context.files.invalidate(delta_filename)
+
+    print('\tCompared with ' + os.path.basename(previous) + ': ' +
+          str(len(changes['added'])) + ' added, ' +
+          str(len(changes['changed'])) + ' changed, ' +
+          str(len(changes['removed'])) + ' removed, ' +
+          str(changes['unchanged']) + ' unchanged')
+    print('*** Delta package ' + os.path.basename(delta_filename) +
+          ' has been generated successfully ***')
+
+    return delta_filename
+# end def
+
+
+def find_previous_archive(starting_dir, output_dir):
+    """
+    Find the archive of the revision of a project that was delivered most
+    recently, other than the one being built.
+
+    @param[in]   starting_dir:        The Altium project directory (full path)
+                                      (string).
+    @param[in]   output_dir:          The packaging outputs directory of this
+                                      revision (full path) (string).
+    @return      (string)             The archive (full path), None if no
+                                      other revision has one.
+    """
+    archives = []
+
+    for folder in os.listdir(starting_dir):
+        path = starting_dir + '\\' + folder
+
+        # revision folders are named r<part revision>_<assembly revision>
+        if ((not folder.startswith('r')) or ('_' not in folder) or
+            (os.path.normcase(path) == os.path.normcase(output_dir)) or
+            (not os.path.isdir(path))):
+            continue
+        # end if
+
+        for filename in os.listdir(path):
+            if filename.endswith(Altium_Verify.archive_suffix):
+                archives.append([os.path.getmtime(path + '\\' + filename),
+                                 path + '\\' + filename])
+            # end if
+        # end for
+    # end for
+
+    if archives == []:
+        return None
+    # end if
+
+    return max(archives)[1]
+# end def
+
+
+def compare_packages(previous, current):
+    """
+    Compare the files in two deliverable archives.
+
+    @param[in]   previous:            The archive of the previous revision
+                                      (full path) (string).
+    @param[in]   current:             The archive of this revision (full path)
+                                      (string).
+    @return      (dict)               The change list: the files added,
+                                      changed and removed, and the number
+                                      unchanged.
+    """
+    previous_part_number = Altium_Verify.part_number_of(previous)
+    current_part_number = Altium_Verify.part_number_of(current)
+
+    old_files = read_package(previous)
+    new_files = read_package(current)
+
+    # compare the names as this revision would have them
+    old_by_key = dict((path.replace(previous_part_number, current_part_number), path)
+                      for path in old_files)
+
+    changes = {'part_number': current_part_number,
+               'previous': {'archive': os.path.basename(previous),
+                            'part_number': previous_part_number},
+               'added': [],
+               'changed': [],
+               'removed': [],
+               'unchanged': 0}
+
+    for path in sorted(new_files):
+        [size, digest] = new_files[path]
+        entry = {'path': path, 'file': _delta_path(path), 'size': size,
+                 'sha256': digest}
+
+        if path not in old_by_key:
+            changes['added'].append(entry)
+            continue
+        # end if
+
+        old_path = old_by_key[path]
+        [old_size, old_digest] = old_files[old_path]
+
+        if old_digest == digest:
+            changes['unchanged'] += 1
+            continue
+        # end if
+
+        entry['previous_path'] = old_path
+        entry['previous_size'] = old_size
+        entry['previous_sha256'] = old_digest
+        changes['changed'].append(entry)
+    # end for
+
+    for key in sorted(old_by_key):
+        if key not in new_files:
+            old_path = old_by_key[key]
+            changes['removed'].append({'path': old_path,
+                                       'size': old_files[old_path][0],
+                                       'sha256': old_files[old_path][1]})
+        # end if
+    # end for
+
+    return changes
+# end def
+
+
+def read_package(archive):
+    """
+    Get the size and hash of each delivered file in an archive. The folders
+    zipped in the archive are listed by the files in them, the log and
+    MANIFEST are left out, and the 3D zip is hashed from the names, sizes
+    and CRCs of the files in it.
+
+    @param[in]   archive:             The archive (full path) (string).
+    @return      (dict)               The size and SHA-256 of each file keyed
+                                      by its path in the archive.
+    """
+    files = {}
+    models = {}
+
+    with open(archive, 'rb') as stream, \
+         zipfile.ZipFile(stream) as zip_file:
+        if Altium_Archive.manifest_name in zip_file.namelist():
+            hashes = Altium_Archive.read_manifest(
+                zip_file.read(Altium_Archive.manifest_name).decode('utf-8'))
+
+            for path in hashes:
+                if _is_model(path):
+                    # only the 3D zip itself is listed, so read its contents
+                    nested = Altium_Verify.open_nested(zip_file, stream,
+                                                       zip_file.getinfo(path))
+
+                    try:
+                        with zipfile.ZipFile(nested) as model:
+                            models[path] = [[info.filename, info.file_size, info.CRC]
+                                            for info in model.infolist()]
+                        # end with
+
+                    finally:
+                        nested.close()
+                    # end try
+                # end if
+            # end for
+
+        else:
+            # made before there was a MANIFEST, so every file is read
+            hashes = Altium_Verify.read_hashes(archive)
+        # end if
+    # end with
+
+    folders = set(path.split('/')[0] for path in hashes if '/' in path)
+
+    for [path, [size, crc, digest]] in hashes.items():
+        container = path.split('/')[0]
+
+        if path in [Altium_Archive.manifest_name, Altium_Verify.log_filename]:
+            continue
+
+        elif _is_model(container) and (container != path):
+            # a file in the 3D zip of an archive without a MANIFEST
+            models.setdefault(container, []).append([path[len(container) + 1:],
+                                                     size, crc])
+
+        elif (path in folders) and not _is_model(path):
+            # a zipped folder, its files are compared instead
+            continue
+
+        else:
+            files[path] = [size, digest]
+        # end if
+    # end for
+
+    for [path, members] in models.items():
+        files[path] = [hashes[path][0], _fingerprint(members)]
+    # end for
+
+    return files
+# end def
+
+
+#
+# ----------------
+# Private Functions
+
+def _is_model(path):
+    """
+    Determine if a path in an archive is the 3D zip.
+
+    @param[in]   path:                The path (string).
+    @return      (bool)               True if it is the 3D zip.
+    """
+    return ('/' not in path) and path.endswith(model_suffix)
+# end def
+
+
+def _fingerprint(members):
+    """
+    Hash the contents of a zip from the names, sizes and CRCs of the files in
+    it, which do not change with when it was made.
+
+    @param[in]   members:             The name, size and CRC-32 of each file
+                                      (list of lists).
+    @return      (string)             The SHA-256 (hex string).
+    """
+    lines = [name + ' ' + str(size) + ' ' + '%08x' % crc
+             for [name, size, crc] in sorted(members)]
+
+    return hashlib.sha256('\n'.join(lines).encode('utf-8')).hexdigest()
+# end def
+
+
+def _delta_path(path):
+    """
+    Get the name of a file in the delta package, where the folders zipped in
+    the archive are ordinary folders.
+
+    @param[in]   path:                The path in the archive (string).
+    @return      (string)             The path in the delta package.
+    """
+    if '/' not in path:
+        return path
+    # end if
+
+    [folder, name] = path.split('/', 1)
+
+    if folder.endswith('.zip'):
+        folder = folder[:-4]
+    # end if
+
+    return folder + '/' + name
+# end def
+
+
+def _source_path(output_dir, path):
+    """
+    Get the file in the deliverable folder that a path in the archive was
+    made from.
+
+    @param[in]   output_dir:          The packaging outputs directory (full path)
+                                      (string).
+    @param[in]   path:                The path in the archive (string).
+    @return      (string)             The file (full path).
+    """
+    return output_dir + '\\' + _delta_path(path).replace('/', '\\')
+# end def
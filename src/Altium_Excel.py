@@ -23,14 +23,11 @@ __version__ = '0.2.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
 # -------
 # Imports
 
-import xlrd
 import os
 import sys
 sys.path.insert(1, 'src\\')
-import shutil
-import openpyxl
-from openpyxl.styles.borders import Border, Side
-from openpyxl import Workbook
+# xlrd and openpyxl are imported by the functions that use them so that 
+# importing this module stays quick
 import Altium_helpers
 import Altium_Files
 import Altium_GS
@@ -39,17 +36,6 @@ import Altium_GS
 # -------
 # Constants
 
-
-thin_border = Border(left=Side(style='thin'), 
-                     right=Side(style='thin'), 
-                     top=Side(style='thin'), 
-                     bottom=Side(style='thin'))
-
-no_border = Border(left=Side(style=None), 
-                   right=Side(style=None), 
-                   top=Side(style=None), 
-                   bottom=Side(style=None))
-
 # define BOM layout constants
 
 BOM_titles = ['Designator', 'DNP Designators', 'Customer Reference', 'Description', 
@@ -107,77 +93,13 @@ is_test = False
 # ----------------
 # Public Functions 
 
-def set_directory(directory):
-    """
-    Function to set the initial directory of the executing code
-
-    @param[in]    directory:  The directory to set.
-    @attribute    path:       The path that has been set
-    """    
-    set_directory.path = directory
-# end def
-
-# set the initial value
-set_directory.path = os.getcwd()
-
-
-def log_error(get = False):
-    """
-    Function to log errors within this module.
-
-    @param[in]    get:        True  = return no_errors without logging an error
-                              False = log an error and return nothing (bool)
-    @attribute    no_errors:  Whether there have been no errors logged
-    @return       (bool)      True  = no errors have been logged.
-                              False = Errors have been logged.
-    """  
-    
-    # determine which action to take
-    if get:
-        # return the state
-        return log_error.no_errors
-    
-    else:
-        # log an error
-        log_error.no_errors = False
-    # end if
-# end def
-
-# set the initial value
-log_error.no_errors = True
-
-
-def log_warning(get = False):
-    """
-    Function to log warnings within this module.
-
-    @param[in] get:          True  = return no_warnings without logging a warning
-                             False = log a warning and return nothing (bool)
-    @attribute no_warnings:  Whether there have been no errors logged
-    @return    (bool)        True  = no errors have been logged.
-                             False = Errors have been logged.
-    """    
-    
-    # determine which action to take
-    if get:
-        # return the state
-        return log_warning.no_warnings
-    
-    else:
-        # log a warning
-        log_warning.no_warnings = False
-    # end if
-# end def
-
-# set the initial value
-log_warning.no_warnings = True
-
-
-def set_assy_options(starting_dir, list_0, list_1):
+def set_assy_options(context, starting_dir, list_0, list_1):
     """
     Function to set the assembly rev options in the ASSY Config document based on 
     what was read from the schematic pages.
 
+    @param[in]   context:          The state of this run 
+                                   (Altium_helpers.run_context).
     @param[in]   starting_dir:     The Altium project directory (full path) 
                                    (string).
     @param[in]   list_0            List of options corresponding to binary 0 
@@ -188,7 +110,7 @@ def set_assy_options(starting_dir, list_0, list_1):
     """      
     
     # open the assy config document
-    [assy_filename, assy_doc, assy_sheet] = open_assy_config(starting_dir, 'Options')    
+    [assy_filename, assy_doc, assy_sheet] = open_assy_config(context, starting_dir, 'Options')    
     
     # check that it got what it wanted
     if assy_sheet == None:
@@ -209,7 +131,7 @@ def set_assy_options(starting_dir, list_0, list_1):
     
     # save the file
     assy_doc.active = 0
-    assy_doc.save(starting_dir + '\\' + assy_filename)
+    _save_workbook(context, assy_doc, starting_dir + '\\' + assy_filename)
     
     # close the doc
     assy_doc.close()
@@ -219,11 +141,13 @@ def set_assy_options(starting_dir, list_0, list_1):
 # end def
     
     
-def construct_assembly_doc_old(starting_dir, gerber_dir, output_pdf_dir, part_number):
+def construct_assembly_doc_old(context, starting_dir, gerber_dir, output_pdf_dir, part_number):
     """
     Function to build the BOM page of the ASSY Config doc based on the BOMs 
     exported from Altium.
 
+    @param[in]   context:          The state of this run 
+                                   (Altium_helpers.run_context).
     @param[in]   starting_dir:     The Altium project directory (full path) 
                                    (string).
     @param[in]   gerber_dir:       The location of the BOM documents (full path) 
@@ -236,10 +160,8 @@ def construct_assembly_doc_old(starting_dir, gerber_dir, output_pdf_dir, part_nu
     @return      (datetime)        The modified date of the DNP bom
     """       
     
-    # if this failed log an error
-    if not log_error(get=True):
-        return None, None
-    # end if
+    # only errors logged from here on stop the document being filled
+    errors = context.error_count()
 
     # initialise BOM column arrays
     bom_d_list = []
@@ -248,8 +170,8 @@ def construct_assembly_doc_old(starting_dir, gerber_dir, output_pdf_dir, part_nu
     all_pn_list = []
     
     # fill the BOM column arrays
-    [bom_doc, bom_date] = get_bom_lists(gerber_dir, bom_d_list, bom_pn_list)
-    [dnp_doc, dnp_date] = get_bom_lists(gerber_dir, all_d_list, all_pn_list, 
+    [bom_doc, bom_date] = get_bom_lists(context, gerber_dir, bom_d_list, bom_pn_list)
+    [dnp_doc, dnp_date] = get_bom_lists(context, gerber_dir, all_d_list, all_pn_list, 
                                         DNP=True)
     
     # if this is a test print the lists
@@ -261,7 +183,7 @@ def construct_assembly_doc_old(starting_dir, gerber_dir, output_pdf_dir, part_nu
     # end if
     
     # if getting the BOM lists threw an error then exit
-    if not log_error(get=True):
+    if context.error_count() != errors:
         return None, None
     # end if    
 
@@ -311,18 +233,18 @@ def construct_assembly_doc_old(starting_dir, gerber_dir, output_pdf_dir, part_nu
     # end if
     
     # fill the assy config document with these lists.
-    fill_assy_bom(starting_dir, output_pdf_dir, part_number, all_d_list, comp_dnp_list, dnp_doc)
+    fill_assy_bom_old(context, starting_dir, output_pdf_dir, part_number, all_d_list, comp_dnp_list, dnp_doc)
     
     # extract all information from the ASSY Config document
-    assy_data = extract_assy_config(starting_dir)
+    assy_data = extract_assy_config(context, starting_dir)
     
     # use that data to fill the online BOM
-    if Altium_GS.populate_online_bom(set_directory.path, 
-                                     get_assembly_number('PART'),
-                                     get_assembly_number('ASSY'),
-                                     get_assembly_number('REV'),
+    if Altium_GS.populate_online_bom(context, 
+                                     get_assembly_number(context, 'PART'),
+                                     get_assembly_number(context, 'ASSY'),
+                                     get_assembly_number(context, 'REV'),
                                      assy_data) == None:
-        log_error()
+        context.log_error()
     #end if
         
     
@@ -330,11 +252,13 @@ def construct_assembly_doc_old(starting_dir, gerber_dir, output_pdf_dir, part_nu
     return bom_date, dnp_date
 #end def
 
-def construct_assembly_doc(starting_dir, gerber_dir, output_pdf_dir, part_number):
+def construct_assembly_doc(context, starting_dir, gerber_dir, output_pdf_dir, part_number):
     """
     Function to build the BOM page of the ASSY Config doc based on the BOMs 
     exported from Altium.
 
+    @param[in]   context:          The state of this run 
+                                   (Altium_helpers.run_context).
     @param[in]   starting_dir:     The Altium project directory (full path) 
                                    (string).
     @param[in]   gerber_dir:       The location of the BOM documents (full path) 
@@ -343,30 +267,34 @@ def construct_assembly_doc(starting_dir, gerber_dir, output_pdf_dir, part_number
                                    (string).
     @param[in]   part_number:      The part number for the design
                                    (string).
-    @return      (datetime)        The modified date of the BOM
+    @return      (datetime)        The modified date of the BOM, None if the 
+                                   BOM could not be read
     """       
     
-    # if this failed log an error
-    if not log_error(get=True):
-        return None, None
-    # end if
+    # only errors logged from here on stop the document being filled
+    errors = context.error_count()
 
     # populate an array of component objects
-    [bom_doc, bom_date, component_list] = get_bom_array(gerber_dir)
+    [bom_doc, bom_date, component_list] = get_bom_array(context, gerber_dir)
+    
+    # if getting the BOM threw an error then exit
+    if context.error_count() != errors:
+        return None
+    # end if
     
     # fill the assy config document with these lists.
-    fill_assy_bom(starting_dir, output_pdf_dir, part_number, component_list, bom_doc)
+    fill_assy_bom(context, starting_dir, output_pdf_dir, part_number, component_list, bom_doc)
     
     # extract all information from the ASSY Config document
-    assy_data = extract_assy_config(starting_dir)
+    assy_data = extract_assy_config(context, starting_dir)
     
     # use that data to fill the online BOM
-    if Altium_GS.populate_online_bom(set_directory.path, 
-                                     get_assembly_number('PART'),
-                                     get_assembly_number('ASSY'),
-                                     get_assembly_number('REV'),
+    if Altium_GS.populate_online_bom(context, 
+                                     get_assembly_number(context, 'PART'),
+                                     get_assembly_number(context, 'ASSY'),
+                                     get_assembly_number(context, 'REV'),
                                      assy_data) == None:
-        log_error()
+        context.log_error()
     #end if
         
     
@@ -375,37 +303,42 @@ def construct_assembly_doc(starting_dir, gerber_dir, output_pdf_dir, part_number
 #end def
 
 
-def copy_assy_config(starting_dir):
+def copy_assy_config(context, starting_dir):
     """
     Function to open copy the master ASSY Config document to the root folder.
 
+    @param[in]   context:          The state of this run 
+                                   (Altium_helpers.run_context).
     @param[in]   starting_dir:     The Altium project directory (full path) 
                                    (string).
     """ 
     
     # if the ASSY Config document already exists then delete it
-    for filename in os.listdir(starting_dir):
+    for filename in context.files.listdir(starting_dir):
         if ('ASSY' in filename) and (('Config' in filename) or ('REV' in filename)):
             os.remove(starting_dir + '\\' + filename)
+            context.files.invalidate(starting_dir + '\\' + filename)
         # end if
     # end for    
     
     try:
-        shutil.copyfile(set_directory.path + '\\src\\ASSY Config.xlsx',
-                        starting_dir + '\\ASSY Config.xlsx')
+        Altium_helpers.copy_file(context, context.prog_dir + '\\src\\ASSY Config.xlsx',
+                                 starting_dir + '\\ASSY Config.xlsx')
     
     except:
         print('*** Error: could not copy master ASSY Config document ***')
-        log_error()
+        context.log_error()
     # end try
 # end def
 
 
-def extract_assy_config(starting_dir):
+def extract_assy_config(context, starting_dir):
     """
     Function to extract all of the salient information from the Assembly 
     Revision Document.
 
+    @param[in]   context:          The state of this run 
+                                   (Altium_helpers.run_context).
     @param[in]   starting_dir:                The Altium project directory 
                                               (full path) (string).
     @return      (Altium_GS.assembly_info)    All of the extracted information.
@@ -415,11 +348,11 @@ def extract_assy_config(starting_dir):
     output_data = Altium_GS.assembly_info()
     
     # open the ASSY config document and extract the BOM sheet
-    [assy_filename, assy_doc, bom_sheet] = open_assy_config(starting_dir, 'BOM')    
+    [assy_filename, assy_doc, bom_sheet] = open_assy_config(context, starting_dir, 'BOM')    
     
     # check that what was requested was returned
     if bom_sheet == None:
-        log_error()
+        context.log_error()
         return None
     # end if
     
@@ -462,11 +395,11 @@ def extract_assy_config(starting_dir):
     assy_doc.close()    
     
     # open the ASSY Config document and extract the BOM sheet
-    [assy_filename, assy_doc, option_sheet] = open_assy_config(starting_dir, 'Options')   
+    [assy_filename, assy_doc, option_sheet] = open_assy_config(context, starting_dir, 'Options')   
     
     # check that what was requested was returned
     if option_sheet == None:
-        log_error()
+        context.log_error()
         return None
     # end if    
     
@@ -487,10 +420,12 @@ def extract_assy_config(starting_dir):
 # ----------------
 # Private Functions 
 
-def set_assembly_number(doc):
+def set_assembly_number(context, doc):
     """
     Function to prompt the user for the assembly number and then store it.
 
+    @param[in]   context:          The state of this run 
+                                   (Altium_helpers.run_context).
     @param[in]   starting_dir:     The Altium project directory (full path) 
                                    (string).
     """       
@@ -499,25 +434,25 @@ def set_assembly_number(doc):
     cell_string = repr(doc.cell(1,4)).split('\'')[1]
     
     if cell_string.startswith('710-'):
-        set_assembly_number.assy_number = cell_string.split('-')[1]
+        context.assy_number = cell_string.split('-')[1]
         
     elif cell_string.startswith('711-'):
-        set_assembly_number.assy_number = cell_string.split('-')[1]        
+        context.assy_number = cell_string.split('-')[1]        
         
     else:
         print("*** Error: no assembly number found in BOM Doc ***")
-        log_error()
+        context.log_error()
     # end if
     
     # get part number
     cell_string = repr(doc.cell(0,4)).split('\'')[1]
     
     if cell_string.startswith('705-'):
-        set_assembly_number.part_number = cell_string.split('-')[1]
+        context.part_number = cell_string.split('-')[1]
         
     else:
         print("*** Error: no part number found in BOM Doc ***")
-        log_error()
+        context.log_error()
     # end if   
     
     # get revision
@@ -525,76 +460,80 @@ def set_assembly_number(doc):
     
     if (cell_string[0].isalpha() and (len(cell_string) == 1)):
         # single character rev
-        set_assembly_number.revision = (cell_string + '0')
+        context.revision = (cell_string + '0')
         
     elif (cell_string[0].isalpha() and cell_string[1].isdigit()):
         # character and number rev
-        set_assembly_number.revision = cell_string
+        context.revision = cell_string
         
     else:
         print("*** Error: no revision found in BOM Doc ***")
-        log_error()
+        context.log_error()
     # end if    
 # end def
 
-# set the initial value
-set_assembly_number.assy_number = None
-set_assembly_number.part_number = None
-set_assembly_number.revision = None
 
-def get_assembly_number(specific_number = 'ASSY'):
+def get_assembly_number(context, specific_number = 'ASSY'):
     """
     Function to prompt the user for the assembly number and then store it.
+
+    @param[in]   context:          The state of this run 
+                                   (Altium_helpers.run_context).
+    @param[in]   specific_number:  Which number to return, 'ASSY', 'PART' or
+                                   'REV' (string).
     """       
     
     if (specific_number == 'ASSY'):
-        if (set_assembly_number.assy_number == None):
+        if (context.assy_number == None):
             print("*** Error: No Assembly Number has been set ***")
-            log_error()
+            context.log_error()
             
         else:
-            return set_assembly_number.assy_number
+            return context.assy_number
         # end if 
         
     elif (specific_number == 'PART'):
-        if (set_assembly_number.part_number == None):
+        if (context.part_number == None):
             print("*** Error: No Part Number has been set ***")
-            log_error()
+            context.log_error()
             
         else:
-            return set_assembly_number.part_number
+            return context.part_number
         # end if    
         
     elif (specific_number == 'REV'):
-        if (set_assembly_number.revision == None):
+        if (context.revision == None):
             print("*** Error: No Revision has been set ***")
-            log_error()
+            context.log_error()
             
         else:
-            return set_assembly_number.revision
+            return context.revision
         # end if  
         
     else:
         print("*** Error: Invalid input to function ***")
-        log_error()
+        context.log_error()
     # end if
 # end def
 
-def get_bom_array(gerber_dir):
+def get_bom_array(context, gerber_dir):
     """
     Function to extract the designator and part number lists from a BOM.
 
+    @param[in]   context:          The state of this run 
+                                   (Altium_helpers.run_context).
     @param[in]   gerber_dir:       The Altium project directory (full path) 
                                    (string).
     @return      (worksheet)       The BOM sheet that was opened.
     @return      (mod_date)        The modification date of the BOM.
     @return      (component array) All the components that were found. 
     """      
+    import xlrd
     
     filename = ''
     
     # find the BOM doc.
-    for name in os.listdir(gerber_dir):
+    for name in context.files.listdir(gerber_dir):
         if (('Placed Components Only' in name) and ('xls' in name)):
             filename = name
             break
@@ -604,7 +543,7 @@ def get_bom_array(gerber_dir):
     # no file was found so log the appropraite error
     if filename == '':
         print('***  Error: no BOM found ***')
-        log_error()   
+        context.log_error()   
         return None, None, None
     # end if
     
@@ -614,15 +553,18 @@ def get_bom_array(gerber_dir):
     
     try:
         # get the BOM date
-        date = Altium_helpers.mod_date(os.path.getmtime(gerber_dir + '\\' + filename),
+        date = Altium_helpers.mod_date(context.files.getmtime(gerber_dir + '\\' + filename),
                                        filename)
         
         # open the BOM sheet
-        doc = xlrd.open_workbook(gerber_dir + '\\' + filename).sheet_by_index(0)
+        with context.trace.span('load ' + filename, 'workbook') as event:
+            event.add_bytes(os.path.getsize(gerber_dir + '\\' + filename))
+            doc = xlrd.open_workbook(gerber_dir + '\\' + filename).sheet_by_index(0)
+        # end with
     
     except:
         print('***  Error: could not open .xls file ***')
-        log_error()    
+        context.log_error()    
         return None, None, None
     # end try
     
@@ -650,7 +592,7 @@ def get_bom_array(gerber_dir):
         
         if (pn == ''):
             print('***  Manufacturer part Number missing  ***')
-            log_error()    
+            context.log_error()    
             return None, None, None
         # end if
         
@@ -693,16 +635,18 @@ def get_bom_array(gerber_dir):
                 
     # end for   
     
-    set_assembly_number(doc)
+    set_assembly_number(context, doc)
 
     # return information
     return doc, date, component_list
 # end def
 
-def get_bom_lists(gerber_dir, d_list, pn_list, DNP = False):
+def get_bom_lists(context, gerber_dir, d_list, pn_list, DNP = False):
     """
     Function to extract the designator and part number lists from a BOM.
 
+    @param[in]   context:          The state of this run 
+                                   (Altium_helpers.run_context).
     @param[in]   gerber_dir:       The Altium project directory (full path) 
                                    (string).
     @param[out]  d_list:           The list to add the found designator lists to
@@ -715,11 +659,12 @@ def get_bom_lists(gerber_dir, d_list, pn_list, DNP = False):
     @return      (worksheet)       The BOM sheet that was opened.
     @return      (mod_date)        The modification date of the BOM.
     """      
+    import xlrd
     
     filename = ''
     
     # find the BOM docs.
-    for name in os.listdir(gerber_dir):
+    for name in context.files.listdir(gerber_dir):
         if (DNP == True and name.endswith('(All).xls')):
             filename = name
             break
@@ -734,11 +679,11 @@ def get_bom_lists(gerber_dir, d_list, pn_list, DNP = False):
     if filename == '':
         if DNP:
             print('***  Error: no DNP BOM found ***')
-            log_error()
+            context.log_error()
             
         else:
             print('***  Error: no BOM found ***')
-            log_error()   
+            context.log_error()   
         # end if
         return None, None
     # end if
@@ -749,15 +694,18 @@ def get_bom_lists(gerber_dir, d_list, pn_list, DNP = False):
     
     try:
         # get the BOM date
-        date = Altium_helpers.mod_date(os.path.getmtime(gerber_dir + '\\' + filename),
+        date = Altium_helpers.mod_date(context.files.getmtime(gerber_dir + '\\' + filename),
                                        filename)
         
         # open the BOM sheet
-        doc = xlrd.open_workbook(gerber_dir + '\\' + filename).sheet_by_index(0)
+        with context.trace.span('load ' + filename, 'workbook') as event:
+            event.add_bytes(os.path.getsize(gerber_dir + '\\' + filename))
+            doc = xlrd.open_workbook(gerber_dir + '\\' + filename).sheet_by_index(0)
+        # end with
     
     except:
         print('***  Error: could not open .xls file ***')
-        log_error()    
+        context.log_error()    
         return None, None
     # end try
     
@@ -770,7 +718,7 @@ def get_bom_lists(gerber_dir, d_list, pn_list, DNP = False):
     
     if (DNP == True):
         # extract the assembly number from the BOM
-        set_assembly_number(doc)
+        set_assembly_number(context, doc)
     # end if
         
     
@@ -811,11 +759,13 @@ def extract_items(cell):
 # end def
 
 
-def fill_assy_bom_old(starting_dir, output_pdf_dir, part_number, dnp_d_list, comp_dnp_list, dnp_doc):
+def fill_assy_bom_old(context, starting_dir, output_pdf_dir, part_number, dnp_d_list, comp_dnp_list, dnp_doc):
     """
     Function to populate the ASSY Config document with the extracted BOM 
     information.
 
+    @param[in]   context:          The state of this run 
+                                   (Altium_helpers.run_context).
     @param[in]   starting_dir:     The Altium project directory (full path) 
                                    (string).
     @param[in]   output_ pdf_dir:  The Location to place the pdf files (full path)
@@ -831,11 +781,11 @@ def fill_assy_bom_old(starting_dir, output_pdf_dir, part_number, dnp_d_list, com
     """ 
     
     # open the ASSY Config document and extract the BOM sheet
-    [assy_filename, assy_doc, bom_sheet] = open_assy_config(starting_dir, 'BOM')    
+    [assy_filename, assy_doc, bom_sheet] = open_assy_config(context, starting_dir, 'BOM')    
     
     # check that what was requested was returned
     if bom_sheet == None:
-        log_error()
+        context.log_error()
         return None
     # end if
     
@@ -847,7 +797,7 @@ def fill_assy_bom_old(starting_dir, output_pdf_dir, part_number, dnp_d_list, com
             
             # remove borders
             if i > bom_header_rows:
-                bom_sheet.cell(i,j).border = no_border
+                bom_sheet.cell(i,j).border = _border(None)
             #end if
         # end for
     # end for
@@ -901,7 +851,7 @@ def fill_assy_bom_old(starting_dir, output_pdf_dir, part_number, dnp_d_list, com
                 # end if
                 
                 # add borders to all cells
-                bom_sheet.cell(i+1,j+1).border = thin_border
+                bom_sheet.cell(i+1,j+1).border = _border('thin')
             
             else:
                 # copy the BOM info from the BOM
@@ -912,7 +862,7 @@ def fill_assy_bom_old(starting_dir, output_pdf_dir, part_number, dnp_d_list, com
     
     # save the file
     assy_doc.active = 0
-    assy_doc.save(starting_dir + '\\' + assy_filename)
+    _save_workbook(context, assy_doc, starting_dir + '\\' + assy_filename)
     
     # extract just the BOM
     for sheet in assy_doc.sheetnames:
@@ -923,17 +873,19 @@ def fill_assy_bom_old(starting_dir, output_pdf_dir, part_number, dnp_d_list, com
     # end for
     
     # save the file as just the BOM
-    assy_doc.save(output_pdf_dir + '//' + part_number + ' digikey order.xlsx')
+    _save_workbook(context, assy_doc, output_pdf_dir + '//' + part_number + ' digikey order.xlsx')
         
     # close the file
     assy_doc.close()
 # end def
 
-def fill_assy_bom(starting_dir, output_pdf_dir, part_number, component_array, bom_doc):
+def fill_assy_bom(context, starting_dir, output_pdf_dir, part_number, component_array, bom_doc):
     """
     Function to populate the ASSY Config document with the extracted BOM 
     information.
 
+    @param[in]   context:          The state of this run 
+                                   (Altium_helpers.run_context).
     @param[in]   starting_dir:     The Altium project directory (full path) 
                                    (string).
     @param[in]   output_ pdf_dir:  The Location to place the pdf files (full path)
@@ -946,11 +898,11 @@ def fill_assy_bom(starting_dir, output_pdf_dir, part_number, component_array, bo
     """ 
     
     # open the ASSY Config document and extract the BOM sheet
-    [assy_filename, assy_doc, bom_sheet] = open_assy_config(starting_dir, 'BOM')    
+    [assy_filename, assy_doc, bom_sheet] = open_assy_config(context, starting_dir, 'BOM')    
     
     # check that what was requested was returned
     if bom_sheet == None:
-        log_error()
+        context.log_error()
         return None
     # end if
     
@@ -962,7 +914,7 @@ def fill_assy_bom(starting_dir, output_pdf_dir, part_number, component_array, bo
             
             # remove borders
             if i > bom_header_rows:
-                bom_sheet.cell(i,j).border = no_border
+                bom_sheet.cell(i,j).border = _border(None)
             #end if
         # end for
     # end for
@@ -995,7 +947,7 @@ def fill_assy_bom(starting_dir, output_pdf_dir, part_number, component_array, bo
     
     # save the file
     assy_doc.active = 0
-    assy_doc.save(starting_dir + '\\' + assy_filename)
+    _save_workbook(context, assy_doc, starting_dir + '\\' + assy_filename)
     
     # extract just the BOM
     for sheet in assy_doc.sheetnames:
@@ -1006,17 +958,19 @@ def fill_assy_bom(starting_dir, output_pdf_dir, part_number, component_array, bo
     # end for
     
     # save the file as just the BOM
-    assy_doc.save(output_pdf_dir + '//' + part_number + ' digikey order.xlsx')
+    _save_workbook(context, assy_doc, output_pdf_dir + '//' + part_number + ' digikey order.xlsx')
         
     # close the file
     assy_doc.close()
 # end def
 
 
-def open_assy_config(starting_dir, sheet = 'BOM'):
+def open_assy_config(context, starting_dir, sheet = 'BOM'):
     """
     Function to open the ASSY Config document and return the desired sheet.
 
+    @param[in]   context:          The state of this run 
+                                   (Altium_helpers.run_context).
     @param[in]   starting_dir:     The Altium project directory (full path) 
                                    (string).
     @param[in]   sheet:            The name of the desired sheet in the document
@@ -1025,10 +979,12 @@ def open_assy_config(starting_dir, sheet = 'BOM'):
     @return      (workbook)        The workbook that was opened.
     @return      (worksheet)       The requested sheet in the document.
     """     
+    import openpyxl
+    
     # find assy config document
     assy_filename = ''
     
-    for filename in os.listdir(starting_dir):
+    for filename in context.files.listdir(starting_dir):
         if ('ASSY' in filename) and ('Config' in filename):
             assy_filename = filename
         # end if
@@ -1042,7 +998,10 @@ def open_assy_config(starting_dir, sheet = 'BOM'):
         
     try:
         # open the assy config document
-        assy_doc = openpyxl.load_workbook(starting_dir + '\\' + assy_filename)
+        with context.trace.span('load ' + assy_filename, 'workbook') as event:
+            event.add_bytes(os.path.getsize(starting_dir + '\\' + assy_filename))
+            assy_doc = openpyxl.load_workbook(starting_dir + '\\' + assy_filename)
+        # end with
         
     except:
         print('***  Error: ASSY Config doc could not be opened ***')
@@ -1065,17 +1024,55 @@ def open_assy_config(starting_dir, sheet = 'BOM'):
 # end def
 
 
+def _save_workbook(context, doc, filename):
+    """
+    Function to save a workbook, recording the save in the timing trace.
+
+    @param[in]   context:          The state of this run 
+                                   (Altium_helpers.run_context).
+    @param[in]   doc:              The workbook (openpyxl.Workbook).
+    @param[in]   filename:         The file to save it to (full path) 
+                                   (string).
+    """
+    with context.trace.span('save ' + os.path.basename(filename), 'workbook') as event:
+        doc.save(filename)
+        event.add_bytes(os.path.getsize(filename))
+    # end with
+    
+    context.files.invalidate(filename)
+# end def
+
+
+def _border(style):
+    """
+    Function to create a cell border with the same style on every side.
+
+    @param[in]   style:            The style of the border, None for no border
+                                   (string).
+    @return      (Border)          The border.
+    """
+    from openpyxl.styles.borders import Border, Side
+    
+    return Border(left=Side(style=style), 
+                  right=Side(style=style), 
+                  top=Side(style=style), 
+                  bottom=Side(style=style))
+# end def
+
+
 def test():
     """
     Test code for this module.
     """
+    context = Altium_helpers.run_context('\\'.join(os.getcwd().split('\\')[:-1]))
     Altium_helpers.clear_output('\\'.join(os.getcwd().split('\\')[:-1]) + '\\test folder (02190A)')
-    construct_assembly_doc('\\'.join(os.getcwd().split('\\')[:-1]) + '\\test folder (02190A)', 
+    construct_assembly_doc(context,
+                           '\\'.join(os.getcwd().split('\\')[:-1]) + '\\test folder (02190A)', 
                            '\\'.join(os.getcwd().split('\\')[:-1]) + '\\test folder (02190A)\\705-02190A0',
                            '\\'.join(os.getcwd().split('\\')[:-1]) + '\\test folder (02190A)\\710-02191A0PD',
                            '705-02190A')
     
-    if not log_error(get=True):
+    if not context.log_error(get=True):
         print('*** ERRORS OCCURRED***')
 #end def
 
@@ -29,10 +29,13 @@ sys.path.insert(1, 'src\\')
 import Altium_Excel
 import Altium_helpers
 import shutil
-import PyPDF2
 import re
 import Altium_PDF
-import time
+import Altium_Archive
+import Altium_STEP
+import Altium_Split
+import tempfile
+import json
 
 #
 # -------
@@ -82,79 +85,29 @@ Readme_dictionary = {'X': '.X                      Dielectric X file
                      'xls': '.xls			BOM File					      ASCII\n'}
 
 
-# List in which the readme file gets built, pre loaded with header              
-Readme_lines = ['================== PCB Fabrication Information ==================================\n',
-                'PUMPKIN, Inc.         750 Naples Street     San Francisco, CA 94112\n',
-                'tel (415) 584-6360    fax (415) 585-7948    web http://www.pumpkininc.com\n',
-                '== PCB Type =====================================================================\n',
-                'Mixed through-hole and surface-mount components\n',
-                '== PCB Layout Package Used ======================================================\n',
-                'Altium Desgner 16\n',
-                '== Layers =======================================================================\n',
-                'Layer 1\t\t\tTop of board (component side)\n',
-                '== File Extensions ==== Description ====================================Format ==\n']
+# Header lines that every readme file starts with
+Readme_header = ['================== PCB Fabrication Information ==================================\n',
+                 'PUMPKIN, Inc.         750 Naples Street     San Francisco, CA 94112\n',
+                 'tel (415) 584-6360    fax (415) 585-7948    web http://www.pumpkininc.com\n',
+                 '== PCB Type =====================================================================\n',
+                 'Mixed through-hole and surface-mount components\n',
+                 '== PCB Layout Package Used ======================================================\n',
+                 'Altium Desgner 16\n',
+                 '== Layers =======================================================================\n',
+                 'Layer 1\t\t\tTop of board (component side)\n',
+                 '== File Extensions ==== Description ====================================Format ==\n']
 
 #
 # ----------------
 # Public Functions 
 
 
-def log_error(get = False):
-    """
-    Function to log errors within this module.
-
-    @param[in]    get:        True  = return no_errors without logging an error
-                              False = log an error and return nothing (bool)
-    @attribute    no_errors:  Whether there have been no errors logged
-    @return       (bool)      True  = no errors have been logged.
-                              False = Errors have been logged.
-    """  
-    
-    # determine which action to take
-    if get:
-        # return the state
-        return log_error.no_errors
-    
-    else:
-        # log an error
-        log_error.no_errors = False
-    # end if
-# end def
-
-# set the initial value
-log_error.no_errors = True
-
-
-def log_warning(get = False):
-    """
-    Function to log warnings within this module.
-
-    @param[in] get:          True  = return no_warnings without logging a warning
-                             False = log a warning and return nothing (bool)
-    @attribute no_warnings:  Whether there have been no errors logged
-    @return    (bool)        True  = no errors have been logged.
-                             False = Errors have been logged.
-    """    
-    
-    # determine which action to take
-    if get:
-        # return the state
-        return log_warning.no_warnings
-    
-    else:
-        # log a warning
-        log_warning.no_warnings = False
-    # end if
-# end def
-
-# set the initial value
-log_warning.no_warnings = True
-
-
-def move_Altium_files(starting_dir, output_dir):
+def move_Altium_files(context, starting_dir, output_dir):
     """
     Function to move all of the altium files to the deliverable directory.
 
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
     @param[in]   starting_dir:        The Altium project directory (full path) 
                                       (string).
     @param[in]   output_dir:          The folder to move the files to (full path) 
@@ -167,27 +120,21 @@ def move_Altium_files(starting_dir, output_dir):
     # initialise dates list
     modified_dates = []
     
-    # get file list of root directory
-    root_file_list = os.listdir(starting_dir)
-    
     # copy desired files
-    for filename in root_file_list:
-        # compare each filename with the desired set of extensions
-        for ext in altium_ext:
-            if filename.endswith(ext):
-                # This file is desired to copy it across
-                try:
-                    shutil.copyfile(starting_dir+'\\'+filename, output_dir+'\\'+filename)  
-                    
-                except:
-                    print('*** Error: could not move ' + filename + ' ***')
-                    log_error()
-                # end try
-                
-                modified_dates.append(Altium_helpers.mod_date(os.path.getmtime(starting_dir+'\\'+filename),
-                                                               filename))
-            # end if
-        # end for
+    for filename in find_Altium_files(context, starting_dir):
+        try:
+            # not linked to the store, as a delivered Altium file may be 
+            # opened and saved, which would change the stored copy
+            Altium_helpers.copy_file(context, starting_dir+'\\'+filename, 
+                                     output_dir+'\\'+filename)  
+            
+        except:
+            print('*** Error: could not move ' + filename + ' ***')
+            context.log_error()
+        # end try
+        
+        modified_dates.append(Altium_helpers.mod_date(context.files.getmtime(starting_dir+'\\'+filename),
+                                                       filename))
     # end for
     
     print('Complete! \n')    
@@ -196,10 +143,12 @@ def move_Altium_files(starting_dir, output_dir):
 # end def
 
                 
-def move_gerbers(starting_dir, output_dir, part_number):
+def move_gerbers(context, starting_dir, output_dir, part_number):
     """
     Function to move all of the gerber files to the deliverable directory.
 
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
     @param[in]   starting_dir:        The folder to move the files from (full path) 
                                       (string).
     @param[in]   output_dir:          The folder to move the files to (full path) 
@@ -216,95 +165,51 @@ def move_gerbers(starting_dir, output_dir, part_number):
     modified_dates = []
     
     # get list of gerber files
-    gerber_file_list = os.listdir(starting_dir)
+    gerber_file_list = context.files.listdir(starting_dir)
     
     # if there are simly too few gerber files to be acceptible
     if len(gerber_file_list) < 10:
         # No gerbers exist
         print('***   Error: No Gerbers have been generated   ***\n\n')
-        log_error()
+        context.log_error()
         return None, None
     # end 
     
-    # layer counter
-    layers = 0
+    [gerber_copies, layers] = find_gerber_files(context, starting_dir, part_number)
     
-    # iterate through the files in the gerber directory
     for filename in gerber_file_list:
-        good_filename = True
-        
-        # see if the selected gerber is a layer artwork file
-        for ext in layer_gerber_list:
-            if filename.endswith(ext):
-                # is a valid gerber layer
-                layers+=1
+        if filename.endswith('G9') or filename.endswith('GP9'):
+            # This indicates that there are more layers than this code was 
+            # developed to handle
+            print('***  Error: Script needs to be extended to ' + \
+                  'handle this many layers   ***\n\n')
+            context.log_error()
+        # end if
+    # end for
     
-            if filename.endswith('G9') or filename.endswith('GP9'):
-                # This indicates that there are more layers than this code was 
-                # developed to handle
-                print('***  Error: Script needs to be extended to ' + \
-                      'handle this many layers   ***\n\n')
-                log_error()
-            # end
-        # end
-        
-        # see if the file is one of the gerber files to be ignored
-        for ext in bad_gerber_ext:
-            if (filename.endswith(ext) and ("Pick Place" not in filename)):
-                good_filename = False
-            # end if
-        # end for
-        
-        # if the filename is desired
-        if good_filename:
-            if filename.endswith('.xls'):
-                if ('(' not in filename):
-                    # this is the full BOM file
-                    
-                    # copy the bom to the deliverable
-                    shutil.copyfile(starting_dir + '\\' + filename, \
-                                            output_dir + '\\' + \
-                                            part_number + '_BOM.xls')
-                    
-                    # get it's modification date
-                    modified_dates.append(Altium_helpers.mod_date(os.path.getmtime(starting_dir + '\\' +\
-                                                           filename), filename))    
-                
-                elif ('SMD Assembly' in filename):
-                    # this is the file for SMD assembly.
-                    # copy the bom to the deliverable
-                    shutil.copyfile(starting_dir + '\\' + filename, \
-                                                    output_dir + '\\' + \
-                                                            part_number + '_SMD_BOM.xls')
-                
-                    # get it's modification date
-                    modified_dates.append(Altium_helpers.mod_date(os.path.getmtime(starting_dir + '\\' +\
-                                                                                                   filename), filename))             
-                # end if
+    # iterate through the gerber files that are delivered
+    for [filename, output_filename] in gerber_copies:
+        # attempt to copy the gerber file to the deliverables
+        try:
+            Altium_helpers.copy_file(context, starting_dir + '\\' + filename, 
+                                     output_dir + '\\' + output_filename, 
+                                     shared = True)
             
-            else:
-                # attempt to copy the gerber file to the deliverables
-                try:
-                    shutil.copyfile(starting_dir+'\\'+filename, 
-                                    output_dir+'\\'+filename)
-                    
-                except:
-                    print('*** Error: could not move ' + filename + ' ***')
-                    log_error()
-                # end try
-                
-                # get the modification date of the file
-                modified_dates.append(Altium_helpers.mod_date(os.path.getmtime(starting_dir+'\\'+ \
-                                                       filename), filename))     
-            # end if
-        # end if
+        except:
+            print('*** Error: could not move ' + filename + ' ***')
+            context.log_error()
+        # end try
+        
+        # get the modification date of the file
+        modified_dates.append(Altium_helpers.mod_date(context.files.getmtime(starting_dir + '\\' + \
+                                               filename), filename))     
     # end for
     
     # create the readme for the gerbers directory
-    create_readme(output_dir, layers)
+    create_readme(context, output_dir, layers)
     
     # check that all required gerbers are in the directory
-    check_gerber_folder(output_dir)
+    check_gerber_folder(context, output_dir)
     
     print('Complete! \n')  
     
@@ -312,10 +217,12 @@ def move_gerbers(starting_dir, output_dir, part_number):
 # end def
 
 
-def move_documents(starting_dir, pdf_dir, output_pdf_dir, gerber_dir, part_number, layers):
+def move_documents(context, starting_dir, pdf_dir, output_pdf_dir, gerber_dir, part_number, layers):
     """
     Function to move all the documents to the deliverable directory.
 
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
     @param[in]   starting_dir:        The Altium project directory (full path) 
                                       (string).
     @param[in]   pdf_dir:             The Location of the pdf files (full path)
@@ -334,57 +241,51 @@ def move_documents(starting_dir, pdf_dir, output_pdf_dir, gerber_dir, part_numbe
     no_schematic = True
        
     # manage the schematic document
-    modified_dates = [manage_schematic(starting_dir, pdf_dir, output_pdf_dir, part_number, with_threads = True)]
+    modified_dates = [manage_schematic(context, starting_dir, pdf_dir, output_pdf_dir, part_number, with_threads = True)]
     
     # construct the assembly doc
-    modified_dates.append(Altium_Excel.construct_assembly_doc(starting_dir, gerber_dir, output_pdf_dir, part_number))
+    modified_dates.append(Altium_Excel.construct_assembly_doc(context, starting_dir, gerber_dir, output_pdf_dir, part_number))
     
     # get the file list for the starting directory
-    root_file_list = os.listdir(starting_dir)
+    root_file_list = context.files.listdir(starting_dir)
     
     # search for ASSY_REV document in root folder
     for filename in root_file_list:
         if (filename.endswith('xlsx')) and ('ASSY' in filename):
             # ASSY REV doc found
             try:
-                shutil.copyfile(starting_dir+'\\'+filename, \
-                                output_pdf_dir + '\\' + part_number + '_ASSY_REV.xlsx')
+                Altium_helpers.copy_file(context, starting_dir+'\\'+filename, \
+                                         output_pdf_dir + '\\' + part_number + '_ASSY_REV.xlsx')
                 
             except:
                 print('***   Error: could not move ASSY_REV document   ***')
-                log_error()     
+                context.log_error()     
             # end try
             
             break
         # end   
     # end    
 
-    modified_dates.extend(Altium_PDF.manage_Altium_PDFs(pdf_dir, output_pdf_dir, layers))
-        
-    
-    # check for errors and warnings following OCR
-    if not (Altium_PDF.log_error(get=True) and Altium_Excel.log_error(get=True)):
-        log_error()
-    # end if
-    
-    if not (Altium_PDF.log_warning(get=True) and Altium_Excel.log_warning(get=True)):
-        log_warning()
-    # end if   
+    modified_dates.extend(Altium_PDF.manage_Altium_PDFs(context, pdf_dir, output_pdf_dir, layers))
     
     return modified_dates
 # end def
 
 
-def zip_step_file(starting_dir, output_dir, part_number):
+def zip_step_file(context, starting_dir, output_dir, part_number, reproducible = False):
     """
     Function to move the step file to the deliverable directory.
 
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
     @param[in]   starting_dir:        The Altium project directory (full path) 
                                       (string).
     @param[in]   output_dir:          The projet packaging output directory (full path) 
                                       (string).
     @param[in]   part_number:         The part number for the design
                                       (string).
+    @param[in]   reproducible:        Make the zip so that the same files 
+                                      always give the same bytes (bool).
     @return      (datetime)           Modification date of the step file.
     """      
     
@@ -393,75 +294,66 @@ def zip_step_file(starting_dir, output_dir, part_number):
     # completion flags
     step_file_found = False
     x_t_file_found = False
-    both_files_processed = False
     modified_dates = []
     
-    # get the file list of the starting directory
-    root_file_list = os.listdir(starting_dir)
-
-    # make a folder to put the step file in temporarily
-    step_dir = starting_dir + '\\step_temp'
-    if os.path.exists(step_dir):
-        shutil.rmtree(step_dir)
-    # end
-    
-    # create temporary directory in which to place all of the files needed
-    os.makedirs(step_dir)    
-    
-    # search for step file
-    for filename in root_file_list:
-        if filename.endswith('.step'):
-            # step file has been found
-            
-            # get it's modification date
-            modified_dates.append(Altium_helpers.mod_date(os.path.getmtime(starting_dir+'\\'+filename), 
-                                                    filename))
-            
-            # Shrinking the step file would happen here....
-
-            # copy file into temp directory
-            shutil.copy(starting_dir+'\\'+filename, step_dir +'\\'+part_number+'.step')
-            
-            step_file_found = True
-        # end if
-        if filename.endswith('.x_t'):
-            # step file has been found
-            
-            # get it's modification date
-            modified_dates.append(Altium_helpers.mod_date(os.path.getmtime(starting_dir+'\\'+filename), 
-                                                    filename))
-            
-            # Shrinking the step file would happen here....
-
-            # copy file into temp directory
-            shutil.copy(starting_dir+'\\'+filename, step_dir +'\\'+part_number+'.x_t')
-            
-            x_t_file_found = True
-        # end if
-    # end for
-
-    # make archive
-    shutil.make_archive(output_dir+'\\'+part_number+'_3D', 'zip', step_dir)
+    # stream the 3D files straight into the archive, named after the part
+    with context.trace.span('zip ' + part_number + '_3D', 'archive') as event:
+        with Altium_Archive.archive_writer(output_dir+'\\'+part_number+'_3D.zip', 
+                                           workers = Altium_Archive.default_workers(),
+                                           reproducible = reproducible) as archive:
+            for filename in find_step_files(context, starting_dir):
+                # get it's modification date
+                modified_dates.append(Altium_helpers.mod_date(context.files.getmtime(starting_dir+'\\'+filename), 
+                                                        filename))
+                
+                ext = filename.split('.')[-1]
+                
+                if ext == 'step':
+                    step_file_found = True
+                    
+                    # deliver a minified copy if it can be made and checked,
+                    # recording what is in the model while it is read
+                    info = Altium_STEP.step_info()
+                    minified = minify_step_file(context, starting_dir+'\\'+filename, info)
+                    
+                    if minified == None:
+                        archive.add_file(starting_dir+'\\'+filename, part_number+'.'+ext)
+                        
+                    else:
+                        try:
+                            archive.add_file(minified, part_number+'.'+ext)
+                            
+                        finally:
+                            os.remove(minified)
+                        # end try
+                    # end if
+                    
+                    add_step_info(context, archive, starting_dir+'\\'+filename, 
+                                  info, part_number)
+                    
+                else:
+                    x_t_file_found = True
+                    archive.add_file(starting_dir+'\\'+filename, part_number+'.'+ext)
+                # end if
+            # end for
+        # end with
+        
+        event.add_bytes(os.path.getsize(output_dir+'\\'+part_number+'_3D.zip'))
+        event.args['compression_seconds_saved'] = archive.stats.seconds
+    # end with
     
-    time.sleep(0.5)
+    print(archive.stats.report(part_number+'_3D.zip'))
     
-    try:
-        # delete the temp directory
-        shutil.rmtree(step_dir)       
-        
-    except:
-        print('*** WARNING: Could not delete temporary step directory ***')
-        log_warning()     
-    # end try
+    context.files.invalidate(output_dir+'\\'+part_number+'_3D.zip')
     
     if not step_file_found:
         print('*** WARNING: No step file found ***')
-        log_warning()
+        context.log_warning()
     # end if
 
     if not x_t_file_found:
         print('*** WARNING: No step file found ***')
-        log_warning()
+        context.log_warning()
     # end if
             
     print('Complete! \n')
@@ -470,14 +362,254 @@ def zip_step_file(starting_dir, output_dir, part_number):
 # end def
 
 
+def find_Altium_files(context, starting_dir):
+    """
+    Function to find the Altium files that are delivered.
+
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
+    @param[in]   starting_dir:        The Altium project directory (full path) 
+                                      (string).
+    @return      (list of strings)    The filenames of the Altium files.
+    """
+    altium_files = []
+    
+    for filename in context.files.listdir(starting_dir):
+        # compare each filename with the desired set of extensions
+        for ext in altium_ext:
+            if filename.endswith(ext):
+                altium_files.append(filename)
+            # end if
+        # end for
+    # end for
+    
+    return altium_files
+# end def
+
+
+def find_gerber_files(context, starting_dir, part_number):
+    """
+    Function to find the gerber files that are delivered and the names they 
+    are delivered under.
+
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
+    @param[in]   starting_dir:        The folder containing the gerbers (full path) 
+                                      (string).
+    @param[in]   part_number:         The part number of the project 
+                                      (string).
+    @return      (list)               The filename of each gerber file with the
+                                      filename to deliver it as.
+    @return      (int)                The number of layers in the design.
+    """
+    gerber_copies = []
+    
+    # layer counter
+    layers = 0
+    
+    # iterate through the files in the gerber directory
+    for filename in context.files.listdir(starting_dir):
+        good_filename = True
+        
+        # see if the selected gerber is a layer artwork file
+        for ext in layer_gerber_list:
+            if filename.endswith(ext):
+                # is a valid gerber layer
+                layers+=1
+            # end if
+        # end for
+        
+        # see if the file is one of the gerber files to be ignored
+        for ext in bad_gerber_ext:
+            if (filename.endswith(ext) and ("Pick Place" not in filename)):
+                good_filename = False
+            # end if
+        # end for
+        
+        if not good_filename:
+            continue
+        # end if
+        
+        if filename.endswith('.xls'):
+            if ('(' not in filename):
+                # this is the full BOM file
+                gerber_copies.append([filename, part_number + '_BOM.xls'])
+            
+            elif ('SMD Assembly' in filename):
+                # this is the file for SMD assembly.
+                gerber_copies.append([filename, part_number + '_SMD_BOM.xls'])
+            # end if
+        
+        else:
+            gerber_copies.append([filename, filename])
+        # end if
+    # end for
+    
+    return gerber_copies, layers
+# end def
+
+
+def find_step_files(context, starting_dir):
+    """
+    Function to find the step and parasolid files of the design.
+
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
+    @param[in]   starting_dir:        The Altium project directory (full path) 
+                                      (string).
+    @return      (list of strings)    The filenames of the 3D files.
+    """
+    return [f for f in context.files.listdir(starting_dir) 
+            if f.endswith(('.step', '.x_t'))]
+# end def
+
+
+def find_xps_file(context, starting_dir):
+    """
+    Function to find the xps file of the design.
+
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
+    @param[in]   starting_dir:        The Altium project directory (full path) 
+                                      (string).
+    @return      (string)             The filename of the xps file, empty if 
+                                      there is none.
+    """
+    xps_file = ''
+    
+    for filename in context.files.listdir(starting_dir):
+        if filename.endswith('xps'):
+            xps_file = filename
+        # end if
+    # end for
+    
+    return xps_file
+# end def
+
+
+def find_schematic(context, pdf_dir):
+    """
+    Function to find the schematic document.
+
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
+    @param[in]   pdf_dir:             The location of the pdf files (full path) 
+                                      (string).
+    @return      (string)             The filename of the schematic, empty if 
+                                      there is none.
+    """
+    for filename in context.files.listdir(pdf_dir):
+        if ('Schematic.' in filename):
+            return filename
+        # end if
+    # end for
+    
+    return ''
+# end def
+
+
 #
 # ----------------
 # Private Functions 
 
-def move_xps(starting_dir, output_dir, part_number):
+def minify_step_file(context, source, info = None):
+    """
+    Write a minified copy of a step file to the temporary directory, with 
+    comments and extra whitespace removed and identical geometry merged.
+
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
+    @param[in]   source:              The step file (full path) (string).
+    @param[in]   info:                Collects what is in the model as it is 
+                                      read (Altium_STEP.step_info).
+    @return      (string)             The minified copy (full path), None if 
+                                      it could not be made or did not match 
+                                      the original.
+    """
+    [handle, minified] = tempfile.mkstemp(suffix = '.step')
+    os.close(handle)
+    
+    with context.trace.span('minify ' + os.path.basename(source), 'step') as event:
+        try:
+            result = Altium_STEP.minify_step(source, minified, info)
+            
+        except (ValueError, OSError) as error:
+            os.remove(minified)
+            print('*** Warning: The step file could not be minified (' + 
+                  str(error) + '), it is delivered as exported ***')
+            context.log_warning()
+            return None
+        # end try
+        
+        event.add_bytes(result.bytes_in)
+        event.args['bytes_out'] = result.bytes_out
+    # end with
+    
+    print('\tMinified the step file from ' + 
+          '%.1f' % (result.bytes_in / 1048576.0) + ' MB to ' + 
+          '%.1f' % (result.bytes_out / 1048576.0) + ' MB, ' + 
+          str(result.entities_in - result.entities_out) + ' of ' + 
+          str(result.entities_in) + ' entities merged')
+    
+    return minified
+# end def
+
+
+def add_step_info(context, archive, source, info, part_number):
+    """
+    Add the header, units, entity counts and bounding box of the step file 
+    to the 3D archive, so the model can be checked against the board outline 
+    without opening it.
+
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
+    @param[in]   archive:             The 3D archive 
+                                      (Altium_Archive.archive_writer).
+    @param[in]   source:              The step file (full path) (string).
+    @param[in]   info:                What was found while minifying it, 
+                                      read again if that did not finish 
+                                      (Altium_STEP.step_info).
+    @param[in]   part_number:         The part number for the design
+                                      (string).
+    """
+    if not info.complete:
+        try:
+            info = Altium_STEP.read_step_info(source)
+            
+        except (ValueError, OSError) as error:
+            print('*** Warning: The step file could not be read (' + 
+                  str(error) + '), its details are not included ***')
+            context.log_warning()
+            return
+        # end try
+    # end if
+    
+    details = {'file': part_number + '.step'}
+    details.update(info.to_dict())
+    
+    archive.add_data(json.dumps(details, indent = 2, sort_keys = True).encode('utf-8'),
+                     part_number + '_3D.json')
+    
+    size = info.size()
+    
+    if size == None:
+        print('*** Warning: The step file has no points ***')
+        context.log_warning()
+        
+    else:
+        print('\tModel is ' + ' x '.join('%.2f' % value for value in size) + 
+              ' ' + '/'.join(info.units.get('length', ['?'])) + ', ' + 
+              str(info.entities) + ' entities')
+    # end if
+# end def
+
+
+def move_xps(context, starting_dir, output_dir, part_number):
     """
     Function to move the xps file to the deliverable directory.
 
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
     @param[in]   starting_dir:        The current location of the xps file (full path) 
                                       (string).
     @param[in]   output_dir:          The folder to move the xps file to (full path) 
@@ -487,28 +619,19 @@ def move_xps(starting_dir, output_dir, part_number):
     @return      (datetime)           Modification date of the xps file.
     """      
     
-    # get the file list of the root directory
-    root_file_list = os.listdir(starting_dir)
-    
-    # initialise variables
-    xps_file = ''
+    # search through the file list fot the xps file
+    xps_file = find_xps_file(context, starting_dir)
     modified_date = None
     
-    # search through the file list fot the xps file
-    for filename in root_file_list:
-        if filename.endswith('xps'):
-            # store the filename
-            xps_file = filename
-            
-            # store it's modification date
-            modified_date = Altium_helpers.mod_date(os.path.getmtime(starting_dir+'\\'+filename), 
-                                                    filename)
-        # end if
-    # end for
+    if xps_file != '':
+        # store it's modification date
+        modified_date = Altium_helpers.mod_date(context.files.getmtime(starting_dir+'\\'+xps_file), 
+                                                xps_file)
+    # end if
     
     if xps_file == '':
         print('*** Error: no .xps file found ***')
-        log_error()
+        context.log_error()
         return None
     # end if
     
@@ -516,16 +639,19 @@ def move_xps(starting_dir, output_dir, part_number):
     xps_ext = xps_file.split('.')[1]
     
     # copy file into folder
-    shutil.copy(starting_dir+'\\'+xps_file, output_dir +'\\'+part_number + '.' + xps_ext)
+    Altium_helpers.copy_file(context, starting_dir+'\\'+xps_file, 
+                             output_dir +'\\'+part_number + '.' + xps_ext, shutil.copy)
     
     return modified_date
 # end def
 
 
-def manage_schematic(starting_dir, pdf_dir, output_pdf_dir, part_number, with_threads = False):
+def manage_schematic(context, starting_dir, pdf_dir, output_pdf_dir, part_number, with_threads = False):
     """
     Function to move the schematic to the deliverable directory.
 
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
     @param[in]   starting_dir:        The Altium project directory (full path) 
                                       (string).
     @param[in]   pdf_dir:             The location of the pdf files (full path) 
@@ -534,7 +660,8 @@ def manage_schematic(starting_dir, pdf_dir, output_pdf_dir, part_number, with_th
                                       (string).
     @param[in]   part_number:         The part number of the project 
                                       (string).
-    @param[in]   with_threads:        Use threads for this process (bool).
+    @param[in]   with_threads:        Split large schematics in worker 
+                                      processes (bool).
     @return      (mod_date)           Modification dates of the schematic.
     """     
     print('Finding Schematic Document...')
@@ -546,58 +673,45 @@ def manage_schematic(starting_dir, pdf_dir, output_pdf_dir, part_number, with_th
     pdf_filename = ''
     # search for a schematic document in the root directory
     
-    root_file_list = os.listdir(pdf_dir)
+    pdf_filename = find_schematic(context, pdf_dir)
         
-    for filename in root_file_list:
-        if ('Schematic.' in filename):
-            pdf_filename = filename
+    if pdf_filename != '':
+        try:            
+            modified_date = Altium_helpers.mod_date(context.files.getmtime(pdf_dir + '\\'+pdf_filename),
+                                                                pdf_filename)                
+            no_schematic = False
             
-            try:            
-                modified_date = Altium_helpers.mod_date(os.path.getmtime(pdf_dir + '\\'+pdf_filename),
-                                                                    pdf_filename)                
-                no_schematic = False
-                
-            except:
-                pass
-            # end try
-            break
-        # end if
-    # end for 
+        except:
+            pass
+        # end try
+    # end if 
     
     if no_schematic:
         # No schematic was found
         print('***   Error: No Schematic Document was found   ***')
-        log_error()
+        context.log_error()
         return None
     # end if
         
     print('\tReading the Schematic file...')
     
-    # open pdf file and split into pages
+    # split the pdf into pages, reading it once
     try:
-        with open(pdf_dir + '\\'+pdf_filename, "rb") as schematic_file:
-            schematic = PyPDF2.PdfFileReader(schematic_file)
+        with context.trace.span('split ' + pdf_filename, 'pdf') as event:
+            event.add_bytes(os.path.getsize(pdf_dir + '\\'+pdf_filename))
             
-            # write each page to a separate pdf file
-            for page in range(schematic.numPages):
-                # reinitialise the reader
-                schematic = PyPDF2.PdfFileReader(schematic_file)
-                # add page to the output stream
-                output = PyPDF2.PdfFileWriter()
-                output.addPage(schematic.getPage(page))
-                # format the filename 
-                file_name = output_pdf_dir + '\\' + part_number + '-' + str(page+1) + '.pdf'
-                
-                with open(file_name, "wb") as outputStream:
-                    output.write(outputStream)
-                # end with
-                    
-            # end for
+            # each page is written to a separate pdf file
+            split = Altium_Split.split_pdf(pdf_dir + '\\'+pdf_filename, 
+                                           output_pdf_dir + '\\' + 
+                                           part_number.replace('%', '%%') + '-%d.pdf',
+                                           None if with_threads else 0)
+            event.args['pages'] = split.pages
+            event.args['workers'] = split.workers
         # end with
         
     except:
         print('***   Error: Could not open schematic document   ***')
-        log_error()
+        context.log_error()
         return None        
     # end try
     
@@ -605,24 +719,24 @@ def manage_schematic(starting_dir, pdf_dir, output_pdf_dir, part_number, with_th
         
     print('\tExtracting Modification Information...')
     
-    if os.path.isfile(pdf_dir + '\\MOD.pdf'):
+    if context.files.isfile(pdf_dir + '\\MOD.pdf'):
         # extract the text from a pdf page
-        pdf_text = str(Altium_PDF.convert_pdf_to_txt(pdf_dir + '\\MOD.pdf'))
+        pdf_text = str(Altium_PDF.convert_pdf_to_txt(context, pdf_dir + '\\MOD.pdf'))
         
         # check to see if this document is the Assembly revision document
         if 'ASSY' in pdf_text:
             # if it is, extract that information and process it
-            extract_assy_info(pdf_text, starting_dir)
-            found_mod_doc()
+            extract_assy_info(context, pdf_text, starting_dir)
+            context.mod_found = True
         # end if
     # end if
     
     print('\tComplete!')
     
-    if not found_mod_doc(get=True):
+    if not context.mod_found:
         print('***   Warning: No Modification information found in schematic   ***')
-        Altium_Excel.set_assy_options(starting_dir, [], [])
-        log_warning()
+        Altium_Excel.set_assy_options(context, starting_dir, [], [])
+        context.log_warning()
     # end if    
     print('Complete! \n')
     
@@ -630,36 +744,12 @@ def manage_schematic(starting_dir, pdf_dir, output_pdf_dir, part_number, with_th
 # end def
 
 
-def found_mod_doc(get = False):
-    """
-    Function to indicate that the modification document was found.
-
-    @param[in]    get:        True  = return mod_found
-                              False = indicate that the document was found (bool)
-    @attribute    mod_found:  Whether the document has been found
-    @return       (bool)      True  = The document has been found
-                              False = The document has not been found
-    """  
-    
-    # determine which action to take
-    if get:
-        # return the state
-        return found_mod_doc.mod_found
-    
-    else:
-        # Mark as found
-        found_mod_doc.mod_found = True
-    # end if
-# end def
-
-# set the initial value
-found_mod_doc.mod_found = False 
-
-
-def move_bom(starting_dir):
+def move_bom(context, starting_dir):
     """
     Function to move the BOM to the deliverable directory.
 
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
     @param[in]   starting_dir:        The Altium project directory (full path) 
                                       (string).
     @return      (list of datetimes)  List of the modification dates of the 
@@ -680,7 +770,7 @@ def move_bom(starting_dir):
     outputs_dir = Altium_helpers.get_output_dir(starting_dir)
     
     # get list of gerber files
-    gerber_file_list = os.listdir(outputs_dir)    
+    gerber_file_list = context.files.listdir(outputs_dir)    
     
     # create the PDF Directory
     pdf_dir = Altium_helpers.get_pdf_dir(starting_dir)    
@@ -689,9 +779,9 @@ def move_bom(starting_dir):
     for filename in gerber_file_list:
         if filename.endswith('xls'):
             # BOM found
-            shutil.copyfile(outputs_dir + '\\' + filename, \
-                           pdf_dir + '\\' + part_number + '_BOM.xls')
-            modified_dates.append(Altium_helpers.mod_date(os.path.getmtime(outputs_dir+'\\'+filename),
+            Altium_helpers.copy_file(context, outputs_dir + '\\' + filename, \
+                                     pdf_dir + '\\' + part_number + '_BOM.xls')
+            modified_dates.append(Altium_helpers.mod_date(context.files.getmtime(outputs_dir+'\\'+filename),
                                                           filename))
             
             no_bom = False
@@ -702,7 +792,7 @@ def move_bom(starting_dir):
     if no_bom:
         # No BOM was found
         print('***   No BOM was found in project outputs   ***')
-        log_error()
+        context.log_error()
     # end
     
     print('Complete! \n')
@@ -711,10 +801,12 @@ def move_bom(starting_dir):
 # end def
 
 
-def check_gerber_folder(gerber_dir):
+def check_gerber_folder(context, gerber_dir):
     """
     Function to check the gerbers directory to see if anything is missing.
 
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
     @param[in]   gerber_dir:        The directory that the gerbers have been put
                                     into (fullp path) (string).
     """     
@@ -738,7 +830,7 @@ def check_gerber_folder(gerber_dir):
         
         if not ext_found:
             print('*** Error: no ' + ext + ' file output to gerbers ***')
-            log_error()
+            context.log_error()
         # end if
     # end for
     
@@ -758,20 +850,22 @@ def check_gerber_folder(gerber_dir):
     
     if not readme_found:
         print('*** Error: no readme file output to gerbers ***')
-        log_error()
+        context.log_error()
     # end if
     
     if not pick_found:
         print('*** Error: no pick and place file output to gerbers ***')
-        log_error()
+        context.log_error()
     # end if    
 # end def
 
 
-def create_readme(output_dir, layers):
+def create_readme(context, output_dir, layers):
     """
     Function to create the readme file for the gerber file delivery.
 
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
     @param[in]   output_dir:          The folder containing the gerber outputs 
                                       (full path) (string).
     @param[in]   layers:              The number of layers in the PCB (int).
@@ -784,6 +878,9 @@ def create_readme(output_dir, layers):
     # list of extensions already used to prevent repeats
     extensions_used = []
     
+    # list in which the readme file gets built, pre loaded with the header
+    Readme_lines = list(Readme_header)
+    
     # get list of gerber files
     gerber_file_list = os.listdir(output_dir)    
     
@@ -880,18 +977,20 @@ def create_readme(output_dir, layers):
         
     except:
         print('*** could not write readme file ***')
-        log_error()
+        context.log_error()
     # end try
     
     print('\tComplete!')
 # end def
 
 
-def get_page_number(path, pn, starting_dir):
+def get_page_number(context, path, pn, starting_dir):
     """
     Function to extract the text from a schematic document and assign it the 
     correct page number as read from the document.
     
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
     @param[in]   path:             The path of the pdf file to be read (string)
     @param[in]   pn:               The part number of the project (string)
     @param[in]   starting_dir:     The Altium project directory (full path) 
@@ -901,12 +1000,12 @@ def get_page_number(path, pn, starting_dir):
                                    page. False otherwise
     """        
     # extract the text from a pdf page
-    pdf_text = Altium_PDF.convert_pdf_to_txt(path)
+    pdf_text = Altium_PDF.convert_pdf_to_txt(context, path)
     
     # check to see if this document is the Assembly revision document
     if 'ASSY' in pdf_text:
         # if it is, extract that information and process it
-        extract_assy_info(pdf_text, starting_dir)
+        extract_assy_info(context, pdf_text, starting_dir)
         is_assy = True
         
     else:
@@ -940,22 +1039,24 @@ def get_page_number(path, pn, starting_dir):
     
     if page_number == '':
         print('*** Error: No page number could be found ***')
-        log_error()
+        context.log_error()
         
     elif not page_number.isdigit():
         print('*** Error: ' + page_number + ' is not a valid page number ***')
-        log_error()
+        context.log_error()
     # end if
     
     return page_number, is_assy
 # end def
 
 
-def extract_assy_info(pdf_text, starting_dir):
+def extract_assy_info(context, pdf_text, starting_dir):
     """
     Function to extract the assembly revision information from the text of a 
     schematic sheet.
 
+    @param[in]   context:             The state of this run 
+                                      (Altium_helpers.run_context).
     @param[in]   pdf_text:         The text of the schematic page
     @param[in]   starting_dir:     The Altium project directory (full path) 
                                    (string).
@@ -967,7 +1068,7 @@ def extract_assy_info(pdf_text, starting_dir):
     # if there are not the expected 3 blocks, throw an error
     if len(assy_blocks) != 3:
         print("*** Warning, too many ASSY_REV blocks. ***")
-        log_warning()
+        context.log_warning()
     # end if
     
     # split the third block into it's parts
@@ -975,7 +1076,7 @@ def extract_assy_info(pdf_text, starting_dir):
     
     if ((list_1 == []) or (list_1 == [''])):
         print("*** Warning, ASSY_Config information is empty ***")
-        log_warning()
+        context.log_warning()
         return None        
     # end if
     
@@ -990,12 +1091,12 @@ def extract_assy_info(pdf_text, starting_dir):
     # if the lists are not the same length post a warning
     if len(list_0) != len(list_1):
         print("*** Warning, missmatched ASSY_REV blocks ***")
-        log_warning()
+        context.log_warning()
         return None
     # end if        
     
     # insert the gathered information into the ASSY_REV document
-    if not Altium_Excel.set_assy_options(starting_dir, list_0, list_1):
-        log_error()
+    if not Altium_Excel.set_assy_options(context, starting_dir, list_0, list_1):
+        context.log_error()
     # end if
 # end def
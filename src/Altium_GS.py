@@ -23,17 +23,12 @@ __version__ = '0.2.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
 # -------
 # Imports
 
-import gspread
+# the google libraries are slow to import and only needed when a sheet is 
+# updated, so they are imported by the functions that use them
 import os
-from pydrive.auth import GoogleAuth
-from pydrive.drive import GoogleDrive
-from oauth2client import client
-from oauth2client import tools
-from oauth2client.file import Storage
-import httplib2
 import time
-import argparse
 import datetime
+import Altium_helpers
 
 
 max_assy_rev = 24
@@ -123,13 +118,13 @@ class assembly_info:
 # -------
 # Public Functions
 
-def upload_files(output_dir, prog_dir):
+def upload_files(context, output_dir):
     """
     Uploads the generated .zip file to the google dirve folder.
 
+    @param:    context        The state of this run 
+                              (Altium_helpers.run_context).
     @param:    output_dir     The full path of output package (string).
-    @param:    prog_dir       The full path that the program is running from
-                              (string).
     """    
     print('\nUploading to google drive...')
     file_list = os.listdir(output_dir)
@@ -141,10 +136,12 @@ def upload_files(output_dir, prog_dir):
     # end for
     
     # authorize google drive API
-    drive = authorise_google_drive(prog_dir + '\\src')    
+    drive = authorise_google_drive(context.prog_dir + '\\src')    
     
     # get the list of all the files in deliverables folder
-    file_list = drive.ListFile({'q': "'1vDTz6N-1QbUlkbb7QrFj082YUpkIRZFL' in parents and trashed=false"}).GetList()
+    with context.trace.span('list deliverables folder', 'sheets'):
+        file_list = drive.ListFile({'q': "'1vDTz6N-1QbUlkbb7QrFj082YUpkIRZFL' in parents and trashed=false"}).GetList()
+    # end with
     
     # convert this list to a useable dictionary
     file_dict = {i.get('title').encode('ascii', 'ignore'): i for i in file_list}
@@ -159,20 +156,24 @@ def upload_files(output_dir, prog_dir):
     zip_file = drive.CreateFile({'title': filename, 
                                  'parents': [{'kind':'drive#fileLink', 
                                               'id': '1vDTz6N-1QbUlkbb7QrFj082YUpkIRZFL'}]})
-    zip_file.SetContentFile(starting_dir + '\\' + filename)
-    zip_file.Upload()
+    zip_file.SetContentFile(output_dir + '\\' + filename)
+    
+    with context.trace.span('upload ' + filename, 'sheets') as event:
+        event.add_bytes(os.path.getsize(output_dir + '\\' + filename))
+        zip_file.Upload()
+    # end with
     
     print('Complete!\n')
 # end def    
     
 
-def populate_online_bom(prog_dir, part_number, assy_number, revision, assy_info):
+def populate_online_bom(context, part_number, assy_number, revision, assy_info):
     """
     Populates a BOM in the Pumpkin google drive the the appropriate information 
     for this project.
 
-    @param:    prog_dir       The full path that the program is running from
-                              (string).
+    @param:    context        The state of this run 
+                              (Altium_helpers.run_context).
     @param:    part_number    The part number of the BOM to write to (string).
     @param:    assy_number    The assembly number of the BOM to write to (string).
     @param:    assy_info      The information to populate the BOM with 
@@ -181,13 +182,15 @@ def populate_online_bom(prog_dir, part_number, assy_number, revision, assy_info)
     
     print('Updating the google sheet BOM...')
     # determine the scr directory path
-    src_dir = prog_dir + '\\src'
+    src_dir = context.prog_dir + '\\src'
     
     # attempt to authorize the google credentials
     try:
         # authorize google drive and google sheet APIs
-        drive = authorise_google_drive(src_dir)
-        gsheet = authorise_google_sheet(src_dir)
+        with context.trace.span('authorise', 'sheets'):
+            drive = authorise_google_drive(src_dir)
+            gsheet = authorise_google_sheet(src_dir)
+        # end with
     
     except:
         print('*** Error: Failed to Authorize google credentials, no BOM uploaded ***\n')
@@ -196,19 +199,24 @@ def populate_online_bom(prog_dir, part_number, assy_number, revision, assy_info)
     
     # create the name of the BOM from the part number and open it.
     bom_name = part_number + '/' + assy_number + revision
-    online_bom = open_bom(drive, gsheet, bom_name)
-    
-    # open the options worksheet
-    options = online_bom.worksheet("Options")
     
-    # find the headers for the columns
-    header_row = options.find("0 value").row
-    col_0 = options.find("0 value").col
-    col_1 = options.find("1 value").col
+    with context.trace.span('open ' + bom_name, 'sheets'):
+        online_bom = open_bom(drive, gsheet, bom_name)
+    # end with
     
-    #read cell array
-    cells = options.range(header_row+1, min(col_0, col_1), 
-                          options.row_count, max(col_0, col_1))
+    with context.trace.span('read Options', 'sheets'):
+        # open the options worksheet
+        options = online_bom.worksheet("Options")
+        
+        # find the headers for the columns
+        header_row = options.find("0 value").row
+        col_0 = options.find("0 value").col
+        col_1 = options.find("1 value").col
+        
+        #read cell array
+        cells = options.range(header_row+1, min(col_0, col_1), 
+                              options.row_count, max(col_0, col_1))
+    # end with
     
     # edit cell array
     for cell in cells:
@@ -223,16 +231,20 @@ def populate_online_bom(prog_dir, part_number, assy_number, revision, assy_info)
         # end if
     # end for
     
-    options.update_cells(cells)
-    
-    # open the bom sheet
-    bom = online_bom.worksheet("PCBA Components")
+    with context.trace.span('write Options', 'sheets'):
+        options.update_cells(cells)
+    # end with
     
-    # find the header row
-    header_row = bom.find("Item").row
-    col_headers = bom.row_values(header_row)
-    
-    cells = bom.range(header_row+1, 1, max(header_row + len(assy_info.designators), bom.row_count), len(col_headers))
+    with context.trace.span('read PCBA Components', 'sheets'):
+        # open the bom sheet
+        bom = online_bom.worksheet("PCBA Components")
+        
+        # find the header row
+        header_row = bom.find("Item").row
+        col_headers = bom.row_values(header_row)
+        
+        cells = bom.range(header_row+1, 1, max(header_row + len(assy_info.designators), bom.row_count), len(col_headers))
+    # end with
     
     for cell in cells:
         i = cell.col
@@ -285,13 +297,17 @@ def populate_online_bom(prog_dir, part_number, assy_number, revision, assy_info)
         # end if
     # end for
     
-    bom.update_cells(cells)
-    
-    # open the ECO sheet
-    bom = online_bom.worksheet("ECOs")    
+    with context.trace.span('write PCBA Components', 'sheets'):
+        bom.update_cells(cells)
+    # end with
     
-    # get the cells to load data into
-    cells = bom.range(1, 1, 1, 6)
+    with context.trace.span('read ECOs', 'sheets'):
+        # open the ECO sheet
+        bom = online_bom.worksheet("ECOs")    
+        
+        # get the cells to load data into
+        cells = bom.range(1, 1, 1, 6)
+    # end with
     
     # load the relevant data into the correct place
     for cell in cells:
@@ -309,7 +325,9 @@ def populate_online_bom(prog_dir, part_number, assy_number, revision, assy_info)
     # end for
     
     # upload the data
-    bom.update_cells(cells)
+    with context.trace.span('write ECOs', 'sheets'):
+        bom.update_cells(cells)
+    # end with
                             
     print('Complete!\n')
     return True
@@ -330,6 +348,8 @@ def write_cell(sheet, row, col, value):
     @param:    col            The column index within the sheet (int).
     @param:    value          What to write to the cell (string).
     """    
+    import gspread
+    
     no_write = True
     while no_write:
         # the write has not yet been successful
@@ -362,6 +382,11 @@ def get_credentials(src_dir):
                               file (string).
     @return:   (credentials)  User account credentials for google drive.
     """
+    import argparse
+    import httplib2
+    from oauth2client import client
+    from oauth2client import tools
+    from oauth2client.file import Storage
     
     # find the credentials file.
     for filename in os.listdir(src_dir):
@@ -390,7 +415,8 @@ def get_credentials(src_dir):
                                    'sheets.googleapis.com-python-quickstart.json')
     store = Storage(credential_path)
     credentials = store.get()
-    flags = argparse.ArgumentParser(parents=[tools.argparser]).parse_args()
+    # use the default flags rather than parsing this program's command line
+    flags = argparse.ArgumentParser(parents=[tools.argparser]).parse_args([])
     
     # update credentials if needed
     if not credentials or credentials.invalid:
@@ -411,12 +437,23 @@ def get_credentials(src_dir):
 
 def authorise_google_drive(src_dir):
     """
-    Authorizes access to google drive.
+    Authorizes access to google drive. The session is kept so that later
+    runs in the same process, such as those of the build daemon, reuse it 
+    until its access token expires.
 
     @param:  src_dir                The full path of the folder containing the 
                                     credentials file (string).
     @return: (pydrive.GoogleDrive)  Object for accessing the google drive.
     """    
+    drive = _get_session(authorise_google_drive.sessions, src_dir)
+    
+    if drive != None:
+        return drive
+    # end if
+    
+    from pydrive.auth import GoogleAuth
+    from pydrive.drive import GoogleDrive
+    
     # create the authorization object
     gauth = GoogleAuth()
     
@@ -429,25 +466,44 @@ def authorise_google_drive(src_dir):
     # use that authorization to open the drive
     drive = GoogleDrive(gauth)   
     
+    authorise_google_drive.sessions[src_dir] = [gauth.credentials, drive]
+    
     return drive
 # end def
 
+# the authorised drive sessions, keyed by credentials folder
+authorise_google_drive.sessions = {}
+
 
 def authorise_google_sheet(src_dir):
     """
-    Authorizes access to google sheets.
+    Authorizes access to google sheets. The session is kept so that later
+    runs in the same process reuse it until its access token expires.
 
     @param:    src_dir             The full path of the folder containing the 
                                    credentials file (string).
     @return:   (gspread.gspread)   Object for accessing google sheets.
     """    
+    gc = _get_session(authorise_google_sheet.sessions, src_dir)
+    
+    if gc != None:
+        return gc
+    # end if
+    
+    import gspread
     
     #authenticate the gspread object
-    gc = gspread.authorize(get_credentials(src_dir))
+    credentials = get_credentials(src_dir)
+    gc = gspread.authorize(credentials)
+    
+    authorise_google_sheet.sessions[src_dir] = [credentials, gc]
     
     return gc
 # end def
 
+# the authorised sheet sessions, keyed by credentials folder
+authorise_google_sheet.sessions = {}
+
 
 def open_bom(drive, gsheet, new_filename):
     """
@@ -509,6 +565,36 @@ def open_bom(drive, gsheet, new_filename):
 # end def
 
 
+def _get_session(sessions, src_dir):
+    """
+    Get a previously authorised session if its access token is still valid.
+
+    @param:    sessions       The authorised sessions, each stored with its 
+                              credentials and keyed by credentials folder 
+                              (dict).
+    @param:    src_dir        The full path of the folder containing the 
+                              credentials file (string).
+    @return:                  The session, None if it must be authorised 
+                              again.
+    """
+    session = sessions.get(src_dir)
+    
+    if session == None:
+        return None
+    # end if
+    
+    [credentials, authorised] = session
+    
+    if credentials.invalid or credentials.access_token_expired:
+        # forget it so that it is authorised again
+        del sessions[src_dir]
+        return None
+    # end if
+    
+    return authorised
+# end def
+
+
 def test():
     """
     Test code for this module.
@@ -530,7 +616,8 @@ def test():
         with assy_info:
             assy_info.list_0 = ['item 1', 'item 2']
             assy_info.list_1 = ['item 3', 'item 4']
-            populate_online_bom(prog_dir, 'Test_BOM', assy_info)
+            populate_online_bom(Altium_helpers.run_context(prog_dir), 
+                                'Test_BOM', 'Test', 'A0', assy_info)
         #end with
     # end if
     
@@ -0,0 +1,428 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Manifest.py
+
+Package that records the inputs and outputs of each pipeline stage so that a
+re-run of the Altium Documentation module can skip stages whose inputs have
+not changed.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import json
+import hashlib
+import importlib
+import threading
+
+#
+# -------
+# Constants
+
+# increment this when the format of the manifest file changes
+manifest_version = 2
+
+# size of the blocks used to hash files
+hash_block_size = 1024*1024
+
+#
+# -------
+# Classes
+
+class manifest:
+    """
+    Class to store the record of a previous run of the pipeline.
+
+    @attribute     filename:    The file the manifest is stored in (string).
+    @attribute     output_dir:  The output directory of the run (string).
+    @attribute     stages:      The record of each stage from the previous
+                                run (dict).
+    @attribute     hashes:      Known file hashes keyed by path, each a list
+                                of size, modification time and sha256 (dict).
+    """
+    def __init__(self, filename, output_dir):
+        """
+        Initialise the manifest class, loading the previous record if there
+        is one for the same output directory.
+
+        @param[in]     filename:    The file the manifest is stored in
+                                    (string).
+        @param[in]     output_dir:  The output directory of this run (string).
+        """
+        self.filename = filename
+        self.output_dir = output_dir
+        self.stages = {}
+        self.hashes = {}
+        self._new_stages = {}
+        self._lock = threading.Lock()
+
+        try:
+            with open(filename, 'r') as manifest_file:
+                data = json.load(manifest_file)
+            # end with
+
+        except (IOError, OSError, ValueError):
+            # no usable record of a previous run
+            return
+        # end try
+
+        if ((data.get('version') != manifest_version) or
+            (data.get('output_dir') != output_dir)):
+            # the record is for a different run so ignore it
+            return
+        # end if
+
+        self.stages = data.get('stages', {})
+        self.hashes = data.get('hashes', {})
+    # end def
+
+    def is_empty(self):
+        """
+        Determine if there is a record of a previous run.
+
+        @return       (bool)           True if there is no record.
+        """
+        return self.stages == {}
+    # end def
+
+    def clear(self):
+        """
+        Forget the previous run so that every stage is run again.
+        """
+        self.stages = {}
+    # end def
+
+    def is_current(self, stage, args):
+        """
+        Determine if a stage can be skipped because its inputs, arguments and
+        outputs are unchanged since it last ran.
+
+        @param[in]    stage:           The stage to check (Altium_Pipeline.stage).
+        @param[in]    args:            The arguments the stage would be called
+                                       with (list).
+        @return       (bool)           True if the stage does not need to run.
+        """
+        entry = self.stages.get(stage.name)
+
+        if entry == None:
+            return False
+        # end if
+
+        if entry['key'] != stage_key(stage, args):
+            return False
+        # end if
+
+        if entry['inputs'] != self.fingerprint_inputs(stage):
+            return False
+        # end if
+
+        return entry['outputs'] == fingerprint_outputs(stage)
+    # end def
+
+    def previous_run(self, stage):
+        """
+        Get the result and printed output of the last time a stage ran.
+
+        @param[in]    stage:           The stage (Altium_Pipeline.stage).
+        @return       (list)           The result of the stage, what it printed
+                                       and the number of warnings it logged.
+        """
+        entry = self.stages[stage.name]
+
+        return [_decode(entry['result']), entry['output'], entry['warnings']]
+    # end def
+
+    def record(self, stage, args, result, output, counts):
+        """
+        Record a stage that has just run. Stages that logged errors are not
+        recorded so that they will always be run again.
+
+        @param[in]    stage:           The stage (Altium_Pipeline.stage).
+        @param[in]    args:            The arguments the stage was called with
+                                       (list).
+        @param[in]    result:          The result of the stage.
+        @param[in]    output:          Everything the stage printed (string).
+        @param[in]    counts:          The number of errors and warnings the
+                                       stage logged (list).
+        """
+        [errors, warnings] = counts
+
+        if errors > 0:
+            with self._lock:
+                self._new_stages[stage.name] = None
+            # end with
+            return
+        # end if
+
+        entry = {'key': stage_key(stage, args),
+                 'inputs': self.fingerprint_inputs(stage),
+                 'result': _encode(result),
+                 'output': output,
+                 'warnings': warnings}
+
+        with self._lock:
+            self._new_stages[stage.name] = entry
+        # end with
+    # end def
+
+    def save(self, stages):
+        """
+        Write the manifest, recording the outputs of every stage as they are
+        at the end of the run.
+
+        @param[in]    stages:          All of the stages of the pipeline
+                                       (list of Altium_Pipeline.stage).
+        """
+        new_stages = {}
+
+        for stage in stages:
+            if stage.name in self._new_stages:
+                entry = self._new_stages[stage.name]
+
+            else:
+                # the stage was skipped so keep the previous record
+                entry = self.stages.get(stage.name)
+            # end if
+
+            if entry == None:
+                continue
+            # end if
+
+            entry['outputs'] = fingerprint_outputs(stage)
+            new_stages[stage.name] = entry
+        # end for
+
+        data = {'version': manifest_version,
+                'output_dir': self.output_dir,
+                'stages': new_stages,
+                'hashes': self.hashes}
+
+        # write to a temporary file first so an interrupted run cannot leave
+        # a half written manifest
+        temp_filename = self.filename + '.tmp'
+
+        try:
+            with open(temp_filename, 'w') as manifest_file:
+                json.dump(data, manifest_file, indent=1, sort_keys=True)
+            # end with
+
+            os.replace(temp_filename, self.filename)
+
+        except (IOError, OSError):
+            print('*** Warning: Could not save the deliverable manifest ***')
+        # end try
+
+        self.stages = new_stages
+        self._new_stages = {}
+    # end def
+
+    def fingerprint_inputs(self, stage):
+        """
+        Get the size, modification time and content hash of every file a
+        stage reads. Files the stage also writes are left out as they are
+        checked with the outputs.
+
+        @param[in]    stage:           The stage (Altium_Pipeline.stage).
+        @return       (dict)           Size, modification time and sha256 of
+                                       each input file keyed by path.
+        """
+        fingerprint = {}
+        outputs = [os.path.normcase(os.path.normpath(p)) for p in stage.outputs]
+
+        for path in stage.inputs:
+            if os.path.normcase(os.path.normpath(path)) in outputs:
+                continue
+            # end if
+
+            for filename in _list_files(path):
+                fingerprint[filename] = self.file_hash(filename)
+            # end for
+        # end for
+
+        return fingerprint
+    # end def
+
+    def file_hash(self, filename):
+        """
+        Get the size, modification time and sha256 of a file, only reading
+        the file if its size or modification time has changed since it was
+        last hashed.
+
+        @param[in]    filename:        The full path of the file (string).
+        @return       (list)           The size, modification time (ns) and
+                                       sha256 hex digest of the file.
+        """
+        try:
+            stat = os.stat(filename)
+
+        except OSError:
+            return None
+        # end try
+
+        with self._lock:
+            known = self.hashes.get(filename)
+        # end with
+
+        if ((known != None) and (known[0] == stat.st_size) and
+            (known[1] == stat.st_mtime_ns)):
+            return known
+        # end if
+
+        digest = hashlib.sha256()
+
+        with open(filename, 'rb') as hash_file:
+            block = hash_file.read(hash_block_size)
+            while block:
+                digest.update(block)
+                block = hash_file.read(hash_block_size)
+            # end while
+        # end with
+
+        known = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+
+        with self._lock:
+            self.hashes[filename] = known
+        # end with
+
+        return known
+    # end def
+# end class
+
+
+#
+# ----------------
+# Public Functions
+
+def stage_key(stage, args):
+    """
+    Describe the function and arguments of a stage so that a change to
+    either causes the stage to run again.
+
+    @param[in]    stage:           The stage (Altium_Pipeline.stage).
+    @param[in]    args:            The arguments of the stage (list).
+    @return       (string)         The description.
+    """
+    return (stage.function.__module__ + '.' + stage.function.__name__ +
+            json.dumps(_encode(args), sort_keys=True))
+# end def
+
+
+def fingerprint_outputs(stage):
+    """
+    Get the size and modification time of every file a stage has written.
+    The contents are not hashed as only a change made outside the pipeline
+    needs to be detected.
+
+    @param[in]    stage:           The stage (Altium_Pipeline.stage).
+    @return       (dict)           Size and modification time of each output
+                                   file keyed by path, None for outputs that
+                                   do not exist.
+    """
+    fingerprint = {}
+
+    for path in stage.outputs:
+        if not os.path.exists(path):
+            fingerprint[path] = None
+            continue
+        # end if
+
+        for filename in _list_files(path):
+            stat = os.stat(filename)
+            fingerprint[filename] = [stat.st_size, stat.st_mtime_ns]
+        # end for
+    # end for
+
+    return fingerprint
+# end def
+
+
+#
+# ----------------
+# Private Functions
+
+def _list_files(path):
+    """
+    List every file at a path, walking into folders.
+
+    @param[in]    path:            A file or folder (string).
+    @return       (list)           The full path of every file, sorted.
+    """
+    if os.path.isfile(path):
+        return [path]
+    # end if
+
+    file_list = []
+
+    for root, dirs, files in os.walk(path):
+        for filename in files:
+            file_list.append(os.path.join(root, filename))
+        # end for
+    # end for
+
+    return sorted(file_list)
+# end def
+
+
+def _encode(value):
+    """
+    Convert a stage result into something that can be stored as json.
+
+    @param[in]    value:           The value to convert.
+    @return                        The converted value.
+    """
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+
+    elif isinstance(value, dict):
+        return {str(k): _encode(v) for k, v in value.items()}
+
+    elif hasattr(value, '__dict__') and not callable(value):
+        # an object such as Altium_helpers.mod_date
+        return {'__class__': type(value).__module__ + '.' + type(value).__name__,
+                '__dict__': _encode(value.__dict__)}
+    # end if
+
+    return value
+# end def
+
+
+def _decode(value):
+    """
+    Convert a stored stage result back into its original form.
+
+    @param[in]    value:           The stored value.
+    @return                        The converted value.
+    """
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+
+    elif isinstance(value, dict):
+        if '__class__' in value:
+            [module_name, class_name] = value['__class__'].rsplit('.', 1)
+            object_class = getattr(importlib.import_module(module_name), class_name)
+            new_object = object_class.__new__(object_class)
+            new_object.__dict__.update(_decode(value['__dict__']))
+            return new_object
+        # end if
+
+        return {k: _decode(v) for k, v in value.items()}
+    # end if
+
+    return value
+# end def
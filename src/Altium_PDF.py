@@ -27,87 +27,63 @@ __version__ = '0.3.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
 import os
 import sys
 sys.path.insert(1, 'src\\')
+import re
 import shutil
-import PyPDF2
 import time
 import Altium_helpers
-import pdfminer
-from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
-from pdfminer.converter import TextConverter
-from pdfminer.layout import LAParams
-from pdfminer.pdfpage import PDFPage
+import Altium_Report
+import Altium_Split
 from io import StringIO
 from io import BytesIO
+# PyPDF2 and pdfminer are imported by the functions that use them so that
+# importing this module stays quick
 # end try
 
 #
-# ----------------
-# Public Functions 
+# -------
+# Constants
 
-def log_error(get = False):
-    """
-    Function to log errors within this module.
+# the fewest layers worth starting a worker process for, each layer print is 
+# large so a few are enough
+layer_pages_per_worker = 3
 
-    @param[in]    get:        True  = return no_errors without logging an error
-                              False = log an error and return nothing (bool)
-    @attribute    no_errors:  Whether there have been no errors logged
-    @return       (bool)      True  = no errors have been logged.
-                              False = Errors have been logged.
-    """  
-    
-    # determine which action to take
-    if get:
-        # return the state
-        return log_error.no_errors
-    
-    else:
-        # log an error
-        log_error.no_errors = False
-    # end if
-# end def
+# increment this when the text extracted from a pdf changes, so that text 
+# cached by an earlier version is not used
+extractor_version = 1
 
-# set the initial value
-log_error.no_errors = True
+# the most pages of a rule check report to read looking for its summary
+report_pages = 4
 
+# the summary counters of a design rule check report
+DRC_summary = ['Warnings[0-9]', 'Violations[0-9]']
 
-def log_warning(get = False):
-    """
-    Function to log warnings within this module.
+# once both are found in an electrical rule check report it has messages
+ERC_summary = ['Warning', 'Error']
 
-    @param[in] get:          True  = return no_warnings without logging a warning
-                             False = log a warning and return nothing (bool)
-    @attribute no_warnings:  Whether there have been no errors logged
-    @return    (bool)        True  = no errors have been logged.
-                             False = Errors have been logged.
-    """    
-    
-    # determine which action to take
-    if get:
-        # return the state
-        return log_warning.no_warnings
-    
-    else:
-        # log a warning
-        log_warning.no_warnings = False
-    # end if
-# end def
+# the most pages of a rule check report to read for the rules that were broken
+report_detail_pages = 50
 
-# set the inital state
-log_warning.no_warnings = True
+# the most objects printed for each rule that was broken
+report_objects = 5
 
+#
+# ----------------
+# Public Functions 
 
-def adjust_layer_filename(starting_dir):
+def adjust_layer_filename(context, starting_dir):
     """
     Function to adjust the file name of the layers pdf to the desired filename 
     from one of the possible output options.
 
+    @param[in]    context:         The state of this run 
+                                   (Altium_helpers.run_context).
     @param[in]    starting_dir:    The Altium project directory (full path) 
                                    (string).
     @return       (mod_date)       The modification of the layers pdf. 
     """      
     
     # get the root file list
-    root_file_list = os.listdir(starting_dir)
+    root_file_list = context.files.listdir(starting_dir)
     
     # Find the layers pdf file
     if (('Layers.pdf' not in root_file_list) 
@@ -115,23 +91,25 @@ def adjust_layer_filename(starting_dir):
         and ('PCB Prints.pdf' not in root_file_list)):
         # Could not find layers.pdf
         print('***  Error: No layers.pdf or PCB Prints.pdf file found  ***')
-        log_error()
+        context.log_error()
         return None
     # end if
     
     # get the modification date of the file and then re-name it if need be
     if ('Layers.pdf' in root_file_list):
-        mod_date = Altium_helpers.mod_date(os.path.getmtime(starting_dir+'\\Layers.pdf'), 
+        mod_date = Altium_helpers.mod_date(context.files.getmtime(starting_dir+'\\Layers.pdf'), 
                                            'layers.pdf')
         os.rename(starting_dir+'\\Layers.pdf', starting_dir+'\\layers.pdf')
+        context.files.invalidate(starting_dir+'\\layers.pdf')
     
     elif ('PCB Prints.pdf' in root_file_list):
-        mod_date = Altium_helpers.mod_date(os.path.getmtime(starting_dir+'\\PCB Prints.pdf'),
+        mod_date = Altium_helpers.mod_date(context.files.getmtime(starting_dir+'\\PCB Prints.pdf'),
                                            'layers.pdf')
         os.rename(starting_dir+'\\PCB Prints.pdf', starting_dir+'\\layers.pdf')
+        context.files.invalidate(starting_dir+'\\layers.pdf')
     
     else:
-        mod_date = Altium_helpers.mod_date(os.path.getmtime(starting_dir+'\\layers.pdf'),
+        mod_date = Altium_helpers.mod_date(context.files.getmtime(starting_dir+'\\layers.pdf'),
                                            'layers.pdf')
     # end if  
     
@@ -158,59 +136,95 @@ def get_filename_init():
     get_filename.SPT = False
 # end def
 
-def convert_pdf_to_txt(path):
+def convert_pdf_to_txt(context, path, maxpages = 1, stop_patterns = None,
+                       layout = True):
     """
     Function to extract the text from a pdf that contains embedded text.
+    Pages are read in order until maxpages have been read or every stop
+    pattern has been found, so a report is not read past its summary. Pages
+    in the run's text cache are not read again.
     
     Based on Chianti5's code from:
     stackoverflow.com/questions/40031622/pdfminer-error-for-one-type-of-pdfs-
          too-many-vluae-to-unpack
 
+    @param[in]    context:       The state of this run 
+                                 (Altium_helpers.run_context).
     @param[in]    path:          The file path of the pdf to read
                                  (string).
+    @param[in]    maxpages:      The most pages to read, 0 for all of them
+                                 (int).
+    @param[in]    stop_patterns: Stop after the page on which all of these 
+                                 have been found in the text read so far with
+                                 its whitespace removed, None to read up to 
+                                 maxpages (list of regular expressions).
+    @param[in]    layout:        False to skip the layout analysis, which is 
+                                 most of the time taken but is needed to keep
+                                 the words of a line together (bool).
     @return       (string)       The extracted text. 
     """ 
-    
-    # create a PDF resource manager object that stores shared resources
-    rsrcmgr = PDFResourceManager()
-    retstr = BytesIO()
     codec = 'utf-8'
-    
-    # set parameters for analysis
-    laparams = LAParams()
-    device = TextConverter(rsrcmgr, retstr, codec=codec, laparams=laparams)
-    fp = open(path, 'rb')
-    interpreter = PDFPageInterpreter(rsrcmgr, device)
-    password = ""
-    maxpages = 0
-    caching = True
-    pagenos=set()
+    remaining = [re.compile(pattern) for pattern in (stop_patterns or [])]
+    searched = ''
     text = []
-
-    # process each page in the pdf
-    for page in PDFPage.get_pages(fp, pagenos, maxpages=maxpages, \
-                                  password=password,caching=caching, \
-                                  check_extractable=True):
-        interpreter.process_page(page)
-        # extract the text
-        text.append(retstr.getvalue())
-    # end
-
-    # close all files
-    fp.close()
-    device.close()
-    retstr.close()
+    
+    # the pages read on a previous run, if the pdf has not changed
+    cached = {}
+    page_count = None
+    found = {'pages': {}, 'page_count': None}
+    
+    with context.trace.span('extract ' + os.path.basename(path), 'pdf') as event:
+        event.add_bytes(os.path.getsize(path))
+        
+        if context.text_cache != None:
+            digest = context.text_cache.digest(path)
+            extractor = _extractor(layout)
+            [cached, page_count] = context.text_cache.get(digest, extractor)
+        # end if
+        
+        pages = _read_pages(path, maxpages, layout, cached, page_count, found)
+        
+        # read each page in the pdf
+        for page_text in pages:
+            text.append(page_text)
+            
+            if stop_patterns == None:
+                continue
+            # end if
+            
+            # search the text so far, as a pattern may span a page break
+            searched += "".join(page_text.decode(codec, 'ignore').split())
+            remaining = [pattern for pattern in remaining 
+                         if pattern.search(searched) == None]
+            
+            if remaining == []:
+                break
+            # end if
+        # end for
+        
+        # close the pdf if it was opened
+        pages.close()
+        
+        event.args['cached_pages'] = len(text) - len(found['pages'])
+        
+        if (context.text_cache != None) and (found['pages'] != {}):
+            context.text_cache.put(digest, extractor, found['pages'], 
+                                   found['page_count'])
+        # end if
+    # end with
     
     # return the text
-    return text[0]
+    return b''.join(text)
 # end
 
-def manage_Altium_PDFs(pdf_dir, output_pdf_dir, num_layers, 
+def manage_Altium_PDFs(context, pdf_dir, output_pdf_dir, num_layers, 
                        silence = True):
     """
     Analyse the output PDFs from Altium and then extract the text from 
     them and split and rename the pages accordingly.
 
+    @param[in]  context:            The state of this run 
+                                    (Altium_helpers.run_context).
     @param[in]  pdf_dir:            The location of the pdf files (full path) 
                                     (string).  
     @param[in]  output_pdf_dir:     The location to move the pdfs to (full path) 
@@ -224,91 +238,92 @@ def manage_Altium_PDFs(pdf_dir, output_pdf_dir, num_layers,
     # correct the filename of the layers pdf if required
     modified_dates = []
     
-    file_list = os.listdir(pdf_dir)
+    file_list = context.files.listdir(pdf_dir)
     
     print("Moving PDF documents")
     
     layer_count = 0
     
+    [layers_filename, pdf_copies] = find_Altium_PDFs(context, pdf_dir)
+    
     for filename in file_list:
-        modified_dates.append(Altium_helpers.mod_date(os.path.getmtime(pdf_dir + '\\' + filename), 
+        modified_dates.append(Altium_helpers.mod_date(context.files.getmtime(pdf_dir + '\\' + filename), 
                                                               filename))        
-        if filename.startswith("layers."):
+        if filename == layers_filename:
             # split the layers file into its pages and write them to the output
-            with open(pdf_dir + '\\layers.pdf', "rb") as layers_file:
-                layers_pdf = PyPDF2.PdfFileReader(layers_file)                
-
-                # write each page to a separate pdf file
-                for page in range(layers_pdf.numPages):
-                    # open the output stream
-                    output = PyPDF2.PdfFileWriter()
-
-                    # add the layers page to the output stream.
-                    output.addPage(layers_pdf.getPage(page))
-                    # format the filename 
-                    file_name = output_pdf_dir + '\\ART%02d.pdf' % (page+1)
-
-                    with open(file_name, "wb") as outputStream:
-                        # write the page
-                        output.write(outputStream)
-                        layer_count += 1
-                    # end with                     
-                # end for
-        # end with            
+            with context.trace.span('split layers.pdf', 'pdf') as event:
+                event.add_bytes(os.path.getsize(pdf_dir + '\\layers.pdf'))
+                
+                # each layer is written to a separate pdf file with only the
+                # resources it uses
+                split = Altium_Split.split_pdf(pdf_dir + '\\layers.pdf',
+                                               output_pdf_dir + '\\ART%02d.pdf',
+                                               workers = None, prune = True,
+                                               per_worker = layer_pages_per_worker)
+                layer_count = split.pages
+                
+                event.args['workers'] = split.workers
+                event.args['bytes_out'] = split.bytes_out
+            # end with
             
-        elif (('Check' not in filename) and ('layer' not in filename) and ('MOD' not in filename)):
-            shutil.copy(pdf_dir+'\\'+ filename, output_pdf_dir + '//' + filename)
+            print('\tSplit layers.pdf into ' + str(split.pages) + ' layers in ' +
+                  '%.1fs' % split.elapsed + ', ' + 
+                  '%.2f' % split.ratio() + ' times its size')
+            
+        elif filename in pdf_copies:
+            Altium_helpers.copy_file(context, pdf_dir+'\\'+ filename, 
+                                     output_pdf_dir + '//' + filename, shutil.copy)
         # end if
     # end for
     
     # check outputs
     # get a list of filenames without extensions
-    file_list = [f_name.split('.')[0] for f_name in os.listdir(pdf_dir)]
+    file_list = [f_name.split('.')[0] for f_name in context.files.listdir(pdf_dir)]
     
     # Generate warnings for pecuiliar outputs
     if (layer_count != num_layers):
         print('\t*** WARNING wrong number of layers printed ***')
-        log_warning()
+        context.log_warning()
     # end
     if ("MECHDWG" not in file_list):
         print('\t*** WARNING No MECHDWG file output ***')
-        log_warning()
+        context.log_warning()
     # end
     if ("ADB0230" not in file_list):
         print('\t*** WARNING No ADB0230 file output ***')
-        log_warning()
+        context.log_warning()
     # end
     if ("ADT0127" not in file_list):
         print('\t*** WARNING No ADT0127 file output ***')
-        log_warning()
+        context.log_warning()
     # end
     if ("SST0126" not in file_list):
         print('\t*** WARNING No SST0126 file output ***')
-        log_warning()
+        context.log_warning()
     # end
     if ("SMT0125" not in file_list):
         print('\t*** WARNING No SMT0125 file output ***')
-        log_warning()
+        context.log_warning()
     # end
     if ("SSB0229" not in file_list):
         print('\t*** WARNING No SSB0229 file output ***')
-        log_warning()
+        context.log_warning()
     # end
     if ("SMB0223" not in file_list):
         print('\t*** WARNING No SMB0223 file output ***')
-        log_warning()
+        context.log_warning()
     # end
     if ("DD0124" not in file_list):
         print('\t*** WARNING No DD0124 file output ***')
-        log_warning()
+        context.log_warning()
     # end
     if ("SPB0223" not in file_list): 
         print('\t*** WARNING No SPB0223 file output ***')
-        log_warning()
+        context.log_warning()
     # end
     if ("SPT0123" not in file_list):
         print('\t*** WARNING No SPT0123 file output ***')
-        log_warning()
+        context.log_warning()
     # end      
 
     print('Complete!\n')
@@ -316,48 +331,81 @@ def manage_Altium_PDFs(pdf_dir, output_pdf_dir, num_layers,
     return modified_dates
 # end def  
     
-def check_DRC(pdf_dir):
+def find_Altium_PDFs(context, pdf_dir):
+    """
+    Find the layers document, which is split into a page per layer, and the
+    PDFs that are delivered as they are.
+
+    @param[in]  context:            The state of this run 
+                                    (Altium_helpers.run_context).
+    @param[in]  pdf_dir:            The location of the pdf files (full path) 
+                                    (string).  
+    @return     (string)            The filename of the layers document, None
+                                    if there is none.
+    @return     (list of strings)   The filenames of the PDFs to copy.
+    """
+    layers_filename = None
+    pdf_copies = []
+    
+    for filename in context.files.listdir(pdf_dir):
+        if filename.startswith("layers."):
+            layers_filename = filename
+            
+        elif (('Check' not in filename) and ('layer' not in filename) and ('MOD' not in filename)):
+            pdf_copies.append(filename)
+        # end if
+    # end for
+    
+    return layers_filename, pdf_copies
+# end def
+
+
+def check_DRC(context, pdf_dir, output_dir = None):
     """
     Checks the design rule check output PDF to see if there are any errors
 
+    @param:    context        The state of this run 
+                              (Altium_helpers.run_context).
     @param:    pdf_dir        The full path of the Altium pdf Folder (string).
+    @param:    output_dir     The packaging outputs directory to save what the
+                              check found in, None to not save it (string).
     @return:   (mod_date)     The modification date of the Design Rule Check
     """  
     print('\nChecking the Design Rule Check...')
     
-    DRC_text = ''
-    
-    if os.path.isdir(pdf_dir):
+    if context.files.isdir(pdf_dir):
         # get the file list of the root directory
-        file_list = os.listdir(pdf_dir)   
+        file_list = context.files.listdir(pdf_dir)   
         
         if 'Design Rules Check.PDF' not in file_list:
             print('*** Error: No design rule check has been completed ***')
-            log_error()
+            context.log_error()
             return None
         # end if
         
         # get the modification date of the file
-        DRC_date = Altium_helpers.mod_date(os.path.getmtime(pdf_dir+'\\Design Rules Check.PDF'), 
+        DRC_date = Altium_helpers.mod_date(context.files.getmtime(pdf_dir+'\\Design Rules Check.PDF'), 
                                            'Design Rules Check.PDF')
         
-        # extract text and remove whitespace
-        DRC_text = "".join(str(convert_pdf_to_txt(pdf_dir+'\\Design Rules Check.PDF')).split())        
+        # the counters are on the first page, so a clean check is not read
+        # any further
+        [DRC_text, pages] = _report_text(context, pdf_dir+'\\Design Rules Check.PDF',
+                                         report_pages, DRC_summary)
+        report = Altium_Report.parse_DRC(DRC_text)
+        
+        if report.complete and ((report.warnings + report.violations) > 0):
+            # read the rest for the rules that were broken and by what
+            [DRC_text, pages] = _report_text(context, pdf_dir+'\\Design Rules Check.PDF',
+                                             report_detail_pages)
+            report = Altium_Report.parse_DRC(DRC_text)
+        # end if
         
     else:
         print('***  Error: Folder structure not compliant with current Outjob file   ***\n\n')
         return None     
     # end if
     
-    if 'Warnings0' not in DRC_text:
-        print('*** Warning: Warnings were raised during Altium DRC ***')
-        log_warning()
-    # end if
-    
-    if 'Violations0' not in DRC_text:
-        print('*** Warning: Rule Violations were found during Altium DRC ***')
-        log_warning()
-    # end if
+    _report_check(context, report, output_dir, Altium_Report.DRC_filename)
     
     print('Complete!')
     
@@ -365,48 +413,61 @@ def check_DRC(pdf_dir):
 # end def
 
 
-def check_ERC(pdf_dir):
+def check_ERC(context, pdf_dir, output_dir = None):
     """
     Checks the electrical rule check output PDF to see if there are any errors
 
+    @param:    context        The state of this run 
+                              (Altium_helpers.run_context).
     @param:    pdf_dir        The full path of the Altium pdf Folder (string).
+    @param:    output_dir     The packaging outputs directory to save what the
+                              check found in, None to not save it (string).
     @return:   (mod_date)     The modification date of the Electrical Rule Check
     """  
     print('\nChecking the Electrical Rule Check...')
-    DRC_text = ''
     
-    if os.path.isdir(pdf_dir):
+    if context.files.isdir(pdf_dir):
         # get the file list of the root directory
-        file_list = os.listdir(pdf_dir)   
+        file_list = context.files.listdir(pdf_dir)   
         
         if 'Electrical Rules Check.PDF' not in file_list:
             print('*** Error: No electrical rule check has been completed ***')
-            log_error()
+            context.log_error()
             return None
         # end if
         
         # get the modification date of the file
-        ERC_date = Altium_helpers.mod_date(os.path.getmtime(pdf_dir +'\\Electrical Rules Check.PDF'), 
+        ERC_date = Altium_helpers.mod_date(context.files.getmtime(pdf_dir +'\\Electrical Rules Check.PDF'), 
                                            'Electrical Rules Check.PDF')
         
-        # extract text and remove whitespace
-        ERC_text = "".join(str(convert_pdf_to_txt(pdf_dir+'\\Electrical Rules Check.PDF')).split())       
+        # a clean check names neither class, so only the words are looked 
+        # for and the layout analysis is not needed
+        [ERC_text, pages] = _report_text(context, pdf_dir+'\\Electrical Rules Check.PDF',
+                                         report_pages, ERC_summary, layout = False)
+        
+        if any(re.search(pattern, "".join(ERC_text.split())) != None 
+               for pattern in ERC_summary):
+            # every message is a row of the report, so read it with its lines
+            # kept together, and a page past the most read to tell if there
+            # are more
+            [ERC_text, pages] = _report_text(context, pdf_dir+'\\Electrical Rules Check.PDF',
+                                             report_detail_pages + 1)
+        # end if
+        
+        report = Altium_Report.parse_ERC(ERC_text)
+        
+        if pages > report_detail_pages:
+            # the rows on the pages not read are not known
+            report.complete = False
+        # end if
         
     else:
         print('***  Error: Folder structure not compliant with current Outjob file   ***\n\n')
-        log_error()
+        context.log_error()
         return None  
     # end if
     
-    if 'Warning' in ERC_text:
-        print('*** Warning: Warnings were raised during Altium ERC ***')
-        log_warning()
-    # end if
-    
-    if 'Error' in ERC_text:
-        print('*** Warning: Rule Violations were found during Altium ERC ***')
-        log_warning()
-    # end if
+    _report_check(context, report, output_dir, Altium_Report.ERC_filename)
     
     print('Complete!\n')
     
@@ -419,16 +480,225 @@ def check_ERC(pdf_dir):
 # Private Functions
     
 
+def _read_pages(path, maxpages, layout, cached, page_count, found):
+    """
+    Generator of the text of each page of a pdf, from the cache where it can
+    be and otherwise from the pdf.
+    
+    Based on Chianti5's code from:
+    stackoverflow.com/questions/40031622/pdfminer-error-for-one-type-of-pdfs-
+         too-many-vluae-to-unpack
+
+    @param[in]    path:          The file path of the pdf to read (string).
+    @param[in]    maxpages:      The most pages to read, 0 for all of them
+                                 (int).
+    @param[in]    layout:        False to skip the layout analysis (bool).
+    @param[in]    cached:        The text of the pages read before keyed by
+                                 page number (dict of bytes).
+    @param[in]    page_count:    The number of pages in the pdf, None if it is
+                                 not known (int).
+    @param[out]   found:         The text of the pages read from the pdf is
+                                 added to 'pages', and the number of pages 
+                                 to 'page_count' if the last was read (dict).
+    @return       (bytes)        The text of each page in turn.
+    """
+    index = 0
+    
+    # the pages read before, for as long as they go
+    while (index in cached) and ((maxpages == 0) or (index < maxpages)):
+        yield cached[index]
+        index += 1
+    # end while
+    
+    if (((page_count != None) and (index >= page_count)) or 
+        ((maxpages != 0) and (index >= maxpages))):
+        return
+    # end if
+    
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfpage import PDFPage
+    
+    # create a PDF resource manager object that stores shared resources
+    rsrcmgr = PDFResourceManager()
+    retstr = BytesIO()
+    codec = 'utf-8'
+    
+    # set parameters for analysis
+    laparams = None
+    
+    if layout:
+        laparams = LAParams()
+    # end if
+    
+    device = TextConverter(rsrcmgr, retstr, codec=codec, laparams=laparams)
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    password = ""
+    caching = True
+    pagenos=set()
+    number = -1
+    
+    try:
+        with open(path, 'rb') as fp:
+            for [number, page] in enumerate(PDFPage.get_pages(fp, pagenos, maxpages=maxpages, \
+                                                              password=password,caching=caching, \
+                                                              check_extractable=True)):
+                if number < index:
+                    # read from the cache already
+                    continue
+                # end if
+                
+                page_start = retstr.tell()
+                interpreter.process_page(page)
+                
+                # extract the text
+                with retstr.getbuffer() as buffer:
+                    page_text = buffer[page_start:].tobytes()
+                # end with
+                
+                found['pages'][number] = page_text
+                yield page_text
+            # end for
+        # end with
+        
+        # every page has been read unless it stopped at maxpages
+        if (maxpages == 0) or (number + 1 < maxpages):
+            found['page_count'] = number + 1
+        # end if
+        
+    finally:
+        # close all files
+        device.close()
+        retstr.close()
+    # end try
+# end def
+
+
+def _extractor(layout):
+    """
+    Get what the text of a pdf was extracted with, so that text extracted 
+    another way is not taken from the cache.
+
+    @param[in]    layout:        Whether the layout was analysed (bool).
+    @return       (string)       The extractor and its settings.
+    """
+    import pdfminer
+    
+    return ('pdfminer ' + str(getattr(pdfminer, '__version__', '')) + ' ' + 
+            str(extractor_version) + (' layout' if layout else ' text'))
+# end def
+
+
+def _report_text(context, path, maxpages, stop_patterns = None, layout = True):
+    """
+    Get the text of a rule check report, and how many pages were read.
+
+    @param[in]    context:         The state of this run 
+                                   (Altium_helpers.run_context).
+    @param[in]    path:            The report (full path) (string).
+    @param[in]    maxpages:        The most pages to read (int).
+    @param[in]    stop_patterns:   Stop once these have been found, see 
+                                   convert_pdf_to_txt (list of strings).
+    @param[in]    layout:          False to skip the layout analysis (bool).
+    @return       (string)         The text.
+    @return       (int)            The number of pages read.
+    """
+    text = convert_pdf_to_txt(context, path, maxpages = maxpages,
+                              stop_patterns = stop_patterns, layout = layout)
+    
+    # every page ends with a form feed
+    return text.decode('utf-8', 'ignore'), text.count(b'\x0c')
+# end def
+
+
+def _report_check(context, report, output_dir, filename):
+    """
+    Warn about each rule broken in a rule check, and how that has changed 
+    since the previous revision, then save what the check found.
+
+    @param[in]    context:         The state of this run 
+                                   (Altium_helpers.run_context).
+    @param[in]    report:          What the check found 
+                                   (Altium_Report.check_report).
+    @param[in]    output_dir:      The packaging outputs directory, None to 
+                                   not save or compare the report (string).
+    @param[in]    filename:        The file to save the report as (string).
+    """
+    check = report.kind
+    
+    if not report.complete:
+        print('*** Warning: The Altium ' + check + ' report could not be read '
+              'in full, so please review it ***')
+        context.log_warning()
+        
+    elif report.broken() == []:
+        if report.warnings > 0:
+            print('*** Warning: ' + str(report.warnings) + 
+                  ' warnings were raised during Altium ' + check + ' ***')
+            context.log_warning()
+        # end if
+        
+        if report.violations > 0:
+            print('*** Warning: ' + str(report.violations) + 
+                  ' rule violations were found during Altium ' + check + ' ***')
+            context.log_warning()
+        # end if
+    # end if
+    
+    for rule in report.broken():
+        print('*** Warning: ' + rule.severity.capitalize() + ' x' + 
+              str(rule.count) + ' during Altium ' + check + ': ' + rule.name + ' ***')
+        
+        for description in rule.objects[:report_objects]:
+            print('\t' + description)
+        # end for
+        
+        if rule.count > report_objects:
+            print('\t... and ' + str(rule.count - report_objects) + ' more')
+        # end if
+        
+        context.log_warning()
+    # end for
+    
+    if output_dir == None:
+        return
+    # end if
+    
+    [previous, archive] = Altium_Report.read_previous_report(context.starting_dir,
+                                                             output_dir, filename)
+    
+    if previous != None:
+        changes = Altium_Report.diff_reports(previous, report)
+        
+        print('\tCompared with ' + os.path.basename(archive) + ': ' + 
+              str(len(changes['added'])) + ' rules newly broken, ' + 
+              str(len(changes['resolved'])) + ' resolved, ' + 
+              str(len(changes['increased'])) + ' broken more often, ' + 
+              str(len(changes['decreased'])) + ' less often')
+        
+        for entry in changes['added'] + changes['increased']:
+            print('\t\tNew: ' + entry['name'] + ' (' + str(entry['previous_count']) + 
+                  ' -> ' + str(entry['count']) + ')')
+        # end for
+    # end if
+    
+    Altium_Report.save_report(report, output_dir + '\\' + filename)
+# end def
+
+
 def test():
     """
     Test code for this module.
     """
     
+    context = Altium_helpers.run_context(os.getcwd())
+    
     if not Altium_helpers.clear_output(os.getcwd() + '\\test folder', False):
-        log_error()
+        context.log_error()
     # end if
     
-    print [log_error(get=True), log_warning(get=True)]
+    print([context.log_error(get=True), context.log_warning(get=True)])
     
     #no_errors = True
     #no_warnings = True
@@ -0,0 +1,610 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Pipeline.py
+
+Package that schedules the stages of the Altium Documentation module so that
+stages which do not depend on each other can run at the same time.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import sys
+import io
+import time
+import shutil
+import concurrent.futures
+sys.path.insert(1, 'src\\')
+import Altium_helpers
+
+#
+# -------
+# Classes
+
+class stage_result:
+    """
+    Placeholder for a stage argument that is the result of another stage.
+
+    @attribute     name:     The name of the stage that produces the result
+                             (string).
+    @attribute     index:    The index into the result if the stage returns a
+                             list, None to use the whole result (int).
+    """
+    def __init__(self, name, index = None):
+        """
+        Initialise the stage_result class
+
+        @param[in]     name:     The name of the stage that produces the
+                                 result (string).
+        @param[in]     index:    The index into the result (int).
+        """
+        self.name = name
+        self.index = index
+    # end def
+# end class
+
+
+class stage:
+    """
+    Class to store a single stage of the deliverable pipeline.
+
+    @attribute     name:       The unique name of the stage (string).
+    @attribute     function:   The function that performs the stage, it is
+                               called with the run context followed by args.
+    @attribute     args:       The arguments to call the function with, any
+                               stage_result is replaced by the result of that
+                               stage (list).
+    @attribute     inputs:     The files or folders the stage reads
+                               (list of strings).
+    @attribute     outputs:    The files or folders the stage writes
+                               (list of strings).
+    @attribute     requires:   The names of stages that must be complete
+                               before this one starts (list of strings).
+    @attribute     cpu_bound:  Whether the stage should run in a separate
+                               process rather than a thread (bool).
+    """
+    def __init__(self, name, function, args = [], inputs = [], outputs = [],
+                 requires = [], cpu_bound = False):
+        """
+        Initialise the stage class
+
+        @param[in]     name:       The unique name of the stage (string).
+        @param[in]     function:   The function that performs the stage.
+        @param[in]     args:       The arguments to call the function with
+                                   (list).
+        @param[in]     inputs:     The files or folders the stage reads
+                                   (list of strings).
+        @param[in]     outputs:    The files or folders the stage writes
+                                   (list of strings).
+        @param[in]     requires:   Stages that must run first (list of strings).
+        @param[in]     cpu_bound:  Run the stage in a separate process (bool).
+                                   Changes the function makes to the run
+                                   context, other than logged errors and
+                                   warnings, are lost.
+        """
+        self.name = name
+        self.function = function
+        self.args = list(args)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.requires = list(requires)
+        self.cpu_bound = cpu_bound
+    # end def
+# end class
+
+
+class _stage_output(object):
+    """
+    Stream that passes everything a stage prints through to the terminal 
+    while also keeping a copy of it.
+
+    @attribute     terminal:   The stream the stage would have printed to.
+    @attribute     buffer:     The copy of what the stage printed 
+                               (io.StringIO).
+    """
+    def __init__(self, terminal):
+        """
+        Initialise the _stage_output class
+
+        @param[in]     terminal:   The stream the stage would have printed 
+                                   to.
+        """
+        self.terminal = terminal
+        self.buffer = io.StringIO()
+    # end def
+
+    def write(self, message):
+        self.terminal.write(message)
+        self.buffer.write(message)
+    # end def
+
+    def flush(self):
+        self.terminal.flush()
+    # end def
+# end class
+
+
+#
+# ----------------
+# Public Functions
+
+def find_dependencies(stages):
+    """
+    Determine which stages each stage must wait for. A stage depends on any
+    stage it explicitly requires, any stage whose result it uses as an
+    argument and any stage that writes to one of its inputs.
+
+    @param[in]    stages:          The stages of the pipeline (list of stage).
+    @return       (dict)           The set of stage names each stage depends
+                                   on, keyed by stage name.
+    """
+
+    # check that the stage names are unique
+    names = [s.name for s in stages]
+    if len(set(names)) != len(names):
+        raise ValueError('Pipeline stage names must be unique')
+    # end if
+
+    dependencies = {}
+
+    for this_stage in stages:
+        depends = set(this_stage.requires)
+
+        # stages whose results are used as arguments
+        for arg in this_stage.args:
+            if isinstance(arg, stage_result):
+                depends.add(arg.name)
+            # end if
+        # end for
+
+        # stages that write something this stage reads
+        for other in stages:
+            if other is this_stage:
+                continue
+            # end if
+
+            for output_path in other.outputs:
+                if any(_paths_overlap(output_path, p) for p in this_stage.inputs):
+                    depends.add(other.name)
+                # end if
+            # end for
+        # end for
+
+        for name in depends:
+            if name not in names:
+                raise ValueError('Stage ' + this_stage.name +
+                                 ' depends on unknown stage ' + name)
+            # end if
+        # end for
+
+        dependencies[this_stage.name] = depends
+    # end for
+
+    # a stage that reads and writes the same file would depend on another
+    # stage that does the same, so reject any cycles
+    _check_for_cycles(dependencies)
+
+    return dependencies
+# end def
+
+
+def run_stages(stages, context, max_workers = None, processes = True, 
+               manifest = None, history = None):
+    """
+    Run the stages of the pipeline, starting each one as soon as all of the
+    stages it depends on are complete.
+
+    @param[in]    stages:          The stages of the pipeline (list of stage).
+    @param[in]    context:         The state of this run, passed to every
+                                   stage (Altium_helpers.run_context).
+    @param[in]    max_workers:     The maximum number of stages to run at
+                                   once, None to choose from the CPU count
+                                   (int).
+    @param[in]    processes:       False to run cpu bound stages in threads as
+                                   well (bool).
+    @param[in]    manifest:        The record of the previous run, stages whose
+                                   inputs are unchanged are skipped and their
+                                   previous results reused. None to run every
+                                   stage (Altium_Manifest.manifest).
+    @param[in]    history:         The record of how long stages take, each
+                                   stage that runs is added to it. None to not
+                                   record anything (Altium_Plan.history).
+    @return       (dict)           The result of each stage keyed by stage name.
+    """
+
+    dependencies = find_dependencies(stages)
+    stage_dict = {s.name: s for s in stages}
+
+    if max_workers == None:
+        max_workers = min(8, (os.cpu_count() or 1) + 4)
+    # end if
+
+    results = {}
+    stage_args = {}
+    rerun = set()
+    pending = [s.name for s in stages]
+    running = {}
+    first_exception = None
+
+    thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers)
+    process_pool = None
+
+    # stages print to wherever this thread prints to
+    terminal = Altium_helpers.current_output()
+
+    try:
+        while pending or running:
+            # start every stage whose dependencies are complete
+            if first_exception == None:
+                for name in list(pending):
+                    if not dependencies[name].issubset(results.keys()):
+                        continue
+                    # end if
+
+                    this_stage = stage_dict[name]
+                    args = [_resolve_arg(a, results) for a in this_stage.args]
+                    stage_args[name] = args
+                    pending.remove(name)
+
+                    if ((manifest != None) and 
+                        not (dependencies[name] & rerun) and
+                        manifest.is_current(this_stage, args)):
+                        # nothing has changed so reuse the previous result
+                        with context.trace.span(name, 'stage', skipped = True):
+                            results[name] = _replay_previous_run(this_stage, context,
+                                                                 manifest)
+                        # end with
+                        continue
+                    # end if
+
+                    rerun.add(name)
+
+                    if manifest != None:
+                        # remove what the stage produced last time
+                        _clear_outputs(this_stage, stages)
+                    # end if
+
+                    if this_stage.cpu_bound and processes:
+                        if process_pool == None:
+                            process_pool = concurrent.futures.ProcessPoolExecutor(
+                                max(1, min(max_workers, os.cpu_count() or 1)))
+                        # end if
+                        future = process_pool.submit(_process_entry, name,
+                                                     this_stage.function,
+                                                     context, args)
+
+                    else:
+                        future = thread_pool.submit(_thread_entry, terminal, name,
+                                                    this_stage.function,
+                                                    context, args)
+                    # end if
+
+                    running[future] = name
+                # end for
+
+            else:
+                # do not start anything new once a stage has failed
+                pending = []
+            # end if
+
+            if not running:
+                if pending:
+                    # stages were skipped so check again for ready stages
+                    continue
+                # end if
+                break
+            # end if
+
+            # wait for at least one stage to finish
+            done, not_done = concurrent.futures.wait(
+                list(running), return_when=concurrent.futures.FIRST_COMPLETED)
+
+            for future in done:
+                name = running.pop(future)
+
+                try:
+                    [result, output, counts, events, elapsed] = future.result()
+
+                except Exception as e:
+                    print('*** Error: pipeline stage ' + name + ' failed ***')
+                    if first_exception == None:
+                        first_exception = e
+                    # end if
+                    continue
+                # end try
+
+                if events != None:
+                    # the stage ran in another process
+                    _replay_process_state(context, terminal, output, counts, events)
+                # end if
+
+                if manifest != None:
+                    manifest.record(stage_dict[name], stage_args[name], 
+                                    result, output, counts)
+                # end if
+
+                if history != None:
+                    history.record_stage(stage_dict[name], elapsed)
+                # end if
+
+                results[name] = result
+            # end for
+        # end while
+
+    finally:
+        thread_pool.shutdown()
+        if process_pool != None:
+            process_pool.shutdown()
+        # end if
+    # end try
+
+    if first_exception != None:
+        raise first_exception
+    # end if
+
+    return results
+# end def
+
+
+#
+# ----------------
+# Private Functions
+
+def _paths_overlap(path_a, path_b):
+    """
+    Determine if two paths refer to the same file or one contains the other.
+
+    @param[in]    path_a:          The first path (string).
+    @param[in]    path_b:          The second path (string).
+    @return       (bool)           True if the paths overlap.
+    """
+    path_a = os.path.normcase(os.path.normpath(path_a))
+    path_b = os.path.normcase(os.path.normpath(path_b))
+
+    if path_a == path_b:
+        return True
+    # end if
+
+    return (path_a.startswith(path_b.rstrip(os.sep) + os.sep) or
+            path_b.startswith(path_a.rstrip(os.sep) + os.sep))
+# end def
+
+
+def _check_for_cycles(dependencies):
+    """
+    Raise an exception if the stage dependencies contain a cycle.
+
+    @param[in]    dependencies:    The dependencies of each stage (dict).
+    """
+    remaining = {name: set(depends) for name, depends in dependencies.items()}
+
+    while remaining:
+        ready = [name for name, depends in remaining.items() if not depends]
+
+        if not ready:
+            raise ValueError('Pipeline stages have circular dependencies: ' +
+                             ', '.join(sorted(remaining.keys())))
+        # end if
+
+        for name in ready:
+            del remaining[name]
+        # end for
+
+        for depends in remaining.values():
+            depends.difference_update(ready)
+        # end for
+    # end while
+# end def
+
+
+def _resolve_arg(arg, results):
+    """
+    Replace a stage_result placeholder with the result it refers to.
+
+    @param[in]    arg:             The stage argument.
+    @param[in]    results:         The results of the completed stages (dict).
+    @return                        The argument to pass to the stage function.
+    """
+    if not isinstance(arg, stage_result):
+        return arg
+    # end if
+
+    result = results[arg.name]
+
+    if arg.index == None:
+        return result
+
+    elif result == None:
+        # the stage failed to produce a result
+        return None
+    # end if
+
+    return result[arg.index]
+# end def
+
+
+def _thread_entry(terminal, name, function, context, args):
+    """
+    Run a stage in a worker thread, capturing everything it prints.
+
+    @param[in]    terminal:        The stream to pass the output on to.
+    @param[in]    name:            The name of the stage (string).
+    @param[in]    function:        The stage function.
+    @param[in]    context:         The state of this run
+                                   (Altium_helpers.run_context).
+    @param[in]    args:            The arguments to call it with (list).
+    @return       (tuple)          The stage result, the printed output, the
+                                   number of errors and warnings logged, None
+                                   as the run context is shared and the time 
+                                   taken in seconds.
+    """
+    capture = _stage_output(terminal)
+    previous = Altium_helpers.route_output(capture)
+    start_time = time.time()
+
+    # other stages log to the same context at the same time
+    context.start_stage_log()
+
+    try:
+        with context.trace.span(name, 'stage'):
+            result = function(context, *args)
+        # end with
+
+    finally:
+        Altium_helpers.route_output(previous)
+        counts = context.stop_stage_log()
+    # end try
+
+    return result, capture.buffer.getvalue(), counts, None, time.time() - start_time
+# end def
+
+
+def _process_entry(name, function, context, args):
+    """
+    Run a stage in a worker process, capturing everything it prints and the
+    errors, warnings and trace events it logs so that they can be reproduced 
+    in the main process.
+
+    @param[in]    name:            The name of the stage (string).
+    @param[in]    function:        The stage function.
+    @param[in]    context:         A copy of the state of this run
+                                   (Altium_helpers.run_context).
+    @param[in]    args:            The arguments to call it with (list).
+    @return       (tuple)          The stage result, the printed output, the
+                                   number of errors and warnings logged, the
+                                   trace events recorded and the time taken 
+                                   in seconds.
+    """
+    output = io.StringIO()
+    previous = Altium_helpers.route_output(output)
+    start_time = time.time()
+
+    # only report what this stage logs
+    context.start_stage_log()
+
+    try:
+        with context.trace.span(name, 'stage'):
+            result = function(context, *args)
+        # end with
+
+    finally:
+        Altium_helpers.route_output(previous)
+        counts = context.stop_stage_log()
+    # end try
+
+    return (result, output.getvalue(), counts, context.trace.events, 
+            time.time() - start_time)
+# end def
+
+
+def _replay_process_state(context, terminal, output, counts, events):
+    """
+    Reproduce the output, errors, warnings and trace events of a stage that 
+    ran in a worker process.
+
+    @param[in]    context:         The state of this run
+                                   (Altium_helpers.run_context).
+    @param[in]    terminal:        The stream to print the output to.
+    @param[in]    output:          What the stage printed (string).
+    @param[in]    counts:          The number of errors and warnings logged 
+                                   (list).
+    @param[in]    events:          The trace events recorded (list).
+    """
+    terminal.write(output)
+
+    context.trace.add_events(events)
+
+    [errors, warnings] = counts
+
+    for i in range(errors):
+        context.log_error()
+    # end for
+
+    for i in range(warnings):
+        context.log_warning()
+    # end for
+# end def
+
+
+def _replay_previous_run(this_stage, context, manifest):
+    """
+    Reproduce the output and warnings of a stage that is being skipped.
+
+    @param[in]    this_stage:      The stage (stage).
+    @param[in]    context:         The state of this run
+                                   (Altium_helpers.run_context).
+    @param[in]    manifest:        The record of the previous run
+                                   (Altium_Manifest.manifest).
+    @return                        The previous result of the stage.
+    """
+    [result, output, warnings] = manifest.previous_run(this_stage)
+
+    print('\nSkipping ' + this_stage.name + ', inputs are unchanged since the last run')
+    sys.stdout.write(output)
+
+    # raise the warnings again so that they are still reviewed
+    for i in range(warnings):
+        context.log_warning()
+    # end for
+
+    return result
+# end def
+
+
+def _clear_outputs(this_stage, stages):
+    """
+    Remove the outputs of a previous run of a stage before it runs again.
+    Outputs shared with other stages, or also read by the stage, are left
+    in place. Folders are emptied rather than removed.
+
+    @param[in]    this_stage:      The stage (stage).
+    @param[in]    stages:          All of the stages (list of stage).
+    """
+    for path in this_stage.outputs:
+        shared = any(_paths_overlap(path, p) for p in this_stage.inputs)
+
+        for other in stages:
+            if (other is not this_stage and
+                any(_paths_overlap(path, p) for p in other.outputs)):
+                shared = True
+            # end if
+        # end for
+
+        if shared:
+            continue
+        # end if
+
+        if os.path.isdir(path):
+            for filename in os.listdir(path):
+                child = os.path.join(path, filename)
+
+                if os.path.isdir(child):
+                    shutil.rmtree(child)
+
+                else:
+                    os.remove(child)
+                # end if
+            # end for
+
+        elif os.path.isfile(path):
+            os.remove(path)
+        # end if
+    # end for
+# end def
+
@@ -0,0 +1,684 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Plan.py
+
+Package that works out what a run would produce without producing it: every
+file of the deliverable, where it comes from, roughly how big it will be and
+how long the run will take, based on how fast each stage ran before on this
+machine.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import sys
+sys.path.insert(1, 'src\\')
+import json
+import datetime
+
+#
+# -------
+# Constants
+
+# the record of how long previous runs took, shared by every project
+history_filename = os.path.join(os.path.expanduser('~'),
+                                '.altium_docs_history.json')
+
+# the number of runs of each stage that are remembered
+history_samples = 20
+
+# the fraction of its size a zip is assumed to be until one has been made
+default_zip_ratio = 0.5
+
+# approximate size of each line of a gerber readme (bytes)
+readme_line_size = 64
+
+#
+# -------
+# Classes
+
+class history:
+    """
+    Class to store how long each stage took on previous runs.
+
+    @attribute     filename:   The file the history is stored in (string).
+    @attribute     stages:     The bytes read, bytes written and seconds taken
+                               by recent runs of each stage, keyed by stage
+                               name (dict).
+    """
+    def __init__(self, filename = history_filename):
+        """
+        Initialise the history class, loading the previous runs if there
+        are any.
+
+        @param[in]     filename:   The file the history is stored in
+                                   (string).
+        """
+        self.filename = filename
+        self.stages = _load_history(filename)
+        self._new_samples = {}
+    # end def
+
+    def record(self, name, bytes_in, bytes_out, seconds):
+        """
+        Record a run of a stage.
+
+        @param[in]    name:            The name of the stage (string).
+        @param[in]    bytes_in:        The size of the files it read (int).
+        @param[in]    bytes_out:       The size of the files it wrote (int).
+        @param[in]    seconds:         The time it took (float).
+        """
+        sample = [bytes_in, bytes_out, seconds]
+
+        self.stages.setdefault(name, []).append(sample)
+        self._new_samples.setdefault(name, []).append(sample)
+    # end def
+
+    def record_stage(self, stage, seconds):
+        """
+        Record a run of a pipeline stage, measuring the files it read and
+        wrote.
+
+        @param[in]    stage:           The stage (Altium_Pipeline.stage).
+        @param[in]    seconds:         The time it took (float).
+        """
+        self.record(stage.name, stage_input_size(stage),
+                    total_size(stage.outputs), seconds)
+    # end def
+
+    def estimate(self, name, bytes_in):
+        """
+        Estimate how long a stage will take from the throughput of its
+        previous runs.
+
+        @param[in]    name:            The name of the stage (string).
+        @param[in]    bytes_in:        The size of the files it will read
+                                       (int).
+        @return       (float)          The estimated time in seconds, None if
+                                       the stage has never been run.
+        """
+        samples = self.stages.get(name, [])
+
+        if samples == []:
+            return None
+        # end if
+
+        total_in = sum(s[0] for s in samples)
+        total_seconds = sum(s[2] for s in samples)
+
+        if (total_in == 0) or (bytes_in == 0):
+            # the stage does not depend on the size of anything
+            return total_seconds / len(samples)
+        # end if
+
+        return bytes_in * total_seconds / total_in
+    # end def
+
+    def ratio(self, name):
+        """
+        Get how large the output of a stage is compared to its input, such
+        as the compression achieved by a zip.
+
+        @param[in]    name:            The name of the stage (string).
+        @return       (float)          The ratio of bytes written to bytes
+                                       read, None if it is not known.
+        """
+        samples = self.stages.get(name, [])
+        total_in = sum(s[0] for s in samples)
+
+        if total_in == 0:
+            return None
+        # end if
+
+        return sum(s[1] for s in samples) / float(total_in)
+    # end def
+
+    def save(self):
+        """
+        Add the runs recorded since the history was loaded to the history
+        file, keeping only the most recent of each stage. Runs saved by
+        other processes in the meantime are kept.
+        """
+        if self._new_samples == {}:
+            return
+        # end if
+
+        stages = _load_history(self.filename)
+
+        for name, samples in self._new_samples.items():
+            stages[name] = (stages.get(name, []) + samples)[-history_samples:]
+        # end for
+
+        # write to a temporary file first so an interrupted run cannot leave
+        # a half written history
+        temp_filename = self.filename + '.' + str(os.getpid()) + '.tmp'
+
+        try:
+            with open(temp_filename, 'w') as history_file:
+                json.dump(stages, history_file, indent=1, sort_keys=True)
+            # end with
+
+            os.replace(temp_filename, self.filename)
+
+        except (IOError, OSError):
+            print('*** Warning: Could not save the run history ***')
+        # end try
+
+        self.stages = stages
+        self._new_samples = {}
+    # end def
+# end class
+
+
+class planned_file:
+    """
+    Class to store a file that a run would produce.
+
+    @attribute     stage:        The stage that produces it (string).
+    @attribute     destination:  The file produced (full path) (string).
+    @attribute     source:       The file it is made from (full path)
+                                 (string).
+    @attribute     size:         Its estimated size in bytes, None if it
+                                 cannot be estimated (int).
+    """
+    def __init__(self, stage, destination, source, size):
+        """
+        Initialise the planned_file class
+
+        @param[in]     stage:        The stage that produces it (string).
+        @param[in]     destination:  The file produced (string).
+        @param[in]     source:       The file it is made from (string).
+        @param[in]     size:         Its estimated size in bytes (int).
+        """
+        self.stage = stage
+        self.destination = destination
+        self.source = source
+        self.size = size
+    # end def
+# end class
+
+
+class deliverable_plan:
+    """
+    Class to store what a run would do.
+
+    @attribute     output_dir:   The deliverable folder (string).
+    @attribute     files:        The files that would be produced
+                                 (list of planned_file).
+    @attribute     estimates:    The estimated time of each stage in seconds,
+                                 None where it has never been run (dict).
+    @attribute     total_time:   The estimated time of the run in seconds,
+                                 None if no stage has been run before (float).
+    @attribute     problems:     Anything missing that the run would report
+                                 (list of strings).
+    """
+    def __init__(self, output_dir):
+        """
+        Initialise the deliverable_plan class
+
+        @param[in]     output_dir:   The deliverable folder (string).
+        """
+        self.output_dir = output_dir
+        self.files = []
+        self.estimates = {}
+        self.total_time = None
+        self.problems = []
+    # end def
+# end class
+
+
+#
+# ----------------
+# Public Functions
+
+def plan_deliverable(context, run_history = None):
+    """
+    Work out what generating the deliverable for a project would produce,
+    using the same discovery as the run itself. Nothing is copied, split,
+    zipped or written.
+
+    @param[in]    context:         The state of this run
+                                   (Altium_helpers.run_context).
+    @param[in]    run_history:     The record of previous runs, None to load
+                                   it (history).
+    @return       (deliverable_plan) The plan, None if the folder structure
+                                   does not match the current Outjob file.
+    """
+    import Altium_Build
+    import Altium_Delta
+    import Altium_Files
+    import Altium_PDF
+    import Altium_Pipeline
+
+    if run_history == None:
+        run_history = history()
+    # end if
+
+    try:
+        layout = Altium_Build.deliverable_layout(context)
+
+    except:
+        return None
+    # end try
+
+    starting_dir = context.starting_dir
+    plan = deliverable_plan(layout.output_dir)
+    files = context.files
+
+    def size_of(path):
+        if files.isfile(path):
+            return files.getsize(path)
+        # end if
+        return None
+    # end def
+
+    def add(stage, destination, source, size):
+        plan.files.append(planned_file(stage, destination, source, size))
+    # end def
+
+    # copy_assy_config
+    template = context.prog_dir + '\\src\\ASSY Config.xlsx'
+    add('copy_assy_config', layout.assy_config_file, template, size_of(template))
+
+    # move_Altium_files
+    for filename in Altium_Files.find_Altium_files(context, starting_dir):
+        add('move_Altium_files', layout.output_altium_dir + '\\' + filename,
+            starting_dir + '\\' + filename, size_of(starting_dir + '\\' + filename))
+    # end for
+
+    # move_gerbers
+    layers = 0
+
+    if len(files.listdir(layout.gerber_dir)) < 10:
+        plan.problems.append('No Gerbers have been generated')
+
+    else:
+        [gerber_copies, layers] = Altium_Files.find_gerber_files(context, layout.gerber_dir,
+                                                                 layout.full_part_number)
+
+        for [filename, output_filename] in gerber_copies:
+            add('move_gerbers', layout.output_gerber_dir + '\\' + output_filename,
+                layout.gerber_dir + '\\' + filename,
+                size_of(layout.gerber_dir + '\\' + filename))
+        # end for
+
+        readme_size = (sum(len(line) for line in Altium_Files.Readme_header) +
+                       readme_line_size * len(gerber_copies))
+        add('move_gerbers', layout.output_gerber_dir + '\\README' + str(layers) + '.TXT',
+            None, readme_size)
+    # end if
+
+    # move_xps
+    xps_file = Altium_Files.find_xps_file(context, starting_dir)
+
+    if xps_file == '':
+        plan.problems.append('No .xps file found')
+
+    else:
+        add('move_xps', layout.output_dir + '\\' + layout.full_part_number + '.' +
+            xps_file.split('.')[1], starting_dir + '\\' + xps_file,
+            size_of(starting_dir + '\\' + xps_file))
+    # end if
+
+    # move_documents
+    schematic = Altium_Files.find_schematic(context, layout.pdf_dir)
+
+    if schematic == '':
+        plan.problems.append('No Schematic Document was found')
+
+    else:
+        _add_pages(add, layout.pdf_dir + '\\' + schematic,
+                   layout.output_pdf_dir + '\\' + layout.full_part_number + '-%d.pdf',
+                   size_of(layout.pdf_dir + '\\' + schematic))
+    # end if
+
+    # the order is filled in from the BOM so its size is not known
+    add('move_documents', layout.output_pdf_dir + '\\' + layout.full_part_number +
+        ' digikey order.xlsx', layout.gerber_dir, None)
+
+    # the ASSY Config document is copied from the template at the start of
+    # the run
+    add('move_documents', layout.output_pdf_dir + '\\' + layout.full_part_number +
+        '_ASSY_REV.xlsx', layout.assy_config_file, size_of(template))
+
+    [layers_filename, pdf_copies] = Altium_PDF.find_Altium_PDFs(context, layout.pdf_dir)
+
+    if layers_filename == None:
+        plan.problems.append('No layers.pdf found')
+
+    else:
+        pages = _add_pages(add, layout.pdf_dir + '\\layers.pdf',
+                           layout.output_pdf_dir + '\\ART%02d.pdf',
+                           size_of(layout.pdf_dir + '\\layers.pdf'))
+
+        if (pages != None) and (pages != layers):
+            plan.problems.append('layers.pdf has ' + str(pages) + ' pages for ' +
+                                 str(layers) + ' layers')
+        # end if
+    # end if
+
+    for filename in pdf_copies:
+        add('move_documents', layout.output_pdf_dir + '\\' + filename,
+            layout.pdf_dir + '\\' + filename, size_of(layout.pdf_dir + '\\' + filename))
+    # end for
+
+    # zip_step_file
+    step_files = Altium_Files.find_step_files(context, starting_dir)
+
+    if step_files == []:
+        plan.problems.append('No step file found')
+    # end if
+
+    step_size = sum(files.getsize(starting_dir + '\\' + f) for f in step_files)
+    add('zip_step_file', layout.output_dir + '\\' + layout.part_number + '_3D.zip',
+        starting_dir + '\\' + (step_files[0] if len(step_files) == 1 else '*.step, *.x_t'),
+        int(step_size * _zip_ratio(run_history, 'zip_step_file')))
+
+    # the archive of everything else in the deliverable folder
+    deliverable_size = sum(f.size or 0 for f in plan.files
+                           if f.destination.startswith(layout.output_dir + '\\'))
+    dt_string = '' if context.reproducible else datetime.datetime.now().strftime("%Y%m%d_%H%M_")
+    add('archive', layout.output_dir + '\\' + dt_string +
+        layout.full_part_number + '_Folder.zip', layout.output_dir,
+        int(deliverable_size * _zip_ratio(run_history, 'archive')))
+
+    # the delta package, if a previous revision has been delivered
+    previous = Altium_Delta.find_previous_archive(starting_dir, layout.output_dir)
+
+    if previous != None:
+        add('delta', layout.output_dir + '\\' + dt_string + layout.full_part_number +
+            Altium_Delta.delta_suffix, previous, None)
+    # end if
+
+    # estimate the time of each stage from the size of what it reads
+    stages = Altium_Build.define_stages(context, layout)
+    dependencies = Altium_Pipeline.find_dependencies(stages)
+
+    for stage in stages:
+        plan.estimates[stage.name] = run_history.estimate(stage.name,
+                                                          stage_input_size(stage))
+    # end for
+
+    plan.estimates['archive'] = run_history.estimate('archive', deliverable_size)
+
+    # stages run at the same time, so the run takes as long as its slowest
+    # chain of dependent stages followed by the archive
+    finish = {}
+
+    for name in _stage_order(dependencies):
+        start = max([finish[d] for d in dependencies[name]] + [0.0])
+        finish[name] = start + (plan.estimates[name] or 0.0)
+    # end for
+
+    if any(e != None for e in plan.estimates.values()):
+        plan.total_time = max(finish.values()) + (plan.estimates['archive'] or 0.0)
+    # end if
+
+    return plan
+# end def
+
+
+def format_plan(context, plan):
+    """
+    Format a plan as a table of the files that would be produced followed by
+    the time estimates.
+
+    @param[in]    context:         The state of this run
+                                   (Altium_helpers.run_context).
+    @param[in]    plan:            The plan (deliverable_plan).
+    @return       (string)         The report.
+    """
+    lines = ['=========   Deliverable Plan   ===========\n',
+             'Project: \t' + context.starting_dir + '\n',
+             'Output: \t' + plan.output_dir + '\n',
+             'Files: \t\t' + str(len(plan.files)) + '\n',
+             'Size: \t\t' + _format_size(sum(f.size or 0 for f in plan.files)) + '\n\n',
+             '%10s  %-18s %-45s %s\n' % ('size', 'stage', 'file', 'source')]
+
+    for planned in plan.files:
+        lines.append('%10s  %-18s %-45s %s\n' % (_format_size(planned.size), planned.stage,
+                                                 _relative(planned.destination, context.starting_dir),
+                                                 _relative(planned.source, context.starting_dir)))
+    # end for
+
+    lines.append('\n%10s  %s\n' % ('time', 'stage'))
+
+    for name, seconds in plan.estimates.items():
+        if seconds == None:
+            lines.append('%10s  %s (no previous runs)\n' % ('?', name))
+
+        else:
+            lines.append('%8.1f s  %s\n' % (seconds, name))
+        # end if
+    # end for
+
+    if plan.total_time == None:
+        lines.append('\nEstimated time: unknown until a run has been recorded\n')
+
+    else:
+        lines.append('\nEstimated time: ' + '%.1f' % plan.total_time + ' s\n')
+    # end if
+
+    for problem in plan.problems:
+        lines.append('*** Warning: ' + problem + ' ***\n')
+    # end for
+
+    return ''.join(lines)
+# end def
+
+
+def total_size(paths):
+    """
+    Get the total size of files, walking into folders.
+
+    @param[in]    paths:           Files or folders (list of strings).
+    @return       (int)            The size in bytes, missing files count as
+                                   nothing.
+    """
+    size = 0
+
+    for path in paths:
+        if os.path.isfile(path):
+            size += os.path.getsize(path)
+            continue
+        # end if
+
+        for root, dirs, filenames in os.walk(path):
+            for filename in filenames:
+                try:
+                    size += os.path.getsize(os.path.join(root, filename))
+
+                except OSError:
+                    # removed while it was being measured
+                    pass
+                # end try
+            # end for
+        # end for
+    # end for
+
+    return size
+# end def
+
+
+def stage_input_size(stage):
+    """
+    Get the size of the files a stage reads, leaving out those it also
+    writes.
+
+    @param[in]    stage:           The stage (Altium_Pipeline.stage).
+    @return       (int)            The size in bytes.
+    """
+    outputs = [os.path.normcase(os.path.normpath(p)) for p in stage.outputs]
+
+    return total_size([p for p in stage.inputs
+                       if os.path.normcase(os.path.normpath(p)) not in outputs])
+# end def
+
+
+#
+# ----------------
+# Private Functions
+
+def _load_history(filename):
+    """
+    Read the history file.
+
+    @param[in]    filename:        The history file (string).
+    @return       (dict)           The samples of each stage, empty if there
+                                   is no usable history.
+    """
+    try:
+        with open(filename, 'r') as history_file:
+            stages = json.load(history_file)
+        # end with
+
+    except (IOError, OSError, ValueError):
+        return {}
+    # end try
+
+    if not isinstance(stages, dict):
+        return {}
+    # end if
+
+    return stages
+# end def
+
+
+def _add_pages(add, pdf_filename, page_filename, size):
+    """
+    Plan the files a PDF is split into, one per page, dividing its size
+    between them.
+
+    @param[in]    add:             Function to add a file to the plan.
+    @param[in]    pdf_filename:    The PDF (full path) (string).
+    @param[in]    page_filename:   The filename of each page, formatted with
+                                   the page number (string).
+    @param[in]    size:            The size of the PDF, None if it is not 
+                                   known (int).
+    @return       (int)            The number of pages, None if the PDF could
+                                   not be read.
+    """
+    try:
+        import PyPDF2
+
+        with open(pdf_filename, 'rb') as pdf_file:
+            pages = PyPDF2.PdfFileReader(pdf_file).numPages
+        # end with
+
+    except Exception:
+        # the pages cannot be counted, so show them as one entry
+        add('move_documents', page_filename.replace('%02d', '%d').replace('%d', '*'),
+            pdf_filename, size)
+        return None
+    # end try
+
+    for page in range(pages):
+        add('move_documents', page_filename % (page+1), pdf_filename,
+            None if size == None else size // max(pages, 1))
+    # end for
+
+    return pages
+# end def
+
+
+def _zip_ratio(run_history, name):
+    """
+    Get the size of a zip compared to what it contains.
+
+    @param[in]    run_history:     The record of previous runs (history).
+    @param[in]    name:            The stage that makes the zip (string).
+    @return       (float)          The ratio.
+    """
+    ratio = run_history.ratio(name)
+
+    if ratio == None:
+        return default_zip_ratio
+    # end if
+
+    return ratio
+# end def
+
+
+def _stage_order(dependencies):
+    """
+    Order stages so that each comes after the stages it depends on.
+
+    @param[in]    dependencies:    The dependencies of each stage (dict).
+    @return       (list)           The stage names.
+    """
+    order = []
+    remaining = dict(dependencies)
+
+    while remaining:
+        for name in [n for n, d in remaining.items() if d.issubset(order)]:
+            order.append(name)
+            del remaining[name]
+        # end for
+    # end while
+
+    return order
+# end def
+
+
+def _relative(path, base):
+    """
+    Shorten a path within the project folder.
+
+    @param[in]    path:            The path (string).
+    @param[in]    base:            The project folder (string).
+    @return       (string)         The path relative to the project folder if
+                                   it is within it.
+    """
+    if path == None:
+        return ''
+    # end if
+
+    if path.startswith(base + '\\'):
+        return path[len(base) + 1:]
+    # end if
+
+    return path
+# end def
+
+
+def _format_size(size):
+    """
+    Format a size for display.
+
+    @param[in]    size:            The size in bytes, None if not known (int).
+    @return       (string)         The size with units.
+    """
+    if size == None:
+        return '?'
+    # end if
+
+    if size < 1024:
+        return str(size) + ' B'
+    # end if
+
+    for unit in ['kB', 'MB', 'GB']:
+        size /= 1024.0
+
+        if size < 1024:
+            break
+        # end if
+    # end for
+
+    return '%.1f ' % size + unit
+# end def
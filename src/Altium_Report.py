@@ -0,0 +1,533 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Report.py
+
+Package that reads the design rule check and electrical rule check reports
+into the rules that were broken, how many times, by what and how severely,
+so that they can be reported precisely, saved with the deliverable and
+compared with the reports of the previous revision.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import sys
+sys.path.insert(1, 'src\\')
+import re
+import json
+import zipfile
+import Altium_Delta
+
+#
+# -------
+# Constants
+
+# increment this when the format of the saved reports changes
+report_version = 1
+
+# the saved reports in the deliverable
+DRC_filename = 'Design Rules Check.json'
+ERC_filename = 'Electrical Rules Check.json'
+
+# the most objects kept for each rule, the count is always complete
+max_objects = 100
+
+# the severities of a rule, least severe first
+severities = ['warning', 'violation', 'error', 'fatal']
+
+# the ERC classes and their severities
+_ERC_classes = {'Warning': 'warning', 'Error': 'error', 'Fatal Error': 'fatal'}
+
+# the counters at the top of a DRC report
+_DRC_warnings = re.compile(r'Warnings\s*:?\s*([0-9]+)')
+_DRC_violations = re.compile(r'Rule Violations\s*:?\s*([0-9]+)')
+
+# the headings of the DRC summary tables
+_DRC_table = re.compile(r'^(Warnings|Rule Violations)(\s+Count)?$')
+
+# a row of a DRC summary table
+_DRC_row = re.compile(r'^(.*\S)\s+([0-9]+)$')
+
+# the kinds of document an ERC message can be for
+_ERC_documents = r'(?i:SchDoc|SchDot|PrjPcb|Harness)'
+
+# a row of an ERC report: class, document and message. Sheet names can have
+# spaces in them, so the document runs to the first known extension
+_ERC_row = re.compile(r'^\[?(Fatal Error|Error|Warning)\]?\s+(.+?\.' + 
+                      _ERC_documents + r')\s+(.*)$')
+
+# the start of a row, to find the rows that could not be read
+_ERC_class = re.compile(r'^\[?(Fatal Error|Error|Warning)\b')
+
+#
+# -------
+# Classes
+
+class rule_result:
+    """
+    Class to store how a rule of a check was broken.
+
+    @attribute     name:        The rule (string).
+    @attribute     severity:    How severe breaking it is, one of severities
+                                (string).
+    @attribute     count:       The number of times it was broken (int).
+    @attribute     objects:     What broke it, up to max_objects of them
+                                (list of strings).
+    """
+    def __init__(self, name, severity, count = 0, objects = None):
+        """
+        Initialise the rule_result class.
+
+        @param[in]     name:        The rule (string).
+        @param[in]     severity:    How severe breaking it is (string).
+        @param[in]     count:       The number of times it was broken (int).
+        @param[in]     objects:     What broke it (list of strings).
+        """
+        self.name = name
+        self.severity = severity
+        self.count = count
+        self.objects = list(objects or [])
+    # end def
+
+    def add_object(self, description):
+        """
+        Record something that broke the rule.
+
+        @param[in]     description: What broke it (string).
+        """
+        if len(self.objects) < max_objects:
+            self.objects.append(description)
+        # end if
+    # end def
+
+    def to_dict(self):
+        """
+        Get the rule as something that can be stored as json.
+
+        @return        (dict)       The name, severity, count and objects.
+        """
+        return {'name': self.name, 'severity': self.severity,
+                'count': self.count, 'objects': self.objects}
+    # end def
+# end class
+
+
+class check_report:
+    """
+    Class to store what a design or electrical rule check report found.
+
+    @attribute     kind:        'DRC' or 'ERC' (string).
+    @attribute     source:      The report it was read from (string).
+    @attribute     complete:    True if the report could be read, False if
+                                what it found is not known (bool).
+    @attribute     warnings:    The number of warnings (int).
+    @attribute     violations:  The number of violations and errors (int).
+    @attribute     rules:       The rules that were broken keyed by name
+                                (dict of rule_result).
+    """
+    def __init__(self, kind, source):
+        """
+        Initialise the check_report class.
+
+        @param[in]     kind:        'DRC' or 'ERC' (string).
+        @param[in]     source:      The report it is read from (string).
+        """
+        self.kind = kind
+        self.source = source
+        self.complete = False
+        self.warnings = 0
+        self.violations = 0
+        self.rules = {}
+    # end def
+
+    def rule(self, name, severity):
+        """
+        Get a rule, adding it if it has not been broken before.
+
+        @param[in]     name:        The rule (string).
+        @param[in]     severity:    How severe breaking it is (string).
+        @return        (rule_result) The rule.
+        """
+        if name not in self.rules:
+            self.rules[name] = rule_result(name, severity)
+        # end if
+
+        return self.rules[name]
+    # end def
+
+    def broken(self):
+        """
+        Get the rules that were broken, most severe and most often first.
+
+        @return        (list of rule_result) The rules.
+        """
+        rules = [r for r in self.rules.values() if r.count > 0]
+
+        return sorted(rules, key = lambda r: (-severities.index(r.severity),
+                                              -r.count, r.name))
+    # end def
+
+    def to_dict(self):
+        """
+        Get the report as something that can be stored as json.
+
+        @return        (dict)       The report.
+        """
+        return {'version': report_version, 'kind': self.kind,
+                'source': self.source, 'complete': self.complete,
+                'warnings': self.warnings, 'violations': self.violations,
+                'rules': [r.to_dict() for r in self.broken()]}
+    # end def
+# end class
+
+#
+# ----------------
+# Public Functions
+
+def parse_DRC(text, source = 'Design Rules Check.PDF'):
+    """
+    Read the text of a design rule check report. The counters at the top of
+    the report give the totals, the summary tables the count of each rule
+    and the detail of each rule what broke it.
+
+    @param[in]   text:                The text of the report (string).
+    @param[in]   source:              The name of the report (string).
+    @return      (check_report)       What the report found.
+    """
+    report = check_report('DRC', source)
+
+    warnings = _DRC_warnings.search(text)
+    violations = _DRC_violations.search(text)
+
+    if (warnings == None) or (violations == None):
+        return report
+    # end if
+
+    report.warnings = int(warnings.group(1))
+    report.violations = int(violations.group(1))
+    report.complete = True
+
+    lines = _lines(text)
+    section = None
+    names = []
+    counts = []
+    kinds = {}
+    current = None
+
+    for line in lines:
+        heading = _DRC_table.match(line)
+
+        if heading != None:
+            section = 'warning' if heading.group(1) == 'Warnings' else 'violation'
+            names = []
+            counts = []
+            continue
+
+        elif section != None:
+            if line == 'Count':
+                continue
+            # end if
+
+            if line.startswith('Total'):
+                # the rows were split into a column of names and one of counts
+                if len(names) == len(counts):
+                    for [name, count] in zip(names, counts):
+                        report.rule(name, section).count = count
+                    # end for
+                # end if
+
+                section = None
+                continue
+            # end if
+
+            if line.isdigit():
+                counts.append(int(line))
+                continue
+            # end if
+
+            row = _DRC_row.match(line)
+
+            if row != None:
+                report.rule(row.group(1), section).count = int(row.group(2))
+
+            else:
+                names.append(line)
+            # end if
+            continue
+        # end if
+
+        # the detail of a rule starts with its full name, then a line for each
+        # object starting with the kind of rule
+        if line in report.rules:
+            current = report.rules[line]
+            continue
+        # end if
+
+        if ':' not in line:
+            continue
+        # end if
+
+        [kind, description] = line.split(':', 1)
+
+        if not kinds:
+            for rule in report.rules.values():
+                kinds.setdefault(_rule_kind(rule.name), []).append(rule)
+            # end for
+        # end if
+
+        if (current != None) and (_rule_kind(current.name) == kind):
+            current.add_object(description.strip())
+
+        elif kind in kinds:
+            kinds[kind][0].add_object(description.strip())
+        # end if
+    # end for
+
+    return report
+# end def
+
+
+def parse_ERC(text, source = 'Electrical Rules Check.PDF'):
+    """
+    Read the text of an electrical rule check report, a row for each message
+    of its class, document and message. Only the class of a row is used for
+    its severity, so a sheet named for an error is not counted as one.
+
+    @param[in]   text:                The text of the report (string).
+    @param[in]   source:              The name of the report (string).
+    @return      (check_report)       What the report found.
+    """
+    report = check_report('ERC', source)
+    report.complete = True
+
+    messages = []
+
+    for line in _lines(text):
+        row = _ERC_row.match(line)
+
+        if row != None:
+            messages.append([_ERC_classes[row.group(1)], row.group(2), row.group(3)])
+
+        elif _ERC_class.match(line) != None:
+            # a message that could not be read, such as a class on its own
+            # when the columns could not be read as rows
+            report.complete = False
+
+        elif (messages != []) and (messages[-1][2].count('(') > messages[-1][2].count(')')):
+            # a message wrapped onto the next line
+            messages[-1][2] += ' ' + line
+        # end if
+    # end for
+
+    for [severity, document, message] in messages:
+        rule = report.rule(_message_rule(message), severity)
+        rule.count += 1
+        rule.add_object(document + ': ' + message)
+
+        if severity == 'warning':
+            report.warnings += 1
+
+        else:
+            report.violations += 1
+        # end if
+    # end for
+
+    return report
+# end def
+
+
+def diff_reports(previous, current):
+    """
+    Compare a report with the same report of the previous revision.
+
+    @param[in]   previous:            The previous report (check_report).
+    @param[in]   current:             This report (check_report).
+    @return      (dict)               The rules broken that were not before
+                                      ('added'), no longer broken
+                                      ('resolved'), broken more or less often
+                                      ('increased', 'decreased'), each with
+                                      the objects that newly broke it.
+    """
+    changes = {'added': [], 'resolved': [], 'increased': [], 'decreased': []}
+
+    for rule in current.broken():
+        entry = {'name': rule.name, 'severity': rule.severity,
+                 'count': rule.count, 'previous_count': 0,
+                 'new_objects': rule.objects}
+
+        old = previous.rules.get(rule.name)
+
+        if (old == None) or (old.count == 0):
+            changes['added'].append(entry)
+            continue
+        # end if
+
+        entry['previous_count'] = old.count
+        entry['new_objects'] = [o for o in rule.objects if o not in old.objects]
+
+        if rule.count > old.count:
+            changes['increased'].append(entry)
+
+        elif rule.count < old.count:
+            changes['decreased'].append(entry)
+        # end if
+    # end for
+
+    for rule in previous.broken():
+        if current.rules.get(rule.name, rule_result(rule.name, rule.severity)).count == 0:
+            changes['resolved'].append({'name': rule.name, 'severity': rule.severity,
+                                        'count': 0, 'previous_count': rule.count,
+                                        'new_objects': []})
+        # end if
+    # end for
+
+    return changes
+# end def
+
+
+def report_from_dict(data):
+    """
+    Get a report back from what to_dict stored.
+
+    @param[in]   data:                The stored report (dict).
+    @return      (check_report)       The report, None if it was stored in a
+                                      different format.
+    """
+    if data.get('version') != report_version:
+        return None
+    # end if
+
+    report = check_report(data['kind'], data['source'])
+    report.complete = data['complete']
+    report.warnings = data['warnings']
+    report.violations = data['violations']
+
+    for rule in data['rules']:
+        report.rules[rule['name']] = rule_result(rule['name'], rule['severity'],
+                                                 rule['count'], rule['objects'])
+    # end for
+
+    return report
+# end def
+
+
+def save_report(report, filename):
+    """
+    Save a report as json.
+
+    @param[in]   report:              The report (check_report).
+    @param[in]   filename:            The file to save it in (full path)
+                                      (string).
+    """
+    with open(filename, 'w') as report_file:
+        json.dump(report.to_dict(), report_file, indent = 2, sort_keys = True)
+    # end with
+# end def
+
+
+def read_previous_report(starting_dir, output_dir, filename):
+    """
+    Get a report from the archive of the previous revision of the project.
+
+    @param[in]   starting_dir:        The Altium project directory (full path)
+                                      (string).
+    @param[in]   output_dir:          The packaging outputs directory of this
+                                      revision (full path) (string).
+    @param[in]   filename:            The saved report (DRC_filename or
+                                      ERC_filename).
+    @return      (list)               The report (check_report) and the
+                                      archive it was read from (string), None
+                                      and None if there is no previous report
+                                      that can be read.
+    """
+    previous = Altium_Delta.find_previous_archive(starting_dir, output_dir)
+
+    if previous == None:
+        return None, None
+    # end if
+
+    try:
+        with zipfile.ZipFile(previous) as zip_file:
+            if filename not in zip_file.namelist():
+                return None, None
+            # end if
+
+            data = json.loads(zip_file.read(filename).decode('utf-8'))
+        # end with
+
+        return report_from_dict(data), previous
+
+    except (zipfile.BadZipFile, OSError, ValueError, KeyError):
+        return None, None
+    # end try
+# end def
+
+
+#
+# ----------------
+# Private Functions
+
+def _lines(text):
+    """
+    Split the text of a report into its lines without the blank lines, page
+    breaks and surrounding whitespace.
+
+    @param[in]   text:                The text (string).
+    @return      (list of strings)    The lines.
+    """
+    lines = []
+
+    for line in text.replace('\x0c', '\n').splitlines():
+        line = ' '.join(line.split())
+
+        if line != '':
+            lines.append(line)
+        # end if
+    # end for
+
+    return lines
+# end def
+
+
+def _rule_kind(name):
+    """
+    Get the kind of a DRC rule, which its details start with, from its name
+    and scope, e.g. 'Clearance Constraint' from
+    'Clearance Constraint (Gap=0.2mm) (All),(All)'.
+
+    @param[in]   name:                The rule (string).
+    @return      (string)             The kind of rule.
+    """
+    return name.split(' (')[0].strip()
+# end def
+
+
+def _message_rule(message):
+    """
+    Get the rule an ERC message is for by taking the objects out of it, e.g.
+    'Net * has no driving source' from
+    'Net NetR1_2 has no driving source (Pin R1-2,Pin U1-3)'.
+
+    @param[in]   message:             The message (string).
+    @return      (string)             The rule.
+    """
+    message = re.sub(r'\([^()]*\)', ' ', message)
+    words = ['*' if re.search(r'[0-9_]', word) else word for word in message.split()]
+
+    return ' '.join(words)
+# end def
@@ -0,0 +1,945 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_STEP.py
+
+Package that processes STEP (ISO 10303-21) files a statement at a time, so
+that the size of the model does not matter.
+
+The minifier removes comments and the whitespace outside strings, merges
+geometry entities that are identical once their references are merged, and
+numbers the entities that are left from 1. Entities are kept apart when
+merging them would put the same entity twice in a list, such as (#4,#4),
+which needs the model to be read again. The result is read back and every
+entity of the original compared with it.
+
+While the model is read its header, units, entity counts and the bounding
+box of its points are recorded, so they can be delivered with it.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import re
+import array
+import hashlib
+
+#
+# -------
+# Constants
+
+# entities that are pure geometry, so two that are identical can be merged
+# without changing the model. Topology, such as vertices and edges, is not
+# merged as which entity is used matters.
+dedup_types = frozenset(['CARTESIAN_POINT', 'DIRECTION', 'VECTOR',
+                         'AXIS1_PLACEMENT', 'AXIS2_PLACEMENT_2D',
+                         'AXIS2_PLACEMENT_3D', 'LINE', 'CIRCLE', 'ELLIPSE',
+                         'PLANE', 'CYLINDRICAL_SURFACE', 'CONICAL_SURFACE',
+                         'SPHERICAL_SURFACE', 'TOROIDAL_SURFACE',
+                         'COLOUR_RGB'])
+
+# the amount of the file read at a time (characters)
+read_size = 1024*1024
+
+# entity numbers above this are not expected from a CAD export, and would
+# need too large a table to renumber
+max_entity_id = 100*1000*1000
+
+# the characters that start or end something in a statement
+_special = re.compile(r"[;'/]")
+
+# a string or comment, or a run of whitespace, in a statement
+_token = re.compile(r"('(?:[^']|'')*')|/\*.*?\*/|\s+", re.S)
+
+# an entity reference
+_reference = re.compile(r"#(\d+)")
+
+# the number of an entity instance
+_instance = re.compile(r"#(\d+)=")
+
+# the number of points whose coordinates are converted together
+point_batch = 65536
+
+# the kinds of unit that are recorded
+unit_kinds = {'LENGTH_UNIT': 'length', 'PLANE_ANGLE_UNIT': 'plane_angle',
+              'SOLID_ANGLE_UNIT': 'solid_angle'}
+
+# an SI unit and its prefix
+_si_unit = re.compile(r"SI_UNIT\((?:\.(\w+)\.|\$|\*),\.(\w+)\.\)")
+
+# a unit defined from another, such as an inch
+_conversion_unit = re.compile(r"CONVERSION_BASED_UNIT\('((?:[^']|'')*)'")
+
+#
+# -------
+# Classes
+
+class minify_result:
+    """
+    Class to store what the minifier did.
+
+    @attribute     bytes_in:      The size of the original (int).
+    @attribute     bytes_out:     The size of the minified file (int).
+    @attribute     entities_in:   The number of entities in the original (int).
+    @attribute     entities_out:  The number left after merging (int).
+    """
+    def __init__(self):
+        """
+        Initialise the minify_result class
+        """
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.entities_in = 0
+        self.entities_out = 0
+    # end def
+# end class
+
+
+class step_info:
+    """
+    Class to collect what is in a STEP file as its statements are read. The
+    coordinates of the points are converted in batches so that memory use
+    does not grow with the file.
+
+    @attribute     header:     The file description and name fields (dict).
+    @attribute     schema:     The schemas the file uses (list of strings).
+    @attribute     units:      The names of the units used for each kind of
+                               unit (dict of lists of strings).
+    @attribute     entities:   The number of entities (int).
+    @attribute     counts:     The number of entities of each type (dict).
+    @attribute     points:     The number of 3D points (int).
+    @attribute     minimum:    The smallest x, y and z of the points, None if
+                               there are none (list of floats).
+    @attribute     maximum:    The largest x, y and z of the points, None if
+                               there are none (list of floats).
+    @attribute     complete:   Whether the whole file has been read (bool).
+    """
+    def __init__(self):
+        """
+        Initialise the step_info class
+        """
+        self.header = {}
+        self.schema = []
+        self.units = {}
+        self.entities = 0
+        self.counts = {}
+        self.points = 0
+        self.minimum = None
+        self.maximum = None
+        self.complete = False
+        self._batch = []
+    # end def
+
+    def add(self, statement):
+        """
+        Record a statement.
+
+        @param[in]    statement:       The statement, normalised (string).
+        """
+        match = _instance.match(statement)
+
+        if match == None:
+            self._add_header(statement)
+            return
+        # end if
+
+        self.entities += 1
+        body = statement[match.end():]
+
+        if body.startswith('CARTESIAN_POINT('):
+            # the coordinates are the last list, ending '));'
+            coordinates = body[body.rfind('(') + 1:body.rfind(')') - 1]
+
+            if coordinates.count(',') == 2:
+                self._batch.append(coordinates)
+
+                if len(self._batch) >= point_batch:
+                    self._add_points()
+                # end if
+            # end if
+
+            entity_type = 'CARTESIAN_POINT'
+
+        elif body.startswith('('):
+            # a complex entity, named after the types it is made of
+            entity_type = '+'.join(_complex_types(body))
+            kinds = [unit_kinds[name] for name in entity_type.split('+')
+                     if name in unit_kinds]
+
+            if kinds != []:
+                self._add_unit(kinds[0], body)
+            # end if
+
+        else:
+            entity_type = body[:body.find('(')]
+        # end if
+
+        self.counts[entity_type] = self.counts.get(entity_type, 0) + 1
+    # end def
+
+    def finish(self):
+        """
+        Record the last points once the whole file has been read.
+        """
+        self._add_points()
+        self.complete = True
+    # end def
+
+    def size(self):
+        """
+        Get the size of the bounding box of the points.
+
+        @return       (list)           The x, y and z size, None if there are
+                                       no points (list of floats).
+        """
+        if self.minimum == None:
+            return None
+        # end if
+
+        return [high - low for [low, high] in zip(self.minimum, self.maximum)]
+    # end def
+
+    def to_dict(self):
+        """
+        Give what was found in a form that can be saved as JSON.
+
+        @return       (dict)           The header, schema, units, entity
+                                       counts and bounding box.
+        """
+        if self.minimum == None:
+            bounding_box = None
+
+        else:
+            bounding_box = {'min': self.minimum, 'max': self.maximum,
+                            'size': self.size()}
+        # end if
+
+        return {'header': self.header,
+                'schema': self.schema,
+                'units': self.units,
+                'entities': self.entities,
+                'entity_counts': self.counts,
+                'cartesian_points': self.points,
+                'bounding_box': bounding_box}
+    # end def
+
+    def _add_header(self, statement):
+        """
+        Record the fields of the header statements.
+
+        @param[in]    statement:       The statement, normalised (string).
+        """
+        if statement.startswith('FILE_SCHEMA('):
+            self.schema = _strings(statement)
+
+        elif statement.startswith('FILE_DESCRIPTION('):
+            arguments = _arguments(statement)
+
+            if len(arguments) == 2:
+                self.header['description'] = _strings(arguments[0])
+                self.header['implementation_level'] = _string(arguments[1])
+            # end if
+
+        elif statement.startswith('FILE_NAME('):
+            arguments = _arguments(statement)
+
+            if len(arguments) == 7:
+                self.header['name'] = _string(arguments[0])
+                self.header['time_stamp'] = _string(arguments[1])
+                self.header['author'] = _strings(arguments[2])
+                self.header['organization'] = _strings(arguments[3])
+                self.header['preprocessor_version'] = _string(arguments[4])
+                self.header['originating_system'] = _string(arguments[5])
+                self.header['authorization'] = _string(arguments[6])
+            # end if
+        # end if
+    # end def
+
+    def _add_unit(self, kind, body):
+        """
+        Record the name of a unit, such as millimetre or inch.
+
+        @param[in]    kind:            The kind of unit, such as length
+                                       (string).
+        @param[in]    body:            The unit entity (string).
+        """
+        conversion = _conversion_unit.search(body)
+
+        if conversion != None:
+            name = conversion.group(1).lower()
+
+        else:
+            si_unit = _si_unit.search(body)
+
+            if si_unit == None:
+                return
+            # end if
+
+            name = (si_unit.group(1) or '').lower() + si_unit.group(2).lower()
+        # end if
+
+        names = self.units.setdefault(kind, [])
+
+        if name not in names:
+            names.append(name)
+        # end if
+    # end def
+
+    def _add_points(self):
+        """
+        Convert the coordinates of the points collected so far and include
+        them in the bounding box.
+        """
+        if self._batch == []:
+            return
+        # end if
+
+        values = ','.join(self._batch).split(',')
+        self.points += len(self._batch)
+        self._batch = []
+
+        try:
+            import numpy
+
+        except ImportError:
+            numpy = None
+        # end try
+
+        if numpy != None:
+            coordinates = numpy.array(values, dtype = float).reshape(-1, 3)
+            minimum = coordinates.min(axis = 0).tolist()
+            maximum = coordinates.max(axis = 0).tolist()
+
+        else:
+            coordinates = [float(value) for value in values]
+            minimum = [min(coordinates[axis::3]) for axis in range(3)]
+            maximum = [max(coordinates[axis::3]) for axis in range(3)]
+        # end if
+
+        if self.minimum != None:
+            minimum = [min(pair) for pair in zip(minimum, self.minimum)]
+            maximum = [max(pair) for pair in zip(maximum, self.maximum)]
+        # end if
+
+        self.minimum = minimum
+        self.maximum = maximum
+    # end def
+# end class
+
+
+#
+# ----------------
+# Public Functions
+
+def minify_step(source, destination, info = None):
+    """
+    Write a smaller copy of a STEP file that describes the same model, and
+    check it. Raises ValueError if the file cannot be minified or the copy
+    does not match, in which case the original should be used.
+
+    @param[in]    source:          The STEP file (full path) (string).
+    @param[in]    destination:     The file to write (full path) (string).
+    @param[in]    info:            Collects what is in the file as it is
+                                   read, None to not collect it (step_info).
+    @return       (minify_result)  What was done.
+    """
+    # entities that are not merged, as merging them would put the same
+    # entity twice in a list
+    unmerged = set()
+
+    while True:
+        result = minify_result()
+
+        # work out the new number of every entity
+        [mapping, result.entities_out] = _number_entities(source, info, unmerged)
+
+        # what is in the file is only collected on the first read
+        info = None
+
+        merged = _write_minified(source, destination, mapping, result)
+
+        if merged == set():
+            break
+        # end if
+
+        unmerged |= merged
+    # end while
+
+    # read the result back to check it
+    result.bytes_out = _verify(source, destination, mapping, result.entities_out)
+
+    return result
+# end def
+
+
+def read_step_info(source):
+    """
+    Read the header, units, entity counts and bounding box of a STEP file in
+    one pass. Raises ValueError if the file cannot be read.
+
+    @param[in]    source:          The STEP file (full path) (string).
+    @return       (step_info)      What is in the file.
+    """
+    info = step_info()
+
+    with open(source, 'r', encoding='latin-1', newline='') as source_file:
+        for statement in read_statements(source_file):
+            info.add(normalise(statement))
+        # end for
+    # end with
+
+    info.finish()
+
+    return info
+# end def
+
+
+def read_statements(stream):
+    """
+    Read the statements of a STEP file one at a time. A statement ends with
+    a semicolon that is not in a string or comment.
+
+    @param[in]    stream:          The file, opened as text (file object).
+    @return       (generator)      Each statement including its semicolon
+                                   (string).
+    """
+    buffer = ''
+    start = 0
+    scan = 0
+    at_end = False
+
+    while True:
+        match = _special.search(buffer, scan)
+
+        if match != None:
+            position = match.start()
+            char = match.group()
+
+            if char == ';':
+                yield buffer[start:position + 1].lstrip()
+                start = position + 1
+                scan = start
+                continue
+            # end if
+
+            if char == "'":
+                # skip to the end of the string, quotes in it are doubled
+                end = buffer.find("'", position + 1)
+
+                while (end != -1) and (buffer[end + 1:end + 2] == "'"):
+                    end = buffer.find("'", end + 2)
+                # end while
+
+                if (end != -1) and ((end + 1 < len(buffer)) or at_end):
+                    scan = end + 1
+                    continue
+                # end if
+
+            elif buffer[position + 1:position + 2] == '*':
+                # skip to the end of the comment
+                end = buffer.find('*/', position + 2)
+
+                if end != -1:
+                    scan = end + 2
+                    continue
+                # end if
+
+            elif (position + 1 < len(buffer)) or at_end:
+                # a slash that does not start a comment
+                scan = position + 1
+                continue
+            # end if
+
+        elif at_end:
+            break
+        # end if
+
+        # more of the file is needed to find the end of the statement
+        if at_end:
+            raise ValueError('The file ends in the middle of a string or comment')
+        # end if
+
+        chunk = stream.read(read_size)
+        at_end = chunk == ''
+
+        if match == None:
+            scan = len(buffer) - start
+        else:
+            scan = position - start
+        # end if
+
+        buffer = buffer[start:] + chunk
+        start = 0
+    # end while
+
+    if buffer[start:].strip() != '':
+        raise ValueError('The file does not end with a complete statement')
+    # end if
+# end def
+
+
+def normalise(statement):
+    """
+    Remove the comments and the whitespace outside strings from a
+    statement.
+
+    @param[in]    statement:       The statement (string).
+    @return       (string)         The statement without them.
+    """
+    if '/*' in statement:
+        return _token.sub(lambda m: m.group(1) or '', statement)
+    # end if
+
+    # the parts between quotes are strings, a doubled quote in a string
+    # gives an empty part
+    parts = statement.split("'")
+    parts[::2] = [''.join(part.split()) for part in parts[::2]]
+
+    return "'".join(parts)
+# end def
+
+
+#
+# ----------------
+# Private Functions
+
+def _number_entities(source, info, unmerged):
+    """
+    Give every entity its new number, merging geometry that is identical
+    once the references in it have been merged. Only references to earlier
+    entities are merged, which is how CAD tools write geometry.
+
+    @param[in]    source:          The STEP file (full path) (string).
+    @param[in]    info:            Collects what is in the file, None to not
+                                   collect it (step_info).
+    @param[in]    unmerged:        The entities that are not to be merged
+                                   (set of ints).
+    @return       (array)          The new number of each entity, indexed by
+                                   its original number.
+    @return       (int)            The number of entities kept.
+    """
+    mapping = array.array('q')
+    seen = {}
+    count = 0
+
+    with open(source, 'r', encoding='latin-1', newline='') as source_file:
+        for statement in read_statements(source_file):
+            statement = normalise(statement)
+            match = _instance.match(statement)
+
+            if info != None:
+                info.add(statement)
+            # end if
+
+            if match == None:
+                continue
+            # end if
+
+            entity_id = int(match.group(1))
+
+            if entity_id > max_entity_id:
+                raise ValueError('Entity #' + str(entity_id) + ' is numbered too high')
+            # end if
+
+            if entity_id >= len(mapping):
+                mapping.extend(bytes(8 * (entity_id + 1 - len(mapping) +
+                                          len(mapping) // 2)))
+            # end if
+
+            if mapping[entity_id] != 0:
+                raise ValueError('Entity #' + str(entity_id) + ' is defined twice')
+            # end if
+
+            body = statement[match.end():]
+            entity_type = body[:body.find('(')]
+
+            if (entity_type in dedup_types) and (entity_id not in unmerged):
+                try:
+                    key = hash(_renumber(body, mapping))
+
+                except ValueError:
+                    # refers to a later entity so cannot be merged
+                    key = None
+                # end try
+
+                if key in seen:
+                    mapping[entity_id] = seen[key]
+                    continue
+                # end if
+
+                if key != None:
+                    seen[key] = count + 1
+                # end if
+            # end if
+
+            count += 1
+            mapping[entity_id] = count
+        # end for
+    # end with
+
+    if info != None:
+        info.finish()
+    # end if
+
+    return mapping, count
+# end def
+
+
+def _renumber(body, mapping):
+    """
+    Replace the references in an entity with the new entity numbers.
+
+    @param[in]    body:            The entity after its number (string).
+    @param[in]    mapping:         The new number of each entity (array).
+    @return       (string)         The entity with new references.
+    """
+    def replace(match):
+        entity_id = int(match.group(1))
+
+        if (entity_id >= len(mapping)) or (mapping[entity_id] == 0):
+            raise ValueError('Reference to #' + match.group(1) +
+                             ' which is not defined yet')
+        # end if
+
+        return '#' + str(mapping[entity_id])
+    # end def
+
+    if '#' not in body:
+        return body
+    # end if
+
+    # references are only outside strings, which are between quotes
+    parts = body.split("'")
+    parts[::2] = [_reference.sub(replace, part) if '#' in part else part
+                  for part in parts[::2]]
+
+    return "'".join(parts)
+# end def
+
+
+def _digest(body):
+    """
+    Hash an entity for checking, independently of the hash used to merge
+    entities.
+
+    @param[in]    body:            The entity (string).
+    @return       (int)            The hash.
+    """
+    return int.from_bytes(hashlib.blake2b(body.encode('latin-1'),
+                                          digest_size=8).digest(),
+                          'little', signed=True)
+# end def
+
+
+def _write_minified(source, destination, mapping, result):
+    """
+    Write the first of each merged entity with its new number and
+    references.
+
+    @param[in]    source:          The STEP file (full path) (string).
+    @param[in]    destination:     The file to write (full path) (string).
+    @param[in]    mapping:         The new number of each entity (array).
+    @param[in]    result:          Counts what is read (minify_result).
+    @return       (set)            The entities that would be twice in a
+                                   list once merged, empty if there are none
+                                   (set of ints).
+    """
+    merged = set()
+    written = 0
+
+    with open(source, 'r', encoding='latin-1', newline='') as source_file, \
+         open(destination, 'w', encoding='latin-1', newline='') as output_file:
+        for statement in read_statements(source_file):
+            result.bytes_in += len(statement)
+            statement = normalise(statement)
+            match = _instance.match(statement)
+
+            if match == None:
+                output_file.write(statement + '\n')
+                continue
+            # end if
+
+            result.entities_in += 1
+            new_id = mapping[int(match.group(1))]
+            body = statement[match.end():]
+            new_body = _renumber(body, mapping)
+            merged |= _merged_references(body, mapping)
+
+            if new_id == written + 1:
+                # the first of its kind, so it is kept
+                output_file.write('#' + str(new_id) + '=' + new_body + '\n')
+                written = new_id
+            # end if
+        # end for
+    # end with
+
+    if written != result.entities_out:
+        raise ValueError('Entities were lost while minifying')
+    # end if
+
+    return merged
+# end def
+
+
+def _merged_references(body, mapping):
+    """
+    Find the references in the lists of an entity that become the same
+    reference once renumbered, such as (#4,#7) becoming (#4,#4). The
+    arguments of an entity are not a list, so they can refer to the same
+    entity twice.
+
+    @param[in]    body:            The entity after its number (string).
+    @param[in]    mapping:         The new number of each entity (array).
+    @return       (set)            The original numbers of the entities,
+                                   empty if there are none (set of ints).
+    """
+    merged = set()
+
+    if body.count('#') < 2:
+        return merged
+    # end if
+
+    # references are only outside strings, which are between quotes
+    outside = ''.join(body.split("'")[::2])
+    references = set(int(entity_id) for entity_id in _reference.findall(outside))
+
+    if len(set(mapping[entity_id] for entity_id in references)) == len(references):
+        # no two references are merged
+        return merged
+    # end if
+
+    # the references directly in each open bracket, None if it is not a list
+    lists = []
+
+    for match in re.finditer(r"#(\d+)|[()]", outside):
+        if match.group(1) != None:
+            if lists[-1] != None:
+                lists[-1].append(int(match.group(1)))
+            # end if
+
+        elif match.group() == '(':
+            # a list starts after a bracket or comma, arguments after a name
+            if (match.start() > 0) and (outside[match.start() - 1] in '(,'):
+                lists.append([])
+            else:
+                lists.append(None)
+            # end if
+
+        else:
+            items = lists.pop()
+
+            if items != None:
+                new_ids = [mapping[entity_id] for entity_id in items]
+
+                if len(set(new_ids)) != len(set(items)):
+                    merged.update(entity_id for entity_id in items
+                                  if new_ids.count(mapping[entity_id]) > 1)
+                # end if
+            # end if
+        # end if
+    # end for
+
+    return merged
+# end def
+
+
+def _verify(source, filename, mapping, count):
+    """
+    Read back a minified file and check it against the original. It must
+    have the same header and its entities numbered from 1, each used by an
+    entity of the original. Every entity of the original, with its
+    references renumbered, must be the same as its minified entity, with no
+    two entities in its lists merged.
+
+    @param[in]    source:          The STEP file (full path) (string).
+    @param[in]    filename:        The minified file (full path) (string).
+    @param[in]    mapping:         The new number of each entity (array).
+    @param[in]    count:           The number of entities kept (int).
+    @return       (int)            The size of the minified file.
+    """
+    digests = array.array('q', bytes(8 * (count + 1)))
+    size = 0
+    written = 0
+    minified_header = []
+
+    with open(filename, 'r', encoding='latin-1', newline='') as minified_file:
+        for statement in read_statements(minified_file):
+            size += len(statement) + 1
+            match = _instance.match(statement)
+
+            if match == None:
+                minified_header.append(statement)
+                continue
+            # end if
+
+            written += 1
+
+            if (int(match.group(1)) != written) or (written > count):
+                raise ValueError('Minified entity #' + match.group(1) +
+                                 ' is not numbered in order')
+            # end if
+
+            digests[written] = _digest(statement[match.end():])
+        # end for
+    # end with
+
+    if written != count:
+        raise ValueError('The minified file does not have every entity')
+    # end if
+
+    used = bytearray(count + 1)
+    header = []
+
+    with open(source, 'r', encoding='latin-1', newline='') as source_file:
+        for statement in read_statements(source_file):
+            statement = normalise(statement)
+            match = _instance.match(statement)
+
+            if match == None:
+                header.append(statement)
+                continue
+            # end if
+
+            new_id = mapping[int(match.group(1))]
+            body = statement[match.end():]
+
+            if ((_digest(_renumber(body, mapping)) != digests[new_id]) or
+                (_merged_references(body, mapping) != set())):
+                raise ValueError('Minified entity #' + str(new_id) +
+                                 ' does not match entity #' + match.group(1))
+            # end if
+
+            used[new_id] = 1
+        # end for
+    # end with
+
+    if (used.count(0) != 1) or (minified_header != header):
+        raise ValueError('The minified file does not match the original')
+    # end if
+
+    return size
+# end def
+
+
+def _arguments(statement):
+    """
+    Split the arguments of a statement, without splitting the lists and
+    strings in them.
+
+    @param[in]    statement:       The statement, normalised (string).
+    @return       (list)           Each argument (list of strings).
+    """
+    parts = statement[statement.find('(') + 1:statement.rfind(')')].split("'")
+    arguments = ['']
+    depth = 0
+
+    for [index, part] in enumerate(parts):
+        if index % 2 == 1:
+            # a string, kept whole
+            arguments[-1] += "'" + part
+            continue
+        # end if
+
+        if index > 0:
+            arguments[-1] += "'"
+        # end if
+
+        for char in part:
+            if (char == ',') and (depth == 0):
+                arguments.append('')
+                continue
+            # end if
+
+            if char == '(':
+                depth += 1
+
+            elif char == ')':
+                depth -= 1
+            # end if
+
+            arguments[-1] += char
+        # end for
+    # end for
+
+    return arguments
+# end def
+
+
+def _strings(text):
+    """
+    Get the values of the strings in some text.
+
+    @param[in]    text:            The text (string).
+    @return       (list)           The strings (list of strings).
+    """
+    return [value.replace("''", "'") for value in re.findall(r"'((?:[^']|'')*)'", text)]
+# end def
+
+
+def _string(text):
+    """
+    Get the value of a string argument.
+
+    @param[in]    text:            The argument (string).
+    @return       (string)         Its value, None if it is not a string.
+    """
+    values = _strings(text)
+
+    if values == []:
+        return None
+    # end if
+
+    return values[0]
+# end def
+
+
+def _complex_types(body):
+    """
+    Get the types a complex entity is made of, such as LENGTH_UNIT,
+    NAMED_UNIT and SI_UNIT.
+
+    @param[in]    body:            The entity after its number (string).
+    @return       (list)           The types (list of strings).
+    """
+    parts = body.split("'")
+    types = []
+    depth = 0
+    name = ''
+
+    # only the names at the top level of the outer brackets are types
+    for part in parts[::2]:
+        for char in part:
+            if char == '(':
+                if (depth == 1) and (name != ''):
+                    types.append(name)
+                # end if
+
+                depth += 1
+                name = ''
+
+            elif char == ')':
+                depth -= 1
+                name = ''
+
+            elif depth == 1:
+                name += char
+            # end if
+        # end for
+    # end for
+
+    return types
+# end def
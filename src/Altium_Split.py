@@ -0,0 +1,484 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Split.py
+
+Package that splits a pdf into a pdf for each of its pages, reading the pdf
+once.
+
+Writing a page with PyPDF2 changes the objects it was read into to refer to
+the writer, so each page used to need the pdf read again to stop it taking
+the previous pages with it. Here each page's objects are copied into its own
+writer instead, so the objects read are never changed and are shared by
+every page. The objects a page uses are copied once however often it uses
+them, and references to other pages, such as the targets of links, are
+dropped rather than bringing those pages along.
+
+Large pdfs are split in worker processes, each reading the pdf once and
+writing a run of its pages. Where every page is given the resources of the
+whole pdf, a page can be written with only those its contents use.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import sys
+sys.path.insert(1, 'src\\')
+import re
+import copy
+import time
+import concurrent.futures
+import multiprocessing
+# PyPDF2 is imported by the functions that use it so that importing this
+# module stays quick
+
+#
+# -------
+# Constants
+
+# the fewest pages worth starting a worker process for
+pages_per_worker = 16
+
+# the resources that a page's contents use by name
+_named_resources = ['/Font', '/XObject', '/ExtGState', '/ColorSpace', '/Pattern',
+                    '/Shading', '/Properties']
+
+# a name in a content stream
+_name_token = re.compile(rb'/[^\s/\[\]()<>{}%]*')
+
+#
+# -------
+# Classes
+
+class split_result:
+    """
+    Class to store the outcome of splitting a pdf.
+
+    @attribute     pages:       The number of pages written (int).
+    @attribute     workers:     The number of processes that wrote them, 0
+                                if they were written by this one (int).
+    @attribute     bytes_in:    The size of the pdf (bytes) (int).
+    @attribute     bytes_out:   The total size of the pdfs written (bytes)
+                                (int).
+    @attribute     elapsed:     How long it took (s) (float).
+    """
+    def __init__(self):
+        """
+        Initialise the split_result class
+        """
+        self.pages = 0
+        self.workers = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.elapsed = 0.0
+    # end def
+
+    def ratio(self):
+        """
+        Get how much bigger the pdfs written are than the pdf.
+
+        @return       (float)          The total size of the pdfs written
+                                       over the size of the pdf.
+        """
+        if self.bytes_in == 0:
+            return 0.0
+        # end if
+
+        return self.bytes_out / float(self.bytes_in)
+    # end def
+# end class
+
+#
+# ----------------
+# Public Functions
+
+def split_pdf(source, pattern, workers = 0, prune = False,
+              per_worker = pages_per_worker):
+    """
+    Write each page of a pdf to its own pdf.
+
+    @param[in]   source:              The pdf (full path) (string).
+    @param[in]   pattern:             The name of each pdf written, with a %
+                                      format for its page number from 1,
+                                      e.g. 'ART%02d.pdf' (full path) (string).
+    @param[in]   workers:             The most processes to write the pages
+                                      in, None to choose from the number of
+                                      pages and processors, 0 to write them
+                                      in this process (int).
+    @param[in]   prune:               True to leave out the fonts, images and
+                                      other resources a page is given but
+                                      does not use, as when every page is 
+                                      given those of the whole pdf (bool).
+    @param[in]   per_worker:          The fewest pages worth starting a 
+                                      worker process for (int).
+    @return      (split_result)       The pages written and their size.
+    """
+    import PyPDF2
+
+    start_time = time.time()
+    result = split_result()
+    result.bytes_in = os.path.getsize(source)
+
+    with open(source, 'rb') as pdf_file:
+        reader = PyPDF2.PdfFileReader(pdf_file)
+        page_count = reader.getNumPages()
+
+        workers = _worker_count(page_count, workers, per_worker)
+
+        if workers < 2:
+            # read once, so write every page from what has been read
+            result.bytes_out = _write_pages(reader, pattern, 0, page_count, prune)
+            result.pages = page_count
+        # end if
+    # end with
+
+    if workers >= 2:
+        # each worker reads the pdf once and writes a run of pages
+        runs = _page_runs(page_count, workers)
+
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(_split_job, source, pattern, first, last, prune)
+                       for [first, last] in runs]
+
+            for future in futures:
+                result.bytes_out += future.result()
+            # end for
+        # end with
+
+        result.pages = page_count
+        result.workers = workers
+    # end if
+
+    result.elapsed = time.time() - start_time
+
+    return result
+# end def
+
+
+#
+# ----------------
+# Private Functions
+
+def _worker_count(page_count, workers, per_worker):
+    """
+    Get the number of processes to split a pdf in.
+
+    @param[in]   page_count:          The number of pages (int).
+    @param[in]   workers:             The most processes, None to choose
+                                      (int).
+    @param[in]   per_worker:          The fewest pages for a process (int).
+    @return      (int)                The number of processes, 0 or 1 to
+                                      split it in this process.
+    """
+    if workers == None:
+        workers = os.cpu_count() or 1
+    # end if
+
+    if multiprocessing.current_process().daemon:
+        # a worker of a pool cannot start processes of its own
+        return 0
+    # end if
+
+    return max(0, min(workers, page_count // max(1, per_worker)))
+# end def
+
+
+def _page_runs(page_count, workers):
+    """
+    Share the pages of a pdf between processes in runs of pages, so that
+    each only reads the parts of the pdf its pages use.
+
+    @param[in]   page_count:          The number of pages (int).
+    @param[in]   workers:             The number of processes (int).
+    @return      (list of lists)      The first page and the page after the
+                                      last of each run, from 0.
+    """
+    runs = []
+
+    for index in range(workers):
+        first = (page_count * index) // workers
+        last = (page_count * (index + 1)) // workers
+
+        if last > first:
+            runs.append([first, last])
+        # end if
+    # end for
+
+    return runs
+# end def
+
+
+def _split_job(source, pattern, first, last, prune):
+    """
+    Write a run of the pages of a pdf in a worker process.
+
+    @param[in]   source:              The pdf (full path) (string).
+    @param[in]   pattern:             The name of each pdf written (string).
+    @param[in]   first:               The first page, from 0 (int).
+    @param[in]   last:                The page after the last one (int).
+    @param[in]   prune:               True to leave out unused resources
+                                      (bool).
+    @return      (int)                The total size of the pdfs written
+                                      (bytes).
+    """
+    import PyPDF2
+
+    with open(source, 'rb') as pdf_file:
+        return _write_pages(PyPDF2.PdfFileReader(pdf_file), pattern, first, last,
+                            prune)
+    # end with
+# end def
+
+
+def _write_pages(reader, pattern, first, last, prune = False):
+    """
+    Write a run of the pages of a pdf that has been read, each to its own
+    pdf.
+
+    @param[in]   reader:              The pdf (PyPDF2.PdfFileReader).
+    @param[in]   pattern:             The name of each pdf written (string).
+    @param[in]   first:               The first page, from 0 (int).
+    @param[in]   last:                The page after the last one (int).
+    @param[in]   prune:               True to leave out unused resources
+                                      (bool).
+    @return      (int)                The total size of the pdfs written
+                                      (bytes).
+    """
+    import PyPDF2
+
+    # every page, so that references to other pages can be dropped
+    page_keys = set()
+
+    for number in range(reader.getNumPages()):
+        reference = reader.getPage(number).indirectRef
+
+        if reference != None:
+            page_keys.add((reference.idnum, reference.generation))
+        # end if
+    # end for
+
+    bytes_out = 0
+
+    for number in range(first, last):
+        output = PyPDF2.PdfFileWriter()
+        _copy_page(output, reader, reader.getPage(number), page_keys, prune)
+
+        filename = pattern % (number + 1)
+
+        with open(filename, 'wb') as output_file:
+            output.write(output_file)
+            bytes_out += output_file.tell()
+        # end with
+    # end for
+
+    return bytes_out
+# end def
+
+
+def _copy_page(writer, reader, page, page_keys, prune = False):
+    """
+    Add a copy of a page and the objects it uses to a writer, leaving the
+    objects that were read unchanged.
+
+    @param[in]   writer:              The pdf to add the page to
+                                      (PyPDF2.PdfFileWriter).
+    @param[in]   reader:              The pdf the page is from
+                                      (PyPDF2.PdfFileReader).
+    @param[in]   page:                The page (PyPDF2.pdf.PageObject).
+    @param[in]   page_keys:           The object number and generation of
+                                      every page of the pdf (set of tuples).
+    @param[in]   prune:               True to leave out unused resources
+                                      (bool).
+    """
+    from PyPDF2.pdf import PageObject
+    from PyPDF2.generic import NameObject
+
+    new_page = PageObject(writer)
+    new_page[NameObject('/Type')] = NameObject('/Page')
+    writer.addPage(new_page)
+
+    # objects that refer back to the page refer to the copy
+    copied = {}
+    page_reference = writer.getObject(writer._pages)['/Kids'][-1]
+
+    if page.indirectRef != None:
+        copied[(page.indirectRef.idnum, page.indirectRef.generation)] = page_reference
+    # end if
+
+    for [key, value] in list(page.items()):
+        if prune and (key == '/Resources'):
+            value = _used_resources(page)
+        # end if
+
+        if key not in ['/Parent', '/Type']:
+            new_page[NameObject(key)] = _copy_object(writer, reader, value,
+                                                     copied, page_keys)
+        # end if
+    # end for
+# end def
+
+
+def _used_resources(page):
+    """
+    Get the resources of a page without those its contents do not name. The
+    resources that were read are not changed.
+
+    @param[in]   page:                The page (PyPDF2.pdf.PageObject).
+    @return      (PyPDF2.generic.DictionaryObject) The resources used, or all
+                                      of them if what is used cannot be told.
+    """
+    from PyPDF2.generic import DictionaryObject, ArrayObject, NameObject
+
+    resources = page['/Resources'].getObject()
+    contents = page.get('/Contents')
+
+    if contents == None:
+        return resources
+    # end if
+
+    contents = contents.getObject()
+
+    if not isinstance(contents, ArrayObject):
+        contents = [contents]
+    # end if
+
+    names = set()
+
+    for stream in contents:
+        names.update(_name_of(name) for name in _name_token.findall(stream.getObject().getData()))
+    # end for
+
+    used = DictionaryObject()
+
+    for [category, value] in list(resources.items()):
+        value = value.getObject()
+
+        if category not in _named_resources:
+            # such as the procedure sets, which are not named
+            used[NameObject(category)] = value
+            continue
+        # end if
+
+        kept = DictionaryObject()
+
+        for [name, resource] in list(value.items()):
+            # a name that is not ascii may be written another way, so is kept
+            if name.isascii() and (_name_of(name.encode('ascii')) not in names):
+                continue
+            # end if
+
+            target = resource.getObject()
+
+            if ((category == '/XObject') and (target.get('/Subtype') == '/Form') and
+                ('/Resources' not in target)):
+                # a form that uses the resources of the page it is on
+                return resources
+            # end if
+
+            kept[NameObject(name)] = resource
+        # end for
+
+        used[NameObject(category)] = kept
+    # end for
+
+    return used
+# end def
+
+
+def _name_of(token):
+    """
+    Get a name as it is written in a content stream or resources, without
+    its slash and with any #xx escapes replaced.
+
+    @param[in]   token:               The name (bytes).
+    @return      (bytes)              The name.
+    """
+    return re.sub(rb'#([0-9A-Fa-f]{2})', lambda m: bytes([int(m.group(1), 16)]),
+                  token.lstrip(b'/'))
+# end def
+
+
+def _copy_object(writer, reader, value, copied, page_keys):
+    """
+    Copy an object that was read, and the objects it refers to, into a
+    writer. An object is only copied once for each writer.
+
+    @param[in]   writer:              The pdf to copy into
+                                      (PyPDF2.PdfFileWriter).
+    @param[in]   reader:              The pdf the object is from
+                                      (PyPDF2.PdfFileReader).
+    @param[in]   value:               The object (PyPDF2.generic.PdfObject).
+    @param[in]   copied:              The writer's copies of the objects read,
+                                      keyed by object number and generation
+                                      (dict).
+    @param[in]   page_keys:           The object number and generation of
+                                      every page of the pdf (set of tuples).
+    @return      (PyPDF2.generic.PdfObject) The copy.
+    """
+    from PyPDF2.generic import (IndirectObject, DictionaryObject, ArrayObject,
+                                StreamObject, NameObject, NullObject)
+
+    if isinstance(value, IndirectObject):
+        key = (value.idnum, value.generation)
+
+        if key in copied:
+            return copied[key]
+        # end if
+
+        if key in page_keys:
+            # another page, which is not in this pdf
+            return NullObject()
+        # end if
+
+        # make the reference before copying, as objects may refer back to it
+        reference = writer._addObject(NullObject())
+        copied[key] = reference
+        writer._objects[reference.idnum - 1] = _copy_object(
+            writer, reader, reader.getObject(value), copied, page_keys)
+
+        return reference
+
+    elif isinstance(value, StreamObject):
+        # the stream data is never changed, so it is shared
+        new_value = copy.copy(value)
+
+        for [key, item] in list(value.items()):
+            new_value[NameObject(key)] = _copy_object(writer, reader, item,
+                                                      copied, page_keys)
+        # end for
+
+        return new_value
+
+    elif isinstance(value, DictionaryObject):
+        new_value = DictionaryObject()
+
+        for [key, item] in list(value.items()):
+            new_value[NameObject(key)] = _copy_object(writer, reader, item,
+                                                      copied, page_keys)
+        # end for
+
+        return new_value
+
+    elif isinstance(value, ArrayObject):
+        return ArrayObject([_copy_object(writer, reader, item, copied, page_keys)
+                            for item in value])
+    # end if
+
+    # numbers, names and strings are not changed by writing
+    return value
+# end def
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Startup.py
+
+Package that measures how long the Altium Documentation module takes to
+import and checks it against a budget, so that a change which makes every
+run start more slowly is noticed.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import sys
+import subprocess
+
+#
+# -------
+# Constants
+
+# the module the entry point imports to generate a deliverable
+entry_module = 'Altium_Build'
+
+# the longest the entry module may take to import (seconds)
+import_budget = 1.0
+
+# libraries that must only be imported by the stages that use them
+deferred_modules = ['gspread', 'pydrive', 'oauth2client', 'httplib2',
+                    'PyPDF2', 'pdfminer', 'openpyxl', 'xlrd']
+
+#
+# ----------------
+# Public Functions
+
+def measure_imports(prog_dir, module = entry_module):
+    """
+    Import a module in a fresh interpreter and record the time taken by
+    every module it imports.
+
+    @param[in]    prog_dir:        The directory this program is installed in
+                                   (full path) (string).
+    @param[in]    module:          The module to import (string).
+    @return       (list)           The name, own time (us), cumulative time
+                                   (us) and nesting depth of each module
+                                   imported, in the order they finished.
+    """
+    code = ('import sys; sys.path.insert(1, ' + repr(prog_dir + '\\src\\') +
+            '); import ' + module)
+
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                             universal_newlines=True, cwd=prog_dir)
+
+    if process.returncode != 0:
+        raise RuntimeError('Could not import ' + module + ':\n' + process.stderr)
+    # end if
+
+    imports = []
+
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        # end if
+
+        fields = line[len('import time:'):].split('|')
+
+        try:
+            self_time = int(fields[0])
+            cumulative = int(fields[1])
+
+        except (IndexError, ValueError):
+            # the header line
+            continue
+        # end try
+
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append([name.strip(), self_time, cumulative, depth])
+    # end for
+
+    return imports
+# end def
+
+
+def format_report(imports, module = entry_module, count = 20):
+    """
+    Format the slowest imports as a table.
+
+    @param[in]    imports:         The imports measured (list).
+    @param[in]    module:          The module imported (string).
+    @param[in]    count:           The number of imports to list (int).
+    @return       (string)         The report.
+    """
+    lines = ['=========   Import Time Report   ===========\n',
+             'Total: \t\t' + '%.3f' % (total_time(imports, module)) + ' s\n',
+             'Modules: \t' + str(len(imports)) + '\n\n',
+             'cumulative (ms)\tself (ms)\tmodule\n']
+
+    for [name, self_time, cumulative, depth] in sorted(imports,
+                                                      key=lambda i: -i[2])[:count]:
+        lines.append('%15.1f\t%9.1f\t' % (cumulative / 1000.0, self_time / 1000.0) +
+                     '  ' * depth + name + '\n')
+    # end for
+
+    return ''.join(lines)
+# end def
+
+
+def total_time(imports, module = entry_module):
+    """
+    Get the total time taken to import a module, including everything it
+    imports.
+
+    @param[in]    imports:         The imports measured (list).
+    @param[in]    module:          The module imported (string).
+    @return       (float)          The time taken in seconds.
+    """
+    return sum(i[2] for i in imports if i[3] == 0 and i[0] == module) / 1000000.0
+# end def
+
+
+def check_budget(prog_dir, budget = import_budget, module = entry_module,
+                 repeat = 3):
+    """
+    Check that a module imports within the budget and does not load any of
+    the libraries that are deferred until they are needed. The fastest of
+    several imports is used as the first is slowed by cold disk caches.
+
+    @param[in]    prog_dir:        The directory this program is installed in
+                                   (full path) (string).
+    @param[in]    budget:          The longest the import may take (seconds)
+                                   (float).
+    @param[in]    module:          The module to import (string).
+    @param[in]    repeat:          The number of times to import it (int).
+    @return       (list)           The fastest import measured (list).
+    @return       (list)           A description of each problem found, empty
+                                   if the module is within budget (list of
+                                   strings).
+    """
+    runs = [measure_imports(prog_dir, module) for i in range(repeat)]
+    imports = min(runs, key=lambda run: total_time(run, module))
+
+    problems = []
+
+    if total_time(imports, module) > budget:
+        problems.append('Importing ' + module + ' took ' + '%.3f' % total_time(imports, module) +
+                        ' s, the budget is ' + '%.3f' % budget + ' s')
+    # end if
+
+    names = set(i[0] for i in imports)
+
+    for deferred in deferred_modules:
+        if deferred in names:
+            problems.append('Importing ' + module + ' also imports ' + deferred +
+                            ', which should only be imported when it is used')
+        # end if
+    # end for
+
+    return imports, problems
+# end def
@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Store.py
+
+Package that keeps one copy of each delivered file, named by the SHA-256 of
+its contents, so that the deliverables of every revision of a project can
+share the files that have not changed.
+
+The files in a deliverable are reflinks to the stored copy where the file
+system supports them, and hard links otherwise, so an unchanged file costs
+neither the time to copy it nor the space. Only files that are never changed
+after they are copied may be linked, as changing a hard link changes the
+stored copy.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+
+#
+# -------
+# Constants
+
+# the name of the store in the project folder
+store_dirname = 'Deliverable_store'
+
+# the file listing the hash of each source file, so that an unchanged file
+# is not read again
+index_filename = 'index.txt'
+
+# the amount of a file read at a time (bytes)
+block_size = 1024*1024
+
+# the ioctl that makes a reflink on linux
+_ficlone = 0x40049409
+
+#
+# -------
+# Classes
+
+class content_store:
+    """
+    Class to store files by the hash of their contents and link copies to
+    them. It can be used from several threads, and a copy sent to a worker
+    process adds to the same store.
+
+    @attribute     directory:  The folder of the store (full path) (string).
+    """
+    def __init__(self, directory):
+        """
+        Initialise the content_store class
+
+        @param[in]     directory:  The folder of the store, created if it does
+                                   not exist (full path) (string).
+        """
+        self.directory = directory
+        self._index = None
+        self._lock = threading.Lock()
+
+        os.makedirs(directory + '\\objects', exist_ok = True)
+    # end def
+
+    def __getstate__(self):
+        # a worker process reads the index again when it first needs it
+        state = dict(self.__dict__)
+        state['_index'] = None
+        del state['_lock']
+        return state
+    # end def
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    # end def
+
+    def object_path(self, digest):
+        """
+        Get where the file with a hash is stored.
+
+        @param[in]    digest:          The SHA-256 of the file (hex string).
+        @return       (string)         The stored file (full path).
+        """
+        return self.directory + '\\objects\\' + digest[:2] + '\\' + digest
+    # end def
+
+    def link(self, source, destination):
+        """
+        Copy a file by linking it to its stored copy, storing it first if it
+        is not already.
+
+        @param[in]    source:          The file to copy (full path) (string).
+        @param[in]    destination:     The file to create, replaced if it
+                                       exists (full path) (string).
+        @return       (string)         How the copy was made: reflink,
+                                       hardlink or copy.
+        """
+        stat = os.stat(source)
+        key = (os.path.normcase(os.path.abspath(source)), stat.st_size, 
+               stat.st_mtime_ns)
+        digest = self._lookup(key)
+
+        if (digest == None) or (not self._contains(digest, stat.st_size)):
+            digest = self._add(source)
+            self._record(key, digest)
+        # end if
+
+        if os.path.lexists(destination):
+            os.remove(destination)
+        # end if
+
+        return _place(self.object_path(digest), destination)
+    # end def
+
+    def _lookup(self, key):
+        """
+        Get the hash of a source file from the index.
+
+        @param[in]    key:             The path, size and modification time of
+                                       the file (tuple).
+        @return       (string)         The hash, None if the file has not been
+                                       stored as it is now.
+        """
+        with self._lock:
+            if self._index == None:
+                self._index = _load_index(self.directory + '\\' + index_filename)
+            # end if
+
+            return self._index.get(key)
+        # end with
+    # end def
+
+    def _record(self, key, digest):
+        """
+        Add a source file to the index. The index is only ever appended to,
+        so that worker processes can add to it at the same time.
+
+        @param[in]    key:             The path, size and modification time of
+                                       the file (tuple).
+        @param[in]    digest:          The hash of the file (hex string).
+        """
+        [path, size, mtime] = key
+
+        with self._lock:
+            self._index[key] = digest
+
+            try:
+                with open(self.directory + '\\' + index_filename, 'a', 
+                          encoding = 'utf-8') as index_file:
+                    index_file.write(digest + ' ' + str(size) + ' ' + str(mtime) + 
+                                     ' ' + path + '\n')
+                # end with
+
+            except (IOError, OSError):
+                # the file is hashed again next time
+                pass
+            # end try
+        # end with
+    # end def
+
+    def _contains(self, digest, size):
+        """
+        Determine if a file is in the store.
+
+        @param[in]    digest:          The hash of the file (hex string).
+        @param[in]    size:            The size of the file (int).
+        @return       (bool)           True if it is stored.
+        """
+        path = self.object_path(digest)
+
+        return os.path.isfile(path) and (os.path.getsize(path) == size)
+    # end def
+
+    def _add(self, source):
+        """
+        Store a file, hashing it as it is copied so that it is only read
+        once.
+
+        @param[in]    source:          The file to store (full path) (string).
+        @return       (string)         Its hash (hex string).
+        """
+        sha = hashlib.sha256()
+        [handle, temp_path] = tempfile.mkstemp(dir = self.directory + '\\objects')
+
+        try:
+            with open(source, 'rb') as source_file, \
+                 os.fdopen(handle, 'wb') as temp_file:
+                block = source_file.read(block_size)
+
+                while block:
+                    sha.update(block)
+                    temp_file.write(block)
+                    block = source_file.read(block_size)
+                # end while
+            # end with
+
+            digest = sha.hexdigest()
+            path = self.object_path(digest)
+
+            if self._contains(digest, os.path.getsize(temp_path)):
+                # stored already
+                os.remove(temp_path)
+
+            else:
+                os.makedirs(self.directory + '\\objects\\' + digest[:2], 
+                            exist_ok = True)
+                os.replace(temp_path, path)
+            # end if
+
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            # end if
+
+            raise
+        # end try
+
+        return digest
+    # end def
+# end class
+
+
+#
+# ----------------
+# Private Functions
+
+def _load_index(filename):
+    """
+    Read the hash of every source file stored so far.
+
+    @param[in]    filename:        The index file (full path) (string).
+    @return       (dict)           The hash of each file keyed by its path,
+                                   size and modification time.
+    """
+    index = {}
+
+    try:
+        with open(filename, 'r', encoding = 'utf-8') as index_file:
+            for line in index_file:
+                fields = line.rstrip('\n').split(' ', 3)
+
+                if (len(fields) != 4) or (len(fields[0]) != 64):
+                    # written while another process was writing
+                    continue
+                # end if
+
+                try:
+                    key = (fields[3], int(fields[1]), int(fields[2]))
+
+                except ValueError:
+                    continue
+                # end try
+
+                index[key] = fields[0]
+            # end for
+        # end with
+
+    except (IOError, OSError):
+        pass
+    # end try
+
+    return index
+# end def
+
+
+def _place(stored, destination):
+    """
+    Make a file that has the contents of a stored file, without copying them
+    if the file system allows.
+
+    @param[in]    stored:          The stored file (full path) (string).
+    @param[in]    destination:     The file to create (full path) (string).
+    @return       (string)         How it was made: reflink, hardlink or copy.
+    """
+    if _reflink(stored, destination):
+        return 'reflink'
+    # end if
+
+    try:
+        os.link(stored, destination)
+        return 'hardlink'
+
+    except (OSError, AttributeError, NotImplementedError):
+        # another drive, a file system without links or too many links
+        shutil.copyfile(stored, destination)
+        return 'copy'
+    # end try
+# end def
+
+
+def _reflink(stored, destination):
+    """
+    Make a copy on write clone of a file, which shares its contents until
+    either is changed. Only linux file systems such as btrfs and xfs are
+    supported.
+
+    @param[in]    stored:          The stored file (full path) (string).
+    @param[in]    destination:     The file to create (full path) (string).
+    @return       (bool)           True if the clone was made.
+    """
+    try:
+        import fcntl
+
+    except ImportError:
+        # windows
+        return False
+    # end try
+
+    try:
+        with open(stored, 'rb') as stored_file, \
+             open(destination, 'wb') as destination_file:
+            fcntl.ioctl(destination_file.fileno(), _ficlone, stored_file.fileno())
+        # end with
+
+    except (IOError, OSError):
+        if os.path.exists(destination):
+            os.remove(destination)
+        # end if
+
+        return False
+    # end try
+
+    return True
+# end def
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_TextCache.py
+
+Package that remembers the text extracted from each page of a pdf, keyed by
+the SHA-256 of the pdf and the version of the extractor, so that a pdf that
+has not changed since it was last read is not read again.
+
+The cache is an SQLite database shared by every project. When it grows past
+its size the pdfs used least recently are removed from it.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import time
+import hashlib
+import sqlite3
+
+#
+# -------
+# Constants
+
+# the cache, shared by every project
+cache_filename = os.path.join(os.path.expanduser('~'),
+                              '.altium_docs_text_cache.sqlite')
+
+# the most text kept in the cache (bytes)
+cache_size = 64*1024*1024
+
+# the amount of a file read at a time (bytes)
+block_size = 1024*1024
+
+# how long to wait for another process using the cache (s)
+_timeout = 30
+
+_schema = ['CREATE TABLE IF NOT EXISTS documents (digest TEXT, extractor TEXT, '
+           'page_count INTEGER, size INTEGER, last_used REAL, '
+           'PRIMARY KEY (digest, extractor))',
+           'CREATE TABLE IF NOT EXISTS pages (digest TEXT, extractor TEXT, '
+           'page INTEGER, text BLOB, PRIMARY KEY (digest, extractor, page))']
+
+#
+# -------
+# Classes
+
+class text_cache:
+    """
+    Class to store the text of the pages of pdfs. A database connection is
+    made for each use, so it can be used from several threads and sent to
+    worker processes.
+
+    @attribute     filename:   The database (full path) (string).
+    @attribute     max_size:   The most text kept (bytes) (int).
+    """
+    def __init__(self, filename = cache_filename, max_size = cache_size):
+        """
+        Initialise the text_cache class
+
+        @param[in]     filename:   The database, created when it is first
+                                   written to (full path) (string).
+        @param[in]     max_size:   The most text kept (bytes) (int).
+        """
+        self.filename = filename
+        self.max_size = max_size
+    # end def
+
+    def digest(self, path):
+        """
+        Get the key of a pdf.
+
+        @param[in]    path:            The pdf (full path) (string).
+        @return       (string)         The SHA-256 of the pdf (hex string).
+        """
+        digest = hashlib.sha256()
+
+        with open(path, 'rb') as pdf_file:
+            for block in iter(lambda: pdf_file.read(block_size), b''):
+                digest.update(block)
+            # end for
+        # end with
+
+        return digest.hexdigest()
+    # end def
+
+    def get(self, digest, extractor):
+        """
+        Get the pages of a pdf that have been read before, marking the pdf as
+        used.
+
+        @param[in]    digest:          The SHA-256 of the pdf (hex string).
+        @param[in]    extractor:       The extractor and its settings (string).
+        @return       (dict)           The text of each page read before keyed
+                                       by page number from 0 (dict of bytes).
+        @return       (int)            The number of pages in the pdf, None if
+                                       its last page has not been read.
+        """
+        if not os.path.isfile(self.filename):
+            return {}, None
+        # end if
+
+        try:
+            connection = self._connect()
+
+            try:
+                with connection:
+                    row = connection.execute(
+                        'SELECT page_count FROM documents WHERE digest = ? AND extractor = ?',
+                        (digest, extractor)).fetchone()
+
+                    if row == None:
+                        return {}, None
+                    # end if
+
+                    pages = dict(connection.execute(
+                        'SELECT page, text FROM pages WHERE digest = ? AND extractor = ?',
+                        (digest, extractor)).fetchall())
+
+                    connection.execute(
+                        'UPDATE documents SET last_used = ? WHERE digest = ? AND extractor = ?',
+                        (time.time(), digest, extractor))
+                # end with
+
+            finally:
+                connection.close()
+            # end try
+
+        except sqlite3.Error:
+            # the pdf is read instead
+            return {}, None
+        # end try
+
+        return dict((page, bytes(text)) for [page, text] in pages.items()), row[0]
+    # end def
+
+    def put(self, digest, extractor, pages, page_count = None):
+        """
+        Add the pages of a pdf that have been read, removing the pdfs used
+        least recently if the cache is then too big.
+
+        @param[in]    digest:          The SHA-256 of the pdf (hex string).
+        @param[in]    extractor:       The extractor and its settings (string).
+        @param[in]    pages:           The text of each page read keyed by
+                                       page number from 0 (dict of bytes).
+        @param[in]    page_count:      The number of pages in the pdf, None if
+                                       its last page was not read (int).
+        """
+        try:
+            connection = self._connect()
+
+            try:
+                with connection:
+                    connection.executemany(
+                        'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)',
+                        [(digest, extractor, page, text) for [page, text] in pages.items()])
+
+                    row = connection.execute(
+                        'SELECT page_count FROM documents WHERE digest = ? AND extractor = ?',
+                        (digest, extractor)).fetchone()
+
+                    if (page_count == None) and (row != None):
+                        page_count = row[0]
+                    # end if
+
+                    size = connection.execute(
+                        'SELECT SUM(LENGTH(text)) FROM pages WHERE digest = ? AND extractor = ?',
+                        (digest, extractor)).fetchone()[0]
+
+                    connection.execute(
+                        'INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)',
+                        (digest, extractor, page_count, size or 0, time.time()))
+
+                    self._evict(connection)
+                # end with
+
+            finally:
+                connection.close()
+            # end try
+
+        except sqlite3.Error as error:
+            print('*** Warning: Could not save to the text cache (' + str(error) + ') ***')
+        # end try
+    # end def
+
+    def _connect(self):
+        """
+        Open the database, creating its tables if it is new.
+
+        @return       (sqlite3.Connection) The connection.
+        """
+        connection = sqlite3.connect(self.filename, timeout = _timeout)
+
+        with connection:
+            for statement in _schema:
+                connection.execute(statement)
+            # end for
+        # end with
+
+        return connection
+    # end def
+
+    def _evict(self, connection):
+        """
+        Remove the pdfs used least recently until the cache is no bigger than
+        max_size.
+
+        @param[in]    connection:      The open database (sqlite3.Connection).
+        """
+        total = connection.execute('SELECT SUM(size) FROM documents').fetchone()[0] or 0
+
+        if total <= self.max_size:
+            return
+        # end if
+
+        documents = connection.execute(
+            'SELECT digest, extractor, size FROM documents ORDER BY last_used').fetchall()
+
+        for [digest, extractor, size] in documents:
+            if total <= self.max_size:
+                break
+            # end if
+
+            connection.execute('DELETE FROM pages WHERE digest = ? AND extractor = ?',
+                               (digest, extractor))
+            connection.execute('DELETE FROM documents WHERE digest = ? AND extractor = ?',
+                               (digest, extractor))
+            total -= size
+        # end for
+    # end def
+# end class
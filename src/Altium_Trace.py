@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Trace.py
+
+Package that records how long each stage and step of a run takes, in the
+trace event format that chrome://tracing and Perfetto can display.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import sys
+import json
+import time
+import threading
+
+#
+# -------
+# Classes
+
+class tracer:
+    """
+    Class to collect the trace events of a run.
+
+    @attribute     filename:   The file to save the trace to, None if the run
+                               is not being traced (string).
+    @attribute     events:     The events recorded so far (list of dict).
+    """
+    def __init__(self, filename = None):
+        """
+        Initialise the tracer class
+
+        @param[in]     filename:   The file to save the trace to, None to not
+                                   record anything (string).
+        """
+        self.filename = filename
+        self.events = []
+        self._lock = threading.Lock()
+    # end def
+
+    def __getstate__(self):
+        # a copy sent to a worker process starts with no events of its own
+        state = dict(self.__dict__)
+        state['events'] = []
+        del state['_lock']
+        return state
+    # end def
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    # end def
+
+    def enabled(self):
+        """
+        Determine if the run is being traced.
+
+        @return       (bool)           True if events are being recorded.
+        """
+        return self.filename != None
+    # end def
+
+    def span(self, name, category = 'step', **args):
+        """
+        Time a block of code, for use in a with statement.
+
+        @param[in]    name:            The name of the event (string).
+        @param[in]    category:        The category of the event, such as stage
+                                       or copy (string).
+        @param[in]    args:            Details to show with the event.
+        @return       (span)           The span, add_bytes can be called on it
+                                       to record the bytes processed.
+        """
+        return span(self, name, category, args)
+    # end def
+
+    def add_events(self, events):
+        """
+        Add events recorded elsewhere, such as in a worker process.
+
+        @param[in]    events:          The events (list of dict).
+        """
+        if not self.enabled():
+            return
+        # end if
+
+        with self._lock:
+            self.events.extend(events)
+        # end with
+    # end def
+
+    def save(self):
+        """
+        Write the trace file, if the run is being traced.
+        """
+        if not self.enabled():
+            return
+        # end if
+
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e['ts'])
+        # end with
+
+        try:
+            with open(self.filename, 'w') as trace_file:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'},
+                          trace_file)
+            # end with
+
+        except (IOError, OSError):
+            print('*** Warning: Could not save the trace file ***')
+        # end try
+    # end def
+# end class
+
+
+class span:
+    """
+    Class to time one event of a trace.
+
+    @attribute     name:       The name of the event (string).
+    @attribute     category:   The category of the event (string).
+    @attribute     args:       Details to show with the event (dict).
+    """
+    def __init__(self, owner, name, category, args):
+        """
+        Initialise the span class
+
+        @param[in]     owner:      The tracer to record the event with
+                                   (tracer).
+        @param[in]     name:       The name of the event (string).
+        @param[in]     category:   The category of the event (string).
+        @param[in]     args:       Details to show with the event (dict).
+        """
+        self.name = name
+        self.category = category
+        self.args = args
+        self._owner = owner
+        self._start = None
+    # end def
+
+    def add_bytes(self, count):
+        """
+        Record bytes processed during the event.
+
+        @param[in]     count:      The number of bytes (int).
+        """
+        self.args['bytes'] = self.args.get('bytes', 0) + count
+    # end def
+
+    def __enter__(self):
+        self._start = time.time()
+        return self
+    # end def
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        end = time.time()
+
+        if not self._owner.enabled():
+            return False
+        # end if
+
+        self.args['peak_rss'] = peak_rss()
+
+        if exc_type != None:
+            self.args['error'] = exc_type.__name__
+        # end if
+
+        # times are in microseconds since the epoch so that events from
+        # worker processes line up
+        event = {'name': self.name,
+                 'cat': self.category,
+                 'ph': 'X',
+                 'ts': int(self._start * 1000000),
+                 'dur': int((end - self._start) * 1000000),
+                 'pid': os.getpid(),
+                 'tid': threading.get_ident(),
+                 'args': self.args}
+
+        with self._owner._lock:
+            self._owner.events.append(event)
+        # end with
+
+        return False
+    # end def
+# end class
+
+
+#
+# ----------------
+# Public Functions
+
+def peak_rss():
+    """
+    Get the largest amount of memory this process has used so far.
+
+    @return       (int)            The peak resident set size in bytes, None if
+                                   it cannot be determined.
+    """
+    try:
+        import resource
+
+    except ImportError:
+        # windows
+        return _windows_peak_rss()
+    # end try
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if sys.platform == 'darwin':
+        return peak
+    # end if
+
+    # linux reports kilobytes
+    return peak * 1024
+# end def
+
+
+#
+# ----------------
+# Private Functions
+
+def _windows_peak_rss():
+    """
+    Get the peak working set of this process on windows.
+
+    @return       (int)            The peak working set in bytes, None if it
+                                   cannot be determined.
+    """
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+    except ImportError:
+        return None
+    # end try
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD),
+                    ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t),
+                    ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t),
+                    ('PeakPagefileUsage', ctypes.c_size_t)]
+    # end class
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+
+    try:
+        kernel32 = ctypes.WinDLL('kernel32')
+        psapi = ctypes.WinDLL('psapi')
+
+        # declare the handle type so that it is not truncated on 64 bit
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE,
+                                               ctypes.POINTER(PROCESS_MEMORY_COUNTERS),
+                                               wintypes.DWORD]
+
+        if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(),
+                                          ctypes.byref(counters), counters.cb):
+            return None
+        # end if
+
+    except (AttributeError, OSError):
+        return None
+    # end try
+
+    return counters.PeakWorkingSetSize
+# end def
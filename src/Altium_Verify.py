@@ -0,0 +1,668 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Verify.py
+
+Package that checks the deliverable archives under a directory, several at a
+time, without extracting them.
+
+Every member of each archive, and of the zips nested in it, is read to check
+its CRC. Stored nested zips are read in place from the archive, others are
+decompressed into memory. The archive must have the layout that
+construct_root_archive gives it, and where it has a MANIFEST every file must
+match its size, CRC-32 and SHA-256.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import sys
+sys.path.insert(1, 'src\\')
+import re
+import io
+import time
+import struct
+import zlib
+import hashlib
+import zipfile
+import tempfile
+import traceback
+import multiprocessing
+import Altium_Archive
+
+#
+# -------
+# Constants
+
+# the end of the name of a deliverable archive
+archive_suffix = '_Folder.zip'
+
+# the date and time a deliverable archive name starts with, if it has one
+_date_prefix = re.compile(r'^\d{8}_\d{4}_')
+
+# the log file added to a deliverable archive
+log_filename = 'Deliverable_log.txt'
+
+# the folder of Altium files
+altium_folder = 'Altium Files'
+
+# the amount of a member read at a time (bytes)
+block_size = 1024*1024
+
+# nested zips that are compressed are held in memory up to this size, and
+# on disk above it (bytes)
+spool_size = 256*1024*1024
+
+# the signature and size of the local header of a zip member
+_local_signature = b'PK\x03\x04'
+_local_header_size = 30
+
+#
+# -------
+# Classes
+
+class verify_result:
+    """
+    Class to store the outcome of checking one archive.
+
+    @attribute     archive:    The archive (full path) (string).
+    @attribute     part_number: The part number and revision in its name
+                               (string).
+    @attribute     files:      The number of files checked, including those
+                               in nested zips (int).
+    @attribute     size:       The size of the files checked (int).
+    @attribute     manifest:   Whether it has a MANIFEST (bool).
+    @attribute     reproducible: Whether it was made in reproducible mode, 
+                               which leaves out the log (bool).
+    @attribute     problems:   What is wrong with it (list of strings).
+    @attribute     warnings:   What is unusual about it (list of strings).
+    @attribute     elapsed:    The time taken in seconds (float).
+    """
+    def __init__(self, archive):
+        """
+        Initialise the verify_result class
+
+        @param[in]     archive:    The archive (full path) (string).
+        """
+        self.archive = archive
+        self.part_number = part_number_of(archive)
+        self.files = 0
+        self.size = 0
+        self.manifest = False
+        self.reproducible = False
+        self.problems = []
+        self.warnings = []
+        self.elapsed = 0.0
+    # end def
+# end class
+
+
+class file_window:
+    """
+    Class to read part of a file as though it were a whole file, such as a
+    zip stored in another zip.
+    """
+    def __init__(self, stream, start, size):
+        """
+        Initialise the file_window class
+
+        @param[in]     stream:     The file the part is in, opened for reading
+                                   (file object).
+        @param[in]     start:      Where the part starts in it (int).
+        @param[in]     size:       The size of the part (int).
+        """
+        self._stream = stream
+        self._start = start
+        self._size = size
+        self._position = 0
+    # end def
+
+    def seekable(self):
+        return True
+    # end def
+
+    def readable(self):
+        return True
+    # end def
+
+    def tell(self):
+        return self._position
+    # end def
+
+    def seek(self, offset, whence = io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+
+        elif whence == io.SEEK_END:
+            offset += self._size
+        # end if
+
+        self._position = max(0, offset)
+        return self._position
+    # end def
+
+    def read(self, count = -1):
+        remaining = max(0, self._size - self._position)
+
+        if (count == None) or (count < 0) or (count > remaining):
+            count = remaining
+        # end if
+
+        self._stream.seek(self._start + self._position)
+        data = self._stream.read(count)
+        self._position += len(data)
+
+        return data
+    # end def
+
+    def close(self):
+        pass
+    # end def
+# end class
+
+
+#
+# ----------------
+# Public Functions
+
+def find_archives(search_dir):
+    """
+    Find every deliverable archive below a directory.
+
+    @param[in]    search_dir:      The directory to search (full path)
+                                   (string).
+    @return       (list)           The full path of each archive, sorted.
+    """
+    archives = []
+
+    for root, dirs, files in os.walk(search_dir):
+        for filename in files:
+            if filename.endswith(archive_suffix):
+                archives.append(os.path.join(root, filename))
+            # end if
+        # end for
+    # end for
+
+    return sorted(archives)
+# end def
+
+
+def run_verify(search_dir, workers = None,
+               summary_filename = 'Deliverable_verify_summary.txt'):
+    """
+    Check every deliverable archive below a directory, several at a time.
+
+    @param[in]    search_dir:        The directory to search (full path)
+                                     (string).
+    @param[in]    workers:           The number of archives to check at once,
+                                     None to use one per CPU (int).
+    @param[in]    summary_filename:  The file to write the summary to, None
+                                     to only print it (string).
+    @return       (list)             The outcome of each check
+                                     (list of verify_result).
+    """
+    print('Searching for archives in ' + search_dir + '...')
+    archives = find_archives(search_dir)
+    print('Found ' + str(len(archives)) + ' archives\n')
+
+    start_time = time.time()
+    results = []
+
+    pool = multiprocessing.Pool(workers)
+
+    try:
+        for result in pool.imap_unordered(_verify_job, archives):
+            results.append(result)
+            print('[' + str(len(results)) + '/' + str(len(archives)) + '] ' +
+                  _status(result) + '\t' + result.archive)
+        # end for
+
+        pool.close()
+
+    except:
+        pool.terminate()
+        raise
+
+    finally:
+        pool.join()
+    # end try
+
+    results.sort(key=lambda r: r.archive)
+
+    summary = format_summary(results, time.time() - start_time)
+    print('\n' + summary)
+
+    if summary_filename != None:
+        with open(summary_filename, 'w') as summary_file:
+            summary_file.write(summary)
+        # end with
+    # end if
+
+    return results
+# end def
+
+
+def verify_archive(archive):
+    """
+    Check one deliverable archive: the CRC of every member, the layout and,
+    if it has one, the MANIFEST.
+
+    @param[in]    archive:         The archive (full path) (string).
+    @return       (verify_result)  The outcome of the check.
+    """
+    result = verify_result(archive)
+    start_time = time.time()
+    hashes = {}
+
+    try:
+        with open(archive, 'rb') as stream, \
+             zipfile.ZipFile(stream) as zip_file:
+            _check_members(zip_file, stream, '', hashes, result)
+            result.reproducible = _is_reproducible(zip_file)
+
+            if Altium_Archive.manifest_name in zip_file.namelist():
+                result.manifest = True
+                manifest = Altium_Archive.read_manifest(
+                    zip_file.read(Altium_Archive.manifest_name).decode('utf-8'))
+                _check_manifest(manifest, hashes, result)
+            # end if
+        # end with
+
+        _check_layout(hashes, result)
+
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, OSError, ValueError) as error:
+        result.problems.append('Could not be read: ' + str(error))
+    # end try
+
+    result.elapsed = time.time() - start_time
+
+    return result
+# end def
+
+
+def read_hashes(archive):
+    """
+    Read every member of an archive, and of the zips nested in it, for its
+    size, CRC-32 and SHA-256. Raises zipfile.BadZipFile if a member is
+    damaged.
+
+    @param[in]    archive:         The archive (full path) (string).
+    @return       (dict)           The size, CRC-32 and SHA-256 of each member
+                                   keyed by its path, with the names of the
+                                   zips it is nested in before it.
+    """
+    result = verify_result(archive)
+    hashes = {}
+
+    with open(archive, 'rb') as stream, \
+         zipfile.ZipFile(stream) as zip_file:
+        _check_members(zip_file, stream, '', hashes, result)
+    # end with
+
+    if result.problems != []:
+        raise zipfile.BadZipFile(result.problems[0])
+    # end if
+
+    return hashes
+# end def
+
+
+def open_nested(zip_file, stream, info):
+    """
+    Open a zip nested in another without writing it out. A stored zip is
+    read where it is in the outer file, a compressed one is decompressed
+    into memory, or a temporary file if it is very large. Raises
+    zipfile.BadZipFile if it cannot be read.
+
+    @param[in]    zip_file:        The outer zip (zipfile.ZipFile).
+    @param[in]    stream:          The file the outer zip is read from
+                                   (file object).
+    @param[in]    info:            The nested zip (zipfile.ZipInfo).
+    @return       (file object)    The nested zip, to be opened with 
+                                   zipfile.ZipFile and closed after.
+    """
+    if (info.compress_type == zipfile.ZIP_STORED) and not (info.flag_bits & 0x1):
+        # find where its data starts, after the member's local header
+        stream.seek(info.header_offset)
+        header = stream.read(_local_header_size)
+
+        if header[:4] != _local_signature:
+            raise zipfile.BadZipFile('bad local header')
+        # end if
+
+        [name_length, extra_length] = struct.unpack('<HH', header[26:30])
+
+        return file_window(stream, info.header_offset + _local_header_size +
+                           name_length + extra_length, info.compress_size)
+    # end if
+
+    nested = tempfile.SpooledTemporaryFile(spool_size)
+
+    try:
+        with zip_file.open(info) as member:
+            block = member.read(block_size)
+
+            while block:
+                nested.write(block)
+                block = member.read(block_size)
+            # end while
+        # end with
+
+    except BaseException:
+        nested.close()
+        raise
+    # end try
+
+    nested.seek(0)
+
+    return nested
+# end def
+
+
+def part_number_of(archive):
+    """
+    Get the part number and revision from the name of a deliverable 
+    archive, which has _Folder.zip after them and perhaps a date before.
+
+    @param[in]    archive:         The archive (full path) (string).
+    @return       (string)         The part number and revision.
+    """
+    name = os.path.basename(archive)
+
+    if name.endswith(archive_suffix):
+        name = name[:-len(archive_suffix)]
+    # end if
+
+    return _date_prefix.sub('', name)
+# end def
+
+
+def format_summary(results, elapsed):
+    """
+    Format the outcome of checking a set of archives as a table, with what
+    is wrong with each one that failed.
+
+    @param[in]    results:         The outcome of each check
+                                   (list of verify_result).
+    @param[in]    elapsed:         The total time taken in seconds (float).
+    @return       (string)         The summary.
+    """
+    lines = ['=========   Deliverable Verify Summary   ==========\n',
+             'Archives: \t' + str(len(results)) + '\n',
+             'Time taken: \t' + '%.0f' % elapsed + ' s\n\n']
+
+    for result in results:
+        lines.append(_status(result) + '\t' + str(result.files) + ' files\t' +
+                     '%6.1f' % result.elapsed + ' s\t' + result.archive + '\n')
+
+        for problem in result.problems:
+            lines.append('\t*** ' + problem + '\n')
+        # end for
+
+        for warning in result.warnings:
+            lines.append('\t' + warning + '\n')
+        # end for
+    # end for
+
+    for status in ['OK', 'WARNINGS', 'FAILED']:
+        count = len([r for r in results if _status(r) == status])
+        lines.append('\n' + status + ': \t' + str(count))
+    # end for
+
+    return ''.join(lines) + '\n'
+# end def
+
+
+#
+# ----------------
+# Private Functions
+
+def _verify_job(archive):
+    """
+    Check one archive in a worker process.
+
+    @param[in]    archive:         The archive (full path) (string).
+    @return       (verify_result)  The outcome of the check.
+    """
+    try:
+        return verify_archive(archive)
+
+    except Exception:
+        result = verify_result(archive)
+        result.problems.append(traceback.format_exc().strip().split('\n')[-1])
+        return result
+    # end try
+# end def
+
+
+def _check_members(zip_file, stream, prefix, hashes, result):
+    """
+    Read every member of a zip to check its CRC, recording its size, CRC and
+    hash, and check the zips nested in it in the same way.
+
+    @param[in]    zip_file:        The zip (zipfile.ZipFile).
+    @param[in]    stream:          The file the zip is read from (file object).
+    @param[in]    prefix:          The names of the zips it is nested in, each
+                                   with a slash after it (string).
+    @param[out]   hashes:          The size, CRC-32 and SHA-256 of each member
+                                   keyed by its path, None if it could not be
+                                   read (dict).
+    @param[out]   result:          The outcome of the check (verify_result).
+    """
+    for info in zip_file.infolist():
+        if info.is_dir():
+            continue
+        # end if
+
+        path = prefix + info.filename
+        digest = hashlib.sha256()
+
+        try:
+            with zip_file.open(info) as member:
+                block = member.read(block_size)
+
+                while block:
+                    digest.update(block)
+                    block = member.read(block_size)
+                # end while
+            # end with
+
+            hashes[path] = [info.file_size, info.CRC, digest.hexdigest()]
+
+        except (zipfile.BadZipFile, zlib.error, NotImplementedError) as error:
+            # the CRC is checked when the end of the member is read
+            result.problems.append(path + ': ' + str(error))
+            hashes[path] = None
+        # end try
+
+        result.files += 1
+        result.size += info.file_size
+
+        if info.filename.lower().endswith('.zip'):
+            _check_nested(zip_file, stream, info, path, hashes, result)
+        # end if
+    # end for
+# end def
+
+
+def _check_nested(zip_file, stream, info, path, hashes, result):
+    """
+    Check a zip nested in another without writing it out.
+
+    @param[in]    zip_file:        The outer zip (zipfile.ZipFile).
+    @param[in]    stream:          The file the outer zip is read from
+                                   (file object).
+    @param[in]    info:            The nested zip (zipfile.ZipInfo).
+    @param[in]    path:            Its path in the archive (string).
+    @param[out]   hashes:          The size, CRC-32 and SHA-256 of each member
+                                   keyed by its path (dict).
+    @param[out]   result:          The outcome of the check (verify_result).
+    """
+    try:
+        nested = open_nested(zip_file, stream, info)
+
+    except (zipfile.BadZipFile, zlib.error, NotImplementedError) as error:
+        if hashes.get(path) != None:
+            # not reported already
+            result.problems.append(path + ': ' + str(error))
+        # end if
+
+        return
+    # end try
+
+    try:
+        with zipfile.ZipFile(nested) as nested_zip:
+            _check_members(nested_zip, nested, path + '/', hashes, result)
+        # end with
+
+    except (zipfile.BadZipFile, zipfile.LargeZipFile) as error:
+        result.problems.append(path + ': ' + str(error))
+
+    finally:
+        nested.close()
+    # end try
+# end def
+
+
+def _check_manifest(manifest, hashes, result):
+    """
+    Check that every file in the MANIFEST is in the archive with the same
+    size, CRC-32 and SHA-256.
+
+    @param[in]    manifest:        The size, CRC-32 and SHA-256 of each file
+                                   keyed by its path (dict).
+    @param[in]    hashes:          The same for each member read (dict).
+    @param[out]   result:          The outcome of the check (verify_result).
+    """
+    for [path, expected] in sorted(manifest.items()):
+        if path not in hashes:
+            result.problems.append(path + ': in the MANIFEST but not the archive')
+
+        elif (hashes[path] != None) and (hashes[path] != expected):
+            result.problems.append(path + ': does not match the MANIFEST')
+        # end if
+    # end for
+
+    # zips added as files, such as the 3D zip, are listed without their 
+    # members
+    listed_zips = set(path.rsplit('/', 1)[0] for path in manifest if '/' in path)
+
+    for path in sorted(hashes):
+        if ((path in manifest) or (path == Altium_Archive.manifest_name) or
+            (path == log_filename)):
+            continue
+        # end if
+
+        container = path.rsplit('/', 1)[0] if '/' in path else None
+
+        if ((container != None) and (container in manifest) and 
+            (container not in listed_zips)):
+            continue
+        # end if
+
+        result.warnings.append(path + ': not in the MANIFEST')
+    # end for
+# end def
+
+
+def _check_layout(hashes, result):
+    """
+    Check that an archive has what construct_root_archive puts in it: the
+    3D zip, the Altium files, the gerber and PDF folders and the log.
+
+    @param[in]    hashes:          The members read, keyed by path (dict).
+    @param[out]   result:          The outcome of the check (verify_result).
+    """
+    full_part_number = result.part_number
+    top_level = [path for path in hashes if '/' not in path]
+    folders = [path[:-4] for path in top_level if path.lower().endswith('.zip')]
+
+    # the archive and the gerber and PDF folders are named after the part 
+    # number and revision, the 3D zip after the part number alone
+    models = [folder for folder in folders if folder.endswith('_3D') and
+              full_part_number.startswith(folder[:-3])]
+
+    required = [[full_part_number, 'the gerber folder'],
+                [full_part_number + 'PD', 'the PDF folder'],
+                [altium_folder, 'the Altium files folder']]
+
+    for [folder, description] in required:
+        if folder not in folders:
+            result.problems.append('Missing ' + description + ' (' + folder + '.zip)')
+        # end if
+    # end for
+
+    if models == []:
+        result.problems.append('Missing the 3D zip (<part number>_3D.zip)')
+
+    elif not any(path.lower().endswith('.step') for path in hashes
+                 if path.startswith(models[0] + '.zip/')):
+        result.warnings.append('The 3D zip has no step file')
+    # end if
+
+    for folder in folders:
+        if not any(path.startswith(folder + '.zip/') for path in hashes):
+            result.problems.append(folder + '.zip is empty')
+        # end if
+    # end for
+
+    if (log_filename not in top_level) and not result.reproducible:
+        # only reproducible archives leave it out
+        result.warnings.append('No ' + log_filename)
+    # end if
+# end def
+
+
+def _is_reproducible(zip_file):
+    """
+    Determine if an archive was made in reproducible mode, in which every 
+    member has the same timestamp and the permissions of a Unix system.
+
+    @param[in]    zip_file:        The archive (zipfile.ZipFile).
+    @return       (bool)           True if it was.
+    """
+    members = zip_file.infolist()
+
+    if members == []:
+        return False
+    # end if
+
+    return all((info.date_time == members[0].date_time) and
+               (info.create_system == Altium_Archive.unix_system) and
+               ((info.external_attr >> 16) in [Altium_Archive.file_permissions,
+                                               Altium_Archive.folder_permissions])
+               for info in members)
+# end def
+
+
+def _status(result):
+    """
+    Describe the outcome of a check in one word.
+
+    @param[in]    result:          The outcome of the check (verify_result).
+    @return       (string)         OK, WARNINGS or FAILED.
+    """
+    if result.problems != []:
+        return 'FAILED'
+
+    elif result.warnings != []:
+        return 'WARNINGS'
+    # end if
+
+    return 'OK'
+# end def
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+###########################################################################
+#(C) Copyright Pumpkin, Inc. All Rights Reserved.
+#
+#This file may be distributed under the terms of the License
+#Agreement provided with this software.
+#
+#THIS FILE IS PROVIDED AS IS WITH NO WARRANTY OF ANY KIND,
+#INCLUDING THE WARRANTY OF DESIGN, MERCHANTABILITY AND
+#FITNESS FOR A PARTICULAR PURPOSE.
+###########################################################################
+"""
+@package Altium_Watch.py
+
+Package that watches an Altium project for new OutJob outputs and builds the
+deliverable once Altium has finished writing them.
+"""
+
+__author__ = 'David Wright (david@asteriaec.com)'
+__version__ = '0.1.0' #Versioning: http://www.python.org/dev/peps/pep-0386/
+
+
+#
+# -------
+# Imports
+
+import os
+import sys
+sys.path.insert(1, 'src\\')
+import time
+import datetime
+
+#
+# -------
+# Constants
+
+# files in the project folder that the OutJob writes
+output_ext = ('.xps', '.oxps', '.xls', '.pdf', '.step', '.x_t')
+
+# how long the outputs must be unchanged before they are built (seconds)
+quiet_period = 10.0
+
+# how often the outputs are checked (seconds)
+poll_interval = 1.0
+
+#
+# ----------------
+# Public Functions
+
+def watch(starting_dir, prog_dir, options = [], quiet = quiet_period,
+          interval = poll_interval, builds = None):
+    """
+    Watch a project and build its deliverable each time the OutJob outputs
+    change and then stay unchanged for the quiet period, until interrupted.
+
+    @param[in]    starting_dir:    The Altium project directory (full path)
+                                   (string).
+    @param[in]    prog_dir:        The directory this program is installed in
+                                   (full path) (string).
+    @param[in]    options:         Options to build with, such as --full
+                                   (list of strings).
+    @param[in]    quiet:           How long the outputs must be unchanged
+                                   before building (seconds) (float).
+    @param[in]    interval:        How often to check the outputs (seconds)
+                                   (float).
+    @param[in]    builds:          The number of builds to do before
+                                   returning, None to watch until interrupted
+                                   (int).
+    @return       (list)           The outcome of each build
+                                   (list of Altium_Build.build_result).
+    """
+    import Altium_Build
+
+    print('Watching ' + starting_dir + ' for new outputs, press Ctrl+C to stop')
+
+    # the outputs as they were when last built, the ones already there have
+    # been built by hand or are from an old run
+    built_state = snapshot_outputs(starting_dir)
+    last_state = built_state
+    last_change = time.time()
+    results = []
+
+    try:
+        while (builds == None) or (len(results) < builds):
+            time.sleep(interval)
+
+            state = snapshot_outputs(starting_dir)
+
+            if state != last_state:
+                # still being written, so start the quiet period again
+                last_state = state
+                last_change = time.time()
+                continue
+            # end if
+
+            if ((state == built_state) or
+                (time.time() - last_change < quiet)):
+                continue
+            # end if
+
+            busy = find_busy_files(built_state, state)
+
+            if busy:
+                # Altium still has a file open
+                last_change = time.time()
+                continue
+            # end if
+
+            print('\n' + datetime.datetime.now().strftime("%H:%M:%S") +
+                  ' Outputs have changed: ' + 
+                  ', '.join(describe_changes(starting_dir, built_state, state)))
+
+            # anything written from here on is picked up by the next build
+            built_state = state
+
+            result = Altium_Build.build_deliverable(starting_dir, prog_dir, options,
+                                                    prompt = None)
+            results.append(result)
+
+            print(datetime.datetime.now().strftime("%H:%M:%S") + ' Build ' +
+                  ('complete' if result.completed else 'failed') +
+                  ('' if result.no_errors else ' with errors') +
+                  ('' if result.no_warnings else ' with warnings') +
+                  ', watching for new outputs')
+        # end while
+
+    except KeyboardInterrupt:
+        print('\nStopped watching ' + starting_dir)
+    # end try
+
+    return results
+# end def
+
+
+def snapshot_outputs(starting_dir):
+    """
+    Record the size and modification time of every OutJob output in a
+    project: the gerber and PDF folders and the xps, BOM, pdf and 3D files in
+    the project folder. The deliverable itself is not included.
+
+    @param[in]    starting_dir:    The Altium project directory (full path)
+                                   (string).
+    @return       (dict)           The size and modification time of each
+                                   output file keyed by path.
+    """
+    state = {}
+
+    try:
+        entries = list(os.scandir(starting_dir))
+
+    except OSError:
+        return state
+    # end try
+
+    for entry in entries:
+        try:
+            if entry.is_dir():
+                if _is_output_folder(entry.name):
+                    state.update(_snapshot_folder(entry.path))
+                # end if
+
+            elif entry.name.lower().endswith(output_ext):
+                stat = entry.stat()
+                state[entry.path] = (stat.st_size, stat.st_mtime_ns)
+            # end if
+
+        except OSError:
+            # removed while it was being read
+            continue
+        # end try
+    # end for
+
+    return state
+# end def
+
+
+def describe_changes(starting_dir, old_state, new_state):
+    """
+    List the outputs that have been added, changed or removed.
+
+    @param[in]    starting_dir:    The Altium project directory (full path)
+                                   (string).
+    @param[in]    old_state:       The outputs before (dict).
+    @param[in]    new_state:       The outputs after (dict).
+    @return       (list)           The name of each changed file in the 
+                                   project folder and of each folder with 
+                                   changed files in it (list of strings).
+    """
+    changed = [path for path in new_state if old_state.get(path) != new_state[path]]
+    changed.extend(path for path in old_state if path not in new_state)
+
+    names = set()
+
+    for path in changed:
+        names.add(os.path.relpath(path, starting_dir).split(os.sep)[0])
+    # end for
+
+    return sorted(names)
+# end def
+
+
+def find_busy_files(old_state, new_state):
+    """
+    Find the changed outputs that another program still has open for
+    writing. On windows these cannot be opened for writing by anyone else.
+
+    @param[in]    old_state:       The outputs when last built (dict).
+    @param[in]    new_state:       The outputs now (dict).
+    @return       (list)           The paths of the busy files.
+    """
+    busy = []
+
+    for path in new_state:
+        if old_state.get(path) == new_state[path]:
+            continue
+        # end if
+
+        try:
+            # open without changing anything, this fails while it is locked
+            with open(path, 'ab'):
+                pass
+            # end with
+
+        except OSError:
+            busy.append(path)
+        # end try
+    # end for
+
+    return busy
+# end def
+
+
+#
+# ----------------
+# Private Functions
+
+def _is_output_folder(name):
+    """
+    Determine if a folder in the project folder is written by the OutJob,
+    namely the gerber folder (7xx-xxxxxxx) or the PDF folder (...PD).
+
+    @param[in]    name:            The name of the folder (string).
+    @return       (bool)           True if it is an output folder.
+    """
+    return ('.' not in name) and name.startswith('7') and ('-' in name)
+# end def
+
+
+def _snapshot_folder(path):
+    """
+    Record the size and modification time of every file in a folder.
+
+    @param[in]    path:            The folder (full path) (string).
+    @return       (dict)           The size and modification time of each
+                                   file keyed by path.
+    """
+    state = {}
+
+    for root, dirs, files in os.walk(path):
+        for filename in files:
+            full_path = os.path.join(root, filename)
+
+            try:
+                stat = os.stat(full_path)
+
+            except OSError:
+                continue
+            # end try
+
+            state[full_path] = (stat.st_size, stat.st_mtime_ns)
+        # end for
+    # end for
+
+    return state
+# end def
@@ -28,8 +28,9 @@ import sys
 sys.path.insert(1, 'src\\')
 import shutil
 import datetime
-import Altium_Files
-import time
+import threading
+import Altium_Trace
+import Altium_Archive
 
 #
 #
@@ -37,8 +38,12 @@ import time
 # Classes
 
 class Logger(object):
-    def __init__(self, filename):
-        self.terminal = sys.stdout
+    def __init__(self, filename, terminal = None):
+        if terminal == None:
+            # pass output on to wherever this thread was printing to
+            terminal = current_output()
+        # end if
+        self.terminal = terminal
         if os.path.isfile(filename):
             os.remove(filename)
         # end if
@@ -68,6 +73,405 @@ class Logger(object):
 # end class
 
 
+class output_router(object):
+    """
+    Replacement for sys.stdout that sends what each thread prints to its own 
+    stream, so that several runs in one process each print to their own log.
+    
+    @attribute     default:   Where threads without a stream of their own 
+                              print to.
+    """
+    def __init__(self, default):
+        """
+        Initialise the output_router class
+        
+        @param[in]     default:   Where threads without a stream of their 
+                                  own print to.
+        """
+        self.default = default
+        self._streams = {}
+    # end def
+    
+    def get_stream(self):
+        """
+        Get the stream the current thread prints to.
+        """
+        return self._streams.get(threading.get_ident(), self.default)
+    # end def
+    
+    def set_stream(self, stream):
+        """
+        Set the stream the current thread prints to, None for the default.
+        """
+        if stream == None:
+            self._streams.pop(threading.get_ident(), None)
+            
+        else:
+            self._streams[threading.get_ident()] = stream
+        # end if
+    # end def
+    
+    def write(self, message):
+        self.get_stream().write(message)
+    # end def
+    
+    def flush(self):
+        self.get_stream().flush()
+    # end def
+# end class
+
+
+class run_context:
+    """
+    Class to store the state of a single run of the Altium Documentation 
+    module, so that more than one project can be built in the same process.
+    
+    @attribute     prog_dir:      The directory the program is installed in 
+                                  (full path) (string).
+    @attribute     starting_dir:  The Altium project directory (full path) 
+                                  (string).
+    @attribute     no_errors:     Whether there have been no errors logged 
+                                  (bool).
+    @attribute     no_warnings:   Whether there have been no warnings logged 
+                                  (bool).
+    @attribute     mod_found:     Whether the modification document was found 
+                                  in the schematic (bool).
+    @attribute     assy_number:   The assembly number read from the BOM 
+                                  (string).
+    @attribute     part_number:   The part number read from the BOM (string).
+    @attribute     revision:      The revision read from the BOM (string).
+    @attribute     trace:         The timing trace of this run 
+                                  (Altium_Trace.tracer).
+    @attribute     files:         The directories read during this run 
+                                  (dir_snapshot).
+    @attribute     reproducible:  Whether the archives are made so that the 
+                                  same files always give the same bytes 
+                                  (bool).
+    @attribute     store:         The store that unchanged files are linked 
+                                  to, None to copy every file 
+                                  (Altium_Store.content_store).
+    @attribute     text_cache:    The text read from pdfs on previous runs, 
+                                  None to read every pdf 
+                                  (Altium_TextCache.text_cache).
+    @attribute     thread_logs:   The number of errors and warnings logged 
+                                  by each thread, keyed by thread (dict of 
+                                  lists).
+    @attribute     stage_logs:    The number of errors and warnings logged 
+                                  by each thread running a pipeline stage 
+                                  when the stage started, keyed by thread
+                                  (dict of lists).
+    """
+    def __init__(self, prog_dir, starting_dir = None, trace_filename = None):
+        """
+        Initialise the run_context class
+        
+        @param[in]     prog_dir:        The directory the program is 
+                                        installed in (full path) (string).
+        @param[in]     starting_dir:    The Altium project directory (full 
+                                        path) (string).
+        @param[in]     trace_filename:  The file to save the timing trace to, 
+                                        None to not trace the run (string).
+        """
+        self.prog_dir = prog_dir
+        self.starting_dir = starting_dir
+        self.no_errors = True
+        self.no_warnings = True
+        self.mod_found = False
+        self.assy_number = None
+        self.part_number = None
+        self.revision = None
+        self.trace = Altium_Trace.tracer(trace_filename)
+        self.files = dir_snapshot()
+        self.reproducible = False
+        self.store = None
+        self.text_cache = None
+        self.thread_logs = {}
+        self.stage_logs = {}
+    # end def
+    
+    def __getstate__(self):
+        # a worker process counts only what its own stage logs
+        state = dict(self.__dict__)
+        state['thread_logs'] = {}
+        state['stage_logs'] = {}
+        return state
+    # end def
+    
+    def start_stage_log(self):
+        """
+        Start counting the errors and warnings logged by the current thread, 
+        so that those of a pipeline stage are known even while other stages
+        log at the same time.
+        """
+        self.stage_logs[threading.get_ident()] = self._thread_log()[:]
+    # end def
+    
+    def stop_stage_log(self):
+        """
+        Stop counting the errors and warnings logged by the current thread.
+        
+        @return       (list)          The number of errors and warnings
+                                      logged since start_stage_log.
+        """
+        start = self.stage_logs.pop(threading.get_ident(), [0, 0])
+        
+        return [count - previous for [count, previous] in zip(self._thread_log(), start)]
+    # end def
+    
+    def error_count(self):
+        """
+        Get the number of errors logged by the current thread, so that a 
+        function can tell whether what it called failed even while other 
+        stages log errors at the same time.
+        
+        @return       (int)           The number of errors.
+        """
+        return self._thread_log()[0]
+    # end def
+    
+    def _thread_log(self):
+        """
+        Get the number of errors and warnings logged by the current thread.
+        
+        @return       (list)          The number of errors and warnings, 
+                                      updated as they are logged.
+        """
+        return self.thread_logs.setdefault(threading.get_ident(), [0, 0])
+    # end def
+    
+    def log_error(self, get = False):
+        """
+        Function to log errors within this run.
+    
+        @param[in]    get:        True  = return no_errors without logging an error
+                                  False = log an error and return nothing (bool)
+        @return       (bool)      True  = no errors have been logged.
+                                  False = Errors have been logged.
+        """  
+        
+        # determine which action to take
+        if get:
+            # return the state
+            return self.no_errors
+        
+        else:
+            # log an error
+            self.no_errors = False
+            self._thread_log()[0] += 1
+        # end if
+    # end def
+    
+    def log_warning(self, get = False):
+        """
+        Function to log warnings within this run.
+    
+        @param[in] get:          True  = return no_warnings without logging a warning
+                                 False = log a warning and return nothing (bool)
+        @return    (bool)        True  = no warnings have been logged.
+                                 False = Warnings have been logged.
+        """    
+        
+        # determine which action to take
+        if get:
+            # return the state
+            return self.no_warnings
+        
+        else:
+            # log a warning
+            self.no_warnings = False
+            self._thread_log()[1] += 1
+        # end if
+    # end def
+# end class
+
+
+class dir_snapshot:
+    """
+    Class to store the listing and file details of the directories read 
+    during a run, so that each directory is only read once rather than once 
+    per listdir and getmtime call. Anything that writes to a directory that 
+    may have been read must call invalidate.
+    """
+    def __init__(self):
+        """
+        Initialise the dir_snapshot class
+        """
+        self._dirs = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+    # end def
+    
+    def __getstate__(self):
+        # a copy sent to a worker process reads the directories again
+        return {}
+    # end def
+    
+    def __setstate__(self, state):
+        self.__init__()
+    # end def
+    
+    def scan(self, path):
+        """
+        Get the details of every entry in a directory, reading it if it has 
+        not been read since it was last written to.
+        
+        @param[in]    path:        The directory (full path) (string).
+        @return       (dict)       The name, whether it is a directory, size 
+                                   and modification time of each entry, 
+                                   keyed by the case normalised name.
+        """
+        key = os.path.normcase(os.path.normpath(path))
+        
+        with self._lock:
+            entries = self._dirs.get(key)
+            generation = self._generation
+        # end with
+        
+        if entries != None:
+            return entries
+        # end if
+        
+        entries = {}
+        
+        # scandir gets the file details with the listing on windows
+        with os.scandir(path) as directory:
+            for entry in directory:
+                try:
+                    stat = entry.stat()
+                    
+                except OSError:
+                    # removed while it was being read
+                    continue
+                # end try
+                
+                entries[os.path.normcase(entry.name)] = [entry.name, entry.is_dir(),
+                                                         stat.st_size, stat.st_mtime]
+            # end for
+        # end with
+        
+        with self._lock:
+            if generation == self._generation:
+                # nothing was written while it was being read
+                self._dirs[key] = entries
+            # end if
+        # end with
+        
+        return entries
+    # end def
+    
+    def listdir(self, path):
+        """
+        List the entries in a directory, as os.listdir.
+        
+        @param[in]    path:        The directory (full path) (string).
+        @return       (list)       The name of each entry.
+        """
+        return [entry[0] for entry in self.scan(path).values()]
+    # end def
+    
+    def getmtime(self, path):
+        """
+        Get the modification time of a file, as os.path.getmtime.
+        
+        @param[in]    path:        The file (full path) (string).
+        @return       (float)      The modification time.
+        """
+        entry = self._entry(path)
+        
+        if entry == None:
+            # not there, so raise the usual error
+            return os.path.getmtime(path)
+        # end if
+        
+        return entry[3]
+    # end def
+    
+    def getsize(self, path):
+        """
+        Get the size of a file, as os.path.getsize.
+        
+        @param[in]    path:        The file (full path) (string).
+        @return       (int)        The size in bytes.
+        """
+        entry = self._entry(path)
+        
+        if entry == None:
+            return os.path.getsize(path)
+        # end if
+        
+        return entry[2]
+    # end def
+    
+    def isfile(self, path):
+        """
+        Determine if a path is a file, as os.path.isfile.
+        
+        @param[in]    path:        The path (full path) (string).
+        @return       (bool)       True if it is a file.
+        """
+        entry = self._entry(path)
+        
+        return (entry != None) and not entry[1]
+    # end def
+    
+    def isdir(self, path):
+        """
+        Determine if a path is a directory, as os.path.isdir.
+        
+        @param[in]    path:        The path (full path) (string).
+        @return       (bool)       True if it is a directory.
+        """
+        entry = self._entry(path)
+        
+        return (entry != None) and entry[1]
+    # end def
+    
+    def invalidate(self, path):
+        """
+        Forget what is known about a path that has been written to, so that 
+        it and its directory are read again.
+        
+        @param[in]    path:        The file or directory written to (full 
+                                   path) (string).
+        """
+        key = os.path.normcase(os.path.normpath(path))
+        parent = os.path.dirname(key)
+        
+        with self._lock:
+            self._generation += 1
+            
+            for cached in list(self._dirs.keys()):
+                if ((cached == key) or (cached == parent) or 
+                    cached.startswith(key.rstrip(os.sep) + os.sep)):
+                    del self._dirs[cached]
+                # end if
+            # end for
+        # end with
+    # end def
+    
+    def _entry(self, path):
+        """
+        Get the details of a single entry.
+        
+        @param[in]    path:        The path (full path) (string).
+        @return       (list)       The name, whether it is a directory, size 
+                                   and modification time, None if it does 
+                                   not exist.
+        """
+        [parent, name] = os.path.split(os.path.normpath(path))
+        
+        try:
+            entries = self.scan(parent)
+            
+        except OSError:
+            return None
+        # end try
+        
+        return entries.get(os.path.normcase(name))
+    # end def
+# end class
+
+
 class mod_date:
     """ 
     Class to store a files modification information.
@@ -95,11 +499,82 @@ class mod_date:
 # ----------------
 # Public Functions 
 
-def get_part_number(starting_dir):
+def current_output():
+    """
+    Get the stream that the current thread prints to.
+    
+    @return       (stream)         The stream.
+    """
+    if isinstance(sys.stdout, output_router):
+        return sys.stdout.get_stream()
+    # end if
+    
+    return sys.stdout
+# end def
+
+
+def route_output(stream):
+    """
+    Send everything the current thread prints to a stream.
+    
+    @param[in]    stream:          The stream to print to, None to go back to 
+                                   the default.
+    @return       (stream)         The stream the thread printed to before.
+    """
+    with route_output.lock:
+        if not isinstance(sys.stdout, output_router):
+            sys.stdout = output_router(sys.stdout)
+        # end if
+    # end with
+    
+    previous = sys.stdout.get_stream()
+    sys.stdout.set_stream(stream)
+    
+    return previous
+# end def
+
+# lock to install the output router only once
+route_output.lock = threading.Lock()
+
+
+def copy_file(context, source, destination, copy_function = shutil.copyfile,
+              shared = False):
+    """
+    Copy a file, recording the copy in the timing trace.
+    
+    @param[in]    context:         The state of this run (run_context).
+    @param[in]    source:          The file to copy (full path) (string).
+    @param[in]    destination:     The file to create (full path) (string).
+    @param[in]    copy_function:   The function to copy it with, such as 
+                                   shutil.copy to also copy the permissions 
+                                   (function).
+    @param[in]    shared:          The copy is never changed, so it may be 
+                                   linked to the run's store instead (bool).
+    @return       (string)         The destination.
+    """
+    with context.trace.span('copy ' + os.path.basename(source), 'copy') as event:
+        event.add_bytes(context.files.getsize(source))
+        
+        if shared and (context.store != None):
+            event.args['method'] = context.store.link(source, destination)
+            
+        else:
+            copy_function(source, destination)
+        # end if
+    # end with
+    
+    context.files.invalidate(destination)
+    
+    return destination
+# end def
+
+
+def get_part_number(context, starting_dir):
     """
     Function to determine the part number for the folders contained in the 
     starting directory.
 
+    @param[in]    context:         The state of this run (run_context).
     @param[in]    starting_dir:    The Altium project directory (full path) 
                                    (string).
     @return       list of strings: The part number prefix, part number and 
@@ -107,7 +582,7 @@ def get_part_number(starting_dir):
     """    
     
     # get the file list of the starting directory
-    root_file_list = os.listdir(starting_dir)
+    root_file_list = context.files.listdir(starting_dir)
     
     # find project Outputs folder
     for filename in root_file_list:
@@ -127,11 +602,12 @@ def get_part_number(starting_dir):
     return None
 # end def    
 
-def get_assy_number(starting_dir):
+def get_assy_number(context, starting_dir):
     """
     Function to determine the assembly number for the folders contained in the 
     starting directory.
 
+    @param[in]    context:         The state of this run (run_context).
     @param[in]    starting_dir:    The Altium project directory (full path) 
                                    (string).
     @return       list of strings: The assembly number prefix, assembly number and 
@@ -139,7 +615,7 @@ def get_assy_number(starting_dir):
     """        
     
     # get the file list of the starting directory
-    root_file_list = os.listdir(starting_dir)
+    root_file_list = context.files.listdir(starting_dir)
     
     # find project Outputs folder
     for filename in root_file_list:
@@ -283,10 +759,12 @@ def check_modified_dates(modified_dates):
     return True
 # end def
 
-def construct_root_archive(output_dir, part_number):
+def construct_root_archive(context, output_dir, part_number):
     """
-    Construct an archive of all of the files to be delivered to Pumpkin.
+    Construct an archive of all of the files to be delivered to Pumpkin. A
+    reproducible archive has no date in its name.
 
+    @param[in]   context:             The state of this run (run_context).
     @param[in]   output_dir:          The packaging outputs directory (full path) 
                                       (string).   
     @param[in]   part_number:         The part number for the design
@@ -297,47 +775,54 @@ def construct_root_archive(output_dir, part_number):
     now = datetime.datetime.now()
     dt_string = now.strftime("%Y%m%d_%H%M_")
     
+    if context.reproducible:
+        # the same files must give the same archive, name included
+        dt_string = ''
+    # end if
+    
     #zip_filename = output_dir + '\\' + part_number + '_Folder'
     zip_filename = output_dir + '\\' + dt_string + part_number + '_Folder'
     
-    # make a folder to put the step file in temporarily
-    temp_dir = output_dir + '\\temp'
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
-    # end
-    
     # get the list of files in the directory
-    file_list = os.listdir(output_dir)
+    file_list = sorted(os.listdir(output_dir))
     
-    # create temporary directory in which to place all of the files needed
-    os.makedirs(temp_dir)    
-    
-    # copy all files into temp directory
-    for filename in file_list:
-        if '.' in filename:
-            # copy files
-            shutil.copy(output_dir +'\\' + filename, temp_dir + '\\' + filename)
+    # stream every file straight into the archive, each folder is zipped on 
+    # its own inside it
+    with context.trace.span('zip ' + part_number + '_Folder', 'archive') as event:
+        with Altium_Archive.archive_writer(zip_filename + '.zip', 
+                                           workers = Altium_Archive.default_workers(),
+                                           reproducible = context.reproducible) as archive:
+            for filename in file_list:
+                if '.' in filename:
+                    # add files
+                    archive.add_file(output_dir +'\\' + filename, filename)
+                    
+                else:
+                    # add folders
+                    folder = output_dir +'\\' + filename
+                    
+                    with context.trace.span('zip ' + filename, 'archive') as folder_event, \
+                         archive.add_nested(filename + '.zip', 
+                                            Altium_Archive.folder_size(folder)) as nested:
+                        folder_event.add_bytes(nested.add_folder(folder))
+                    # end with
+                # end if        
+            # end for 
             
-        else:
-            # copy folders
-            #shutil.copytree(output_dir +'\\' + filename, temp_dir + '\\' + filename)
-            shutil.make_archive(temp_dir +'\\' + filename, 'zip', output_dir +'\\' + filename)
-        # end if        
-    # end for 
-    
-    # make archive
-    shutil.make_archive(zip_filename, 'zip', temp_dir)
+            # list the hash of every file, taken as it was zipped, so the 
+            # package can be checked without a second read
+            manifest_count = archive.add_manifest()
+        # end with
+        
+        event.add_bytes(os.path.getsize(zip_filename + '.zip'))
+        event.args['compression_seconds_saved'] = archive.stats.seconds
+    # end with
     
-    time.sleep(0.5)
+    print(archive.stats.report(os.path.basename(zip_filename) + '.zip'))
+    print('\t' + Altium_Archive.manifest_name + ' lists ' + str(manifest_count) + 
+          ' files with their SHA-256 and CRC-32')
     
-    try:
-        # delete the temp directory
-        shutil.rmtree(temp_dir)       
-        
-    except:
-        print('*** WARNING: Could not delete temporary output directory ***')
-        log_warning()     
-    # end try    
+    context.files.invalidate(zip_filename + '.zip')
     
     # indicate completion
     print('*** Directory ' + part_number + '_Folder.zip' + \